@@ -0,0 +1,109 @@
+# bench/apify_server.py
+"""
+Lokalna atrapa API Apify dla źródła jj_apify — testy i próby bez tokenu i bez sieci.
+
+    python -m bench.apify_server [--items 5000] [--port 8766]
+
+Serwuje to, co czyta jj_apify.py:
+  /v2/acts/{actor}/runs/last       — ostatni udany run ({"data": {"defaultDatasetId": ...}}),
+  /v2/datasets/{id}/items          — elementy datasetu, ?offset=&limit= (nagłówki X-Apify-Pagination-*).
+new_run() dokłada nowy dataset (kolejny run aktora). Co `empty_every`-ty element jest
+pusty, a każdy ma ukryte pole "#debug" — ?clean=true pomija je jak Apify: PO zastosowaniu
+offset/limit, więc strona bywa krótsza niż limit. `requests` liczy żądania stron,
+`served` — zwrócone elementy. ETL kieruje się tutaj przez APIFY_BASE_URL=http://127.0.0.1:PORT.
+"""
+from __future__ import annotations
+
+import json
+import argparse
+import threading
+import datetime as dt
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs
+
+from bench.nfj_server import CITIES, SENIORITY, SKILLS, NFJServer
+
+JSON = {"Content-Type": "application/json; charset=utf-8"}
+
+
+def make_items(n: int, start: int = 0, empty_every: int = 0) -> List[Dict]:
+    today = dt.date.today()
+    return [{} if empty_every and i % empty_every == empty_every - 1 else {
+        "slug": f"firma-{i % 300}-developer-{i}",
+        "title": f"{SENIORITY[i % len(SENIORITY)]} Developer {i}",
+        "company_name": f"Firma {i % 300}",
+        "city": CITIES[i % len(CITIES)],
+        "workplace_type": "remote" if i % 4 == 0 else "office",
+        "experience": SENIORITY[i % len(SENIORITY)].lower(),
+        "published_at": (today - dt.timedelta(days=i % 30)).isoformat() + "T08:00:00.000Z",
+        "skills": [{"name": SKILLS[(i + k) % len(SKILLS)], "level": 3} for k in range(3)],
+        "body": f"Oferta {i}",
+        "#debug": {"scraped": i},
+    } for i in range(start, start + n)]
+
+
+class FakeApify:
+    """Datasety runów aktora (najnowszy = ostatni) i routing jak w API v2."""
+
+    def __init__(self, items: int = 1000, max_limit: int = 1000, empty_every: int = 0):
+        self.max_limit = max_limit  # Apify też przycina zbyt duży limit
+        self.empty_every = empty_every
+        self.datasets: Dict[str, List[Dict]] = {}
+        self.requests = 0
+        self.served = 0
+        self._lock = threading.Lock()
+        self.new_run(items)
+
+    def new_run(self, items: int) -> str:
+        ds_id = f"ds{len(self.datasets) + 1}"
+        self.datasets[ds_id] = make_items(items, start=sum(map(len, self.datasets.values())),
+                                          empty_every=self.empty_every)
+        self.latest = ds_id
+        return ds_id
+
+    def route(self, path: str, query: str) -> Tuple[int, Dict[str, str], str]:
+        parts = [p for p in path.split("/") if p]
+        q = {k: v[0] for k, v in parse_qs(query).items()}
+        if parts[:2] == ["v2", "acts"] and parts[3:] == ["runs", "last"]:
+            return 200, JSON, json.dumps({"data": {"status": "SUCCEEDED", "defaultDatasetId": self.latest}})
+        if len(parts) == 4 and parts[:2] == ["v2", "datasets"] and parts[3] == "items":
+            data = self.datasets.get(parts[2])
+            if data is None:
+                return 404, JSON, json.dumps({"error": {"type": "record-not-found"}})
+            offset = max(0, int(q.get("offset", 0)))
+            limit = min(self.max_limit, max(0, int(q.get("limit", self.max_limit))))
+            page = data[offset: offset + limit]
+            if q.get("clean") in ("true", "1"):  # skipEmpty + skipHidden po stronicowaniu
+                page = [{k: v for k, v in it.items() if not k.startswith("#")} for it in page if it]
+            with self._lock:
+                self.requests += 1
+                self.served += len(page)
+            headers = dict(JSON, **{
+                "X-Apify-Pagination-Total": str(len(data)), "X-Apify-Pagination-Offset": str(offset),
+                "X-Apify-Pagination-Limit": str(limit), "X-Apify-Pagination-Count": str(len(page)),
+            })
+            return 200, headers, json.dumps(page, ensure_ascii=False)
+        return 404, JSON, json.dumps({"error": {"type": "page-not-found"}})
+
+    handle = route
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--items", type=int, default=5000, help="elementów w datasecie ostatniego runu")
+    ap.add_argument("--empty-every", type=int, default=0, help="co który element datasetu jest pusty (0 = żaden)")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8766)
+    args = ap.parse_args()
+    server = NFJServer(FakeApify(args.items, empty_every=args.empty_every), args.host, args.port)
+    print(f"Apify stand-in: {server.base_url} ({args.items} elementów)  —  APIFY_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+# bench/bench_etl.py
+"""
+Benchmark całego biegu ETL (discovery -> pobieranie -> parsowanie -> Writer) na lokalnej atrapie NFJ.
+
+    python -m bench.bench_etl [--jobs 2000] [--latency 0.02 --jitter 0.01] [--error-rate 0.01] [--throttle-rate 0.01]
+
+Uruchamia bench/nfj_server.py w wątku, a `services.worker.etl.main` w osobnym procesie
+(konfiguracja przez ENV, czysta baza w katalogu tymczasowym, bez cache HTTP i archiwum,
+o ile nie podano --cache / --archive). Raportuje:
+  URL-e/s (żądania HTTP ETL), zapisane oferty/s, p50/p99 czasu pobrania (osobno oferty i listingi,
+  łącznie z czekaniem na limiter) i szczytowe RSS procesu ETL.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+from bench.nfj_server import NFJServer, add_server_args, app_from_args
+
+_RESULT = "BENCH_RESULT "
+
+
+def _pct(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(q * len(xs)))]
+
+
+def child() -> None:
+    """Proces ETL: main() z pomiarem czasu każdego AsyncFetcher.get_text."""
+    from services.worker.etl import main as etl
+    from services.worker.etl.crawler import AsyncFetcher
+    from services.worker.etl.metrics import METRICS
+    from services.worker.etl.sources.nofluff import page_kind
+
+    lat: Dict[str, List[float]] = {"job": [], "listing": []}
+    orig = AsyncFetcher.get_text
+
+    async def timed(self, url: str):
+        t = time.perf_counter()
+        try:
+            return await orig(self, url)
+        finally:
+            lat[page_kind(url)].append(time.perf_counter() - t)
+
+    AsyncFetcher.get_text = timed
+    t0 = time.perf_counter()
+    stats = etl.main()
+    elapsed = time.perf_counter() - t0
+    out = {
+        "elapsed": elapsed,
+        "stats": stats,
+        "requests": {k: len(v) for k, v in lat.items()},
+        "latency": {k: {"p50": _pct(v, 0.5), "p99": _pct(v, 0.99)} for k, v in lat.items()},
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # Linux: KiB
+        "stages": {k: v for k, v in METRICS.summary()["histograms"].items() if k.startswith("etl_stage_seconds")},
+    }
+    print(_RESULT + json.dumps(out))
+
+
+def run(args: argparse.Namespace) -> Dict:
+    app = app_from_args(args)
+    with NFJServer(app) as server, tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            NFJ_BASE_URL=server.base_url,
+            DB_PATH=str(Path(tmp) / "bench.db"),
+            NFJ_LIMIT=str(args.limit or args.jobs * 2),
+            NFJ_PAGES=str(args.jobs // args.page_size + 2),  # listing root mieści wszystkie oferty
+            NFJ_DELAY=str(args.delay),
+            NFJ_BURST=str(args.burst),
+            NFJ_CONCURRENCY=str(args.concurrency),
+            NFJ_CONNECTIONS=str(args.connections),
+            NFJ_HTTP_CACHE=str(Path(tmp) / "http_cache.db") if args.cache else "",
+            NFJ_RAW_ARCHIVE=str(Path(tmp) / "raw_archive") if args.archive else "",
+            NFJ_RESUME="0",
+            NFJ_SKIP_EXISTING="1",
+            RAW_DUMP="0",
+            ETL_METRICS_FILE=str(Path(tmp) / "etl.prom"),
+        )
+        proc = subprocess.run(
+            [sys.executable, "-m", "bench.bench_etl", "--child"], env=env,
+            stdout=subprocess.PIPE, stderr=None if args.verbose else subprocess.PIPE, text=True,
+        )
+        line = next((ln for ln in reversed(proc.stdout.splitlines()) if ln.startswith(_RESULT)), None)
+        if proc.returncode != 0 or line is None:
+            sys.stderr.write(proc.stderr or "")
+            raise SystemExit(f"ETL zakończony kodem {proc.returncode}")
+        res = json.loads(line[len(_RESULT):])
+        res["server"] = {str(k): v for k, v in sorted(app.counts.items())}
+    return res
+
+
+def report(res: Dict) -> None:
+    el = res["elapsed"]
+    req = res["requests"]
+    total = req["job"] + req["listing"]
+    st = res["stats"]
+    print(f"czas:        {el:8.2f} s")
+    print(f"URL-e/s:     {total / el:8.1f}  (żądań: {total}; oferty {req['job']}, listingi {req['listing']})")
+    print(f"oferty/s:    {st.get('saved', 0) / el:8.1f}  (zapisane: {st.get('saved', 0)}; "
+          f"discovery {st.get('discovered', 0)}, pominięte {st.get('skipped', 0)})")
+    for kind in ("job", "listing"):
+        lat = res["latency"][kind]
+        print(f"fetch {kind:8s} p50 {lat['p50'] * 1000:7.1f} ms   p99 {lat['p99'] * 1000:7.1f} ms")
+    for name, h in sorted(res.get("stages", {}).items()):
+        stage = name.split('"')[1]
+        print(f"etap {stage:9s} p50 {h['p50'] * 1000:7.2f} ms   p99 {h['p99'] * 1000:7.2f} ms   "
+              f"razem {h['sum']:7.2f} s  (n={h['count']})")
+    print(f"peak RSS:    {res['peak_rss_mb']:8.1f} MiB")
+    print(f"serwer:      {res['server']}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_server_args(ap)
+    ap.add_argument("--limit", type=int, default=0, help="NFJ_LIMIT (0 = wszystkie odkryte)")
+    ap.add_argument("--delay", type=float, default=0.0, help="NFJ_DELAY (0 = limiter 1000 żądań/s)")
+    ap.add_argument("--burst", type=int, default=32, help="NFJ_BURST")
+    ap.add_argument("--concurrency", type=int, default=32, help="NFJ_CONCURRENCY")
+    ap.add_argument("--connections", type=int, default=16, help="NFJ_CONNECTIONS")
+    ap.add_argument("--cache", action="store_true", help="z cache HTTP (NFJ_HTTP_CACHE)")
+    ap.add_argument("--archive", action="store_true", help="z archiwum HTML (NFJ_RAW_ARCHIVE)")
+    ap.add_argument("--json", action="store_true", help="wynik jako JSON")
+    ap.add_argument("--verbose", action="store_true", help="pokaż logi ETL")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        child()
+        return
+    res = run(args)
+    if args.json:
+        print(json.dumps(res, indent=2))
+    else:
+        report(res)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# bench/bench_links.py
+"""
+Mikrobenchmark ekstrakcji linków z listingu NFJ (tests/fixtures/nfj/listing_*.html).
+
+    python -m bench.bench_links [--rounds 2000]
+
+Porównuje extract_job_links (jeden regex, kanonizacja i dedup w jednym przebiegu)
+z poprzednim _extract_links_from_listing (4 regexy + lista z duplikatami).
+"""
+from __future__ import annotations
+
+import re
+import time
+import argparse
+from pathlib import Path
+from typing import Callable, List
+
+from services.worker.etl.sources.nofluff_parser import extract_job_links
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "nfj"
+
+_LIST_JOB_LINK_RE        = re.compile(r'href="(/(?:en|pl)/job/[^"]+)"', re.I)
+_LIST_JOB_LINK_DATAHREF  = re.compile(r'data-href="(/(?:en|pl)/job/[^"]+)"', re.I)
+_LIST_JOB_LINK_ABS_RE    = re.compile(r'href="(https://nofluffjobs\.com/(?:en|pl)/job/[^"]+)"', re.I)
+_ANY_JOB_URL_RE          = re.compile(r'https://nofluffjobs\.com/(?:en|pl)/job/[^"\'<>\s]+', re.I)
+
+
+def legacy_extract(html: str) -> List[str]:
+    """_extract_links_from_listing sprzed extract_job_links."""
+    norm = lambda u: u if u.startswith("http") else f"https://nofluffjobs.com{u}"
+    links = []
+    for m in _LIST_JOB_LINK_RE.finditer(html):
+        links.append(norm(m.group(1)))
+    for m in _LIST_JOB_LINK_DATAHREF.finditer(html):
+        links.append(norm(m.group(1)))
+    for m in _LIST_JOB_LINK_ABS_RE.finditer(html):
+        links.append(norm(m.group(1)))
+    for m in _ANY_JOB_URL_RE.finditer(html):
+        links.append(norm(m.group(0)))
+    seen, out = set(), []
+    for u in links:
+        if u not in seen:
+            seen.add(u)
+            out.append(u)
+    return out
+
+
+def measure(fn: Callable[[str], List[str]], pages: List[str], rounds: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for h in pages:
+            fn(h)
+    return rounds * len(pages) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rounds", type=int, default=2000)
+    args = ap.parse_args()
+
+    pages = [p.read_text(encoding="utf-8") for p in sorted(FIXTURES.glob("listing_*.html"))]
+    print(f"korpus: {len(pages)} listingów, {sum(map(len, pages)) / 1024:.0f} KiB, rounds={args.rounds}")
+    for name, fn in (("legacy", legacy_extract), ("extract_job_links", extract_job_links)):
+        links = sum(len(fn(h)) for h in pages)
+        print(f"{name:>18}: {measure(fn, pages, args.rounds):9.0f} pages/s  links={links}")
+
+
+if __name__ == "__main__":
+    main()
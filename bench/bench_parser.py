@@ -0,0 +1,106 @@
+# bench/bench_parser.py
+"""
+Benchmark parsera strony oferty NFJ na korpusie tests/fixtures/nfj.
+
+    python -m bench.bench_parser [--rounds 200]
+
+Raportuje strony/s oraz bajty alokowane na stronę (szczyt wg tracemalloc)
+dla nowego parsera i — dla porównania — poprzedniej wersji z nofluff.py.
+"""
+from __future__ import annotations
+
+import re
+import json
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from services.worker.etl.sources.nofluff_parser import parse_job_fields
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "nfj"
+
+_LEGACY_REMOTE_HINT = re.compile(r"\b(remote|zdaln\w*|home\s*office|hybryd\w*)\b", re.I)
+
+
+def legacy_parse(html: str) -> Dict:
+    """Parser sprzed nofluff_parser (regex DOTALL po całym HTML + 4 pełne skany fallbacków)."""
+    job = None
+    for m in re.finditer(r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>', html, flags=re.S | re.I):
+        try:
+            data = json.loads(m.group(1).strip())
+        except Exception:
+            continue
+        if isinstance(data, dict):
+            if data.get("@type") == "JobPosting":
+                job = data
+            elif isinstance(data.get("@graph"), list):
+                job = next((d for d in data["@graph"] if isinstance(d, dict) and d.get("@type") == "JobPosting"), None)
+        elif isinstance(data, list):
+            job = next((d for d in data if isinstance(d, dict) and d.get("@type") == "JobPosting"), None)
+        if job:
+            break
+    title = company = location = ""
+    if job:
+        title = job.get("title") or ""
+        company = (job.get("hiringOrganization") or {}).get("name") or ""
+    if not location and (_LEGACY_REMOTE_HINT.search(html) or _LEGACY_REMOTE_HINT.search(title)):
+        location = "Zdalnie"
+    if not title:
+        mt = re.search(r"<title>(.*?)</title>", html, re.S | re.I)
+        if mt: title = mt.group(1).split("|")[0].strip()
+    if not company:
+        mco = re.search(r'"hiringOrganization"\s*:\s*{[^}]*"name"\s*:\s*"([^"]+)"', html)
+        if mco: company = mco.group(1)
+    if not location:
+        mx = re.search(r'"addressLocality"\s*:\s*"([^"]+)"', html)
+        if mx: location = mx.group(1)
+    return {"title": title, "company": company, "location": location or "Nie podano"}
+
+
+def load_corpus() -> List[str]:
+    return [p.read_text(encoding="utf-8") for p in sorted(FIXTURES.glob("job_*.html"))]
+
+
+def measure(fn: Callable[[str], Dict], pages: List[str], rounds: int) -> Dict[str, float]:
+    # przepustowość (bez tracemalloc — on sam spowalnia alokacje)
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for h in pages:
+            fn(h)
+    elapsed = time.perf_counter() - t0
+    n = rounds * len(pages)
+
+    # alokacje: szczytowa liczba bajtów zaalokowanych w trakcie parsowania strony
+    peaks = []
+    tracemalloc.start()
+    for h in pages:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn(h)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        "pages_per_s": n / elapsed,
+        "mb_per_s": sum(len(h) for h in pages) * rounds / elapsed / 1e6,
+        "alloc_kib_per_page": sum(peaks) / len(peaks) / 1024,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rounds", type=int, default=200)
+    args = ap.parse_args()
+
+    pages = load_corpus()
+    print(f"korpus: {len(pages)} stron, {sum(map(len, pages)) / 1024:.0f} KiB, rounds={args.rounds}")
+    for name, fn in (("legacy", legacy_parse), ("nofluff_parser", parse_job_fields)):
+        r = measure(fn, pages, args.rounds)
+        print(f"{name:>15}: {r['pages_per_s']:9.0f} pages/s  {r['mb_per_s']:7.1f} MB/s  "
+              f"alloc {r['alloc_kib_per_page']:7.1f} KiB/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# bench/bench_queries.py
+"""
+Plany i czasy zapytań API i dashboardu na bazie o realistycznym rozmiarze.
+
+    python -m bench.bench_queries [--jobs 50000] [--repeat 5] [--db data/ai_jobs.db]
+
+Bez --db buduje syntetyczną bazę w katalogu tymczasowym (ensure_schema + wiersze jobs_clean,
+triggery wypełniają jobs_fts / job_skills / skill_counts). Z --db mierzy istniejącą bazę
+— najpierw ensure_schema, czyli migracje i brakujące indeksy.
+Dla każdego zapytania: EXPLAIN QUERY PLAN (FULL SCAN = przegląd całej jobs_clean bez indeksu)
+i mediana czasu z --repeat wykonań. SQL pochodzi wprost z services/api/app.py
+i services/dashboard/queries.py, więc raport dotyczy dokładnie tego, co wykonują serwisy.
+"""
+from __future__ import annotations
+
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import datetime as dt
+import statistics
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+from sqlalchemy import create_engine
+
+from bench.nfj_server import CITIES, SENIORITY, SKILLS
+from services.api import app as api
+from services.dashboard import queries as dash
+from services.worker.etl.main import ensure_schema
+from services.common.normalize import fold
+
+
+class Case(NamedTuple):
+    name: str
+    sql: str
+    params: Dict
+
+
+def api_case(name: str, sort: str = "recent", after=None, limit: int = 50, **filters) -> Case:
+    args = [filters.get(k) for k in ("q", "location", "city", "remote", "seniority")]
+    args += [tuple(filters.get("skills", ())), filters.get("skill_mode", "all"),
+             filters.get("include_expired", False), filters.get("source")]
+    sql, params = api._jobs_sql(*args, sort=sort, after=after, limit=limit)
+    return Case(f"api  {name}", sql, params)
+
+
+def dash_case(name: str, ttl: str = "", loc: str = "", sen: str = "", offset: int = -1) -> Case:
+    cond, params = dash.build_where(ttl, loc, sen)
+    if offset < 0:
+        return Case(f"dash {name}", dash.COUNT_SQL.format(cond=cond), params)
+    return Case(f"dash {name}", dash.PAGE_SQL.format(cond=cond), dict(params, lim=200, off=offset))
+
+
+def cases() -> List[Case]:
+    week = (dt.date.today() - dt.timedelta(days=7)).isoformat()
+    return [
+        api_case("recent"),
+        api_case("recent, cursor", after=("2024-06-01", "https://x.test/job/5")),
+        api_case("city", city="Poznań"),
+        api_case("remote", remote=True),
+        api_case("seniority", seniority="senior"),
+        api_case("location", location="Kraków"),
+        api_case("source", source="justjoin"),
+        api_case("skills all", skills=("python", "sql")),
+        api_case("q relevance", q="python developer", sort="relevance"),
+        api_case("q + city", q="data", city="Warszawa", sort="relevance"),
+        Case("api  trending", api._trending_sql(None), {"top": 10}),
+        Case("api  trending 7d", api._trending_sql(7), {"top": 10, "since": week}),
+        Case("api  export since", "SELECT id FROM jobs_clean WHERE updated_at >= :since ORDER BY updated_at, rowid",
+             {"since": week}),
+        dash_case("count all"),
+        dash_case("count city+seniority", loc="Poznań", sen="Senior"),
+        dash_case("page all", offset=0),
+        dash_case("page deep offset", offset=5000),
+        dash_case("page remote", loc="zdalnie", offset=0),
+        dash_case("page title", ttl="python", offset=0),
+    ]
+
+
+def build_db(path: Path, n: int) -> None:
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    ensure_schema(engine)
+    rng = random.Random(0)
+    today = dt.date.today()
+    roles = ["Python Developer", "Data Engineer", "Java Developer", "DevOps Engineer", "Frontend Developer",
+             "QA Engineer", "Data Analyst", "Product Manager"]
+    rows = []
+    for i in range(n):
+        remote = rng.random() < 0.25
+        city = rng.choice(CITIES)
+        rows.append((
+            f"https://x.test/job/{i}", f"{rng.choice(SENIORITY)} {rng.choice(roles)}", f"Firma {i % 900}",
+            "Zdalnie" if remote else city, rng.choice(SENIORITY), f"https://x.test/job/{i}",
+            (today - dt.timedelta(days=rng.randrange(365))).isoformat(),
+            "justjoin" if i % 3 == 0 else "nofluff", ",".join(rng.sample(SKILLS, 4)),
+            None if remote else fold(city), int(remote), f"{today - dt.timedelta(days=rng.randrange(365))}T08:00:00",
+            today.isoformat() if rng.random() < 0.05 else None,
+        ))
+    con = sqlite3.connect(path)
+    with con:
+        con.executemany(
+            "INSERT INTO jobs_clean(id, title, company, location, seniority, url, posted_at, source, skills, "
+            "city, remote, updated_at, expired_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    con.execute("ANALYZE")
+    con.close()
+
+
+def plan(con: sqlite3.Connection, case: Case) -> str:
+    rows = con.execute("EXPLAIN QUERY PLAN " + case.sql, case.params).fetchall()
+    return "; ".join(r[3] for r in rows)
+
+
+def full_scan(detail: str) -> bool:
+    """Przegląd całej jobs_clean bez indeksu (SCAN j / SCAN jobs_clean, bez USING)."""
+    return any(
+        step.strip() in ("SCAN j", "SCAN jobs_clean") for step in detail.split(";")
+    )
+
+
+def measure(con: sqlite3.Connection, case: Case, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        con.execute(case.sql, case.params).fetchall()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--jobs", type=int, default=50000, help="ofert w bazie syntetycznej")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--db", help="istniejąca baza zamiast syntetycznej")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            path = Path(args.db)
+            ensure_schema(create_engine(f"sqlite:///{path}", future=True))
+        else:
+            path = Path(tmp) / "bench.db"
+            t0 = time.perf_counter()
+            build_db(path, args.jobs)
+            print(f"baza syntetyczna: {args.jobs} ofert w {time.perf_counter() - t0:.1f} s")
+        api.engine = create_engine(f"sqlite:///{path}")  # _jobs_sql / _trending_sql sprawdzają tę bazę
+        con = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            total = con.execute("SELECT COUNT(*) FROM jobs_clean").fetchone()[0]
+            print(f"jobs_clean: {total} wierszy\n")
+            print(f"{'zapytanie':<28} {'ms':>8}  plan")
+            scans = 0
+            for case in cases():
+                detail = plan(con, case)
+                scans += full_scan(detail)
+                flag = "FULL SCAN  " if full_scan(detail) else ""
+                print(f"{case.name:<28} {measure(con, case, args.repeat):>8.2f}  {flag}{detail}")
+            print(f"\npełne przeglądy jobs_clean: {scans}")
+        finally:
+            con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# bench/bench_skills.py
+"""
+Mikrobenchmark ekstrakcji skilli: słownik rośnie, tekst ten sam.
+
+    python -m bench.bench_skills [--sizes 75,1000,5000] [--docs 2000]
+
+Porównuje dawną pętlę `tech in text` po całym słowniku (koszt ~ rozmiar słownika
+i fałszywe trafienia typu "git" w "digital") z SkillMatcher (trie po tokenach).
+"""
+from __future__ import annotations
+
+import time
+import random
+import argparse
+from typing import Callable, List
+
+from services.worker.etl.nlp import TECH_DICT, SKILL_ALIASES, SkillMatcher
+
+_WORDS = ("we are looking for a digital engineer with experience in building scalable systems "
+          "knowledge of cloud and modern tooling is a plus team work communication english").split()
+
+
+def synthetic_dict(size: int) -> List[str]:
+    rnd = random.Random(size)
+    out = list(TECH_DICT)
+    while len(out) < size:
+        n = rnd.choice((1, 1, 2))
+        out.append(" ".join(f"skill{rnd.randrange(10 ** 6)}" for _ in range(n)))
+    return out
+
+
+def corpus(n: int, skills: List[str]) -> List[str]:
+    rnd = random.Random(0)
+    docs = []
+    for _ in range(n):
+        words = [rnd.choice(_WORDS) for _ in range(120)] + rnd.sample(skills, 6)
+        rnd.shuffle(words)
+        docs.append(" ".join(words))
+    return docs
+
+
+def legacy(skills: List[str]) -> Callable[[str], List[str]]:
+    def extract(text: str) -> List[str]:
+        t = text.lower()
+        return sorted({tech for tech in skills if tech in t})
+    return extract
+
+
+def measure(fn: Callable[[str], List[str]], docs: List[str]) -> float:
+    t0 = time.perf_counter()
+    for d in docs:
+        fn(d)
+    return len(docs) / (time.perf_counter() - t0)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="75,1000,5000")
+    ap.add_argument("--docs", type=int, default=2000)
+    args = ap.parse_args()
+
+    for size in (int(s) for s in args.sizes.split(",")):
+        skills = synthetic_dict(size)
+        docs = corpus(args.docs, skills)
+        t0 = time.perf_counter()
+        matcher = SkillMatcher(skills, SKILL_ALIASES)
+        build = (time.perf_counter() - t0) * 1000
+        print(f"słownik={len(skills):>5}  build={build:6.1f} ms  "
+              f"legacy={measure(legacy(skills), docs):8.0f} docs/s  "
+              f"trie={measure(matcher.extract, docs):8.0f} docs/s")
+
+
+if __name__ == "__main__":
+    main()
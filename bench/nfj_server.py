@@ -0,0 +1,267 @@
+# bench/nfj_server.py
+"""
+Lokalna atrapa NoFluffJobs do benchmarków i testów crawla — bez ruchu do prawdziwego serwisu.
+
+    python -m bench.nfj_server [--jobs 5000] [--port 8765] [--latency 0.05] [--error-rate 0.01] [--throttle-rate 0.01]
+
+Serwuje to, co czyta nofluff.py:
+  /{pl,en}                         — root (linki kategorii do auto-discovery + oferty),
+  /{pl,en}/remote                  — oferty zdalne,
+  /{pl,en}/{kat}, /{pl,en}/remote/{kat} — listingi kategorii; wszystkie stronicowane ?page=N,
+  /{pl,en}/job/{slug}              — strona oferty z JSON-LD JobPosting.
+Strony ofert mają ETag (skrót treści) i obsługują HEAD; expire(slug) zdejmuje ofertę
+z listingów, a jej strona odpowiada 410 — do testów odświeżania (refresh.py).
+Dane są syntetyczne i deterministyczne (--seed). Opóźnienie odpowiedzi (--latency ± --jitter),
+odsetek błędów 500 (--error-rate) i 429 z Retry-After (--throttle-rate) — losowane per żądanie.
+ETL kieruje się tutaj przez NFJ_BASE_URL=http://127.0.0.1:PORT.
+"""
+from __future__ import annotations
+
+import json
+import time
+import hashlib
+import random
+import argparse
+import threading
+import datetime as dt
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+CATEGORIES = ["backend", "frontend", "fullstack", "devops", "data", "testing", "mobile", "security"]
+CITIES = ["Warszawa", "Kraków", "Wrocław", "Poznań", "Gdańsk", "Łódź", "Katowice", "Lublin"]
+SENIORITY = ["Junior", "Mid", "Senior", "Lead"]
+ROLES = {
+    "backend": ["Python Developer", "Java Developer", "Go Engineer", ".NET Developer"],
+    "frontend": ["React Developer", "Angular Developer", "Frontend Engineer"],
+    "fullstack": ["Fullstack Developer", "Node.js Developer"],
+    "devops": ["DevOps Engineer", "Cloud Engineer", "SRE"],
+    "data": ["Data Engineer", "Data Scientist", "ML Engineer", "BI Analyst"],
+    "testing": ["QA Engineer", "Test Automation Engineer"],
+    "mobile": ["Android Developer", "iOS Developer", "Flutter Developer"],
+    "security": ["Security Engineer", "Pentester"],
+}
+SKILLS = ["python", "java", "sql", "aws", "docker", "kubernetes", "react", "typescript", "spark", "kafka",
+          "terraform", "linux", "git", "postgresql", "airflow", "pandas", "selenium", "kotlin", "swift"]
+
+_FILLER = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt. "
+
+
+class FakeNFJ:
+    """Dane i routing atrapy (bez warstwy HTTP — da się wołać bezpośrednio w testach)."""
+
+    def __init__(
+        self,
+        jobs: int = 2000,
+        page_size: int = 20,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        page_kb: int = 50,
+        seed: int = 1,
+    ):
+        self.page_size = max(1, page_size)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        rng = random.Random(seed)
+        today = dt.date.today()
+        filler = (_FILLER * (page_kb * 1024 // len(_FILLER) + 1))[: page_kb * 1024]
+        self.filler = filler
+        self.jobs: List[Dict] = []
+        for i in range(jobs):
+            cat = CATEGORIES[i % len(CATEGORIES)]
+            title = f"{rng.choice(SENIORITY)} {rng.choice(ROLES[cat])}"
+            remote = rng.random() < 0.3
+            self.jobs.append({
+                "slug": f"{title.lower().replace(' ', '-').replace('.', '')}-firma-{i % 400}-{i}",
+                "title": title,
+                "company": f"Firma {i % 400} Sp. z o.o.",
+                "city": rng.choice(CITIES),
+                "remote": remote,
+                "category": cat,
+                "posted": (today - dt.timedelta(days=rng.randrange(60))).isoformat(),
+                "skills": rng.sample(SKILLS, 4),
+            })
+        self.by_slug = {j["slug"]: j for j in self.jobs}
+        self.gone: Set[str] = set()
+        # listing -> oferty w kolejności wyświetlania
+        self.listings: Dict[str, List[Dict]] = {"": self.jobs, "remote": [j for j in self.jobs if j["remote"]]}
+        for cat in CATEGORIES:
+            self.listings[cat] = [j for j in self.jobs if j["category"] == cat]
+            self.listings[f"remote/{cat}"] = [j for j in self.listings[cat] if j["remote"]]
+
+    # ---- strony ----
+    def expire(self, slug: str) -> None:
+        self.gone.add(slug)
+
+    def listing_html(self, country: str, key: str, page: int) -> str:
+        live = [j for j in self.listings[key] if j["slug"] not in self.gone]
+        offers = live[(page - 1) * self.page_size: page * self.page_size]
+        cats = "".join(f'<a href="/{country}/{c}">{c}</a>' for c in CATEGORIES) if key in ("", "remote") else ""
+        items = "".join(
+            f'<a class="posting-list-item" href="/{country}/job/{j["slug"]}?utm=list">{j["title"]}</a>'
+            for j in offers
+        )
+        return f"<html><head><title>NoFluffJobs</title></head><body><nav>{cats}</nav>{items}</body></html>"
+
+    def job_html(self, job: Dict) -> str:
+        ld = {
+            "@context": "https://schema.org", "@type": "JobPosting",
+            "title": job["title"],
+            "hiringOrganization": {"@type": "Organization", "name": job["company"]},
+            "jobLocation": {"@type": "Place", "address": {"addressLocality": job["city"]}},
+            "datePosted": job["posted"],
+            "description": f"Wymagania: {', '.join(job['skills'])}.",
+        }
+        if job["remote"]:
+            ld["jobLocationType"] = "TELECOMMUTE"
+        return (
+            f"<html><head><title>{job['title']} | NoFluffJobs</title>"
+            f'<script type="application/ld+json">{json.dumps(ld, ensure_ascii=False)}</script></head>'
+            f"<body><h1>{job['title']}</h1><p>{self.filler}</p></body></html>"
+        )
+
+    def route(self, path: str, query: str) -> Tuple[int, Dict[str, str], str]:
+        parts = [p for p in path.split("/") if p]
+        if not parts or parts[0] not in ("pl", "en"):
+            return 404, {}, "not found"
+        country, rest = parts[0], parts[1:]
+        if len(rest) == 2 and rest[0] == "job":
+            job = self.by_slug.get(rest[1])
+            if job is None:
+                return 404, {}, "not found"
+            if job["slug"] in self.gone:
+                return 410, {}, "gone"
+            html = self.job_html(job)
+            etag = '"%s"' % hashlib.sha1(json.dumps(job, sort_keys=True).encode()).hexdigest()[:16]
+            return 200, {"ETag": etag}, html
+        key = "/".join(rest)
+        if key not in self.listings:
+            return 404, {}, "not found"
+        try:
+            page = max(1, int(parse_qs(query).get("page", ["1"])[0]))
+        except ValueError:
+            page = 1
+        return 200, {}, self.listing_html(country, key, page)
+
+    def handle(self, path: str, query: str) -> Tuple[int, Dict[str, str], str]:
+        """route() + wstrzyknięte opóźnienie, 500 i 429; liczy odpowiedzi wg statusu."""
+        with self._lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            roll = self._rng.random()
+        if delay:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            status, headers, body = 429, {"Retry-After": str(self.retry_after)}, "slow down"
+        elif roll < self.throttle_rate + self.error_rate:
+            status, headers, body = 500, {}, "error"
+        else:
+            status, headers, body = self.route(path, query)
+        with self._lock:
+            self.counts[status] += 1
+        return status, headers, body
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, jak prawdziwy serwis
+
+    def do_GET(self, head: bool = False):
+        u = urlsplit(self.path)
+        status, headers, body = self.server.app.handle(u.path, u.query)
+        data = body.encode("utf-8")
+        headers = dict(headers)
+        self.send_response(status)
+        self.send_header("Content-Type", headers.pop("Content-Type", "text/html; charset=utf-8"))
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        if not head:
+            self.wfile.write(data)
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def log_message(self, *args):
+        pass
+
+
+class NFJServer(ThreadingHTTPServer):
+    """Serwer HTTP w wątku dla dowolnej atrapy z `handle(path, query)` (też bench/apify_server.py)."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self.app = app
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "NFJServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="nfj-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "NFJServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def add_server_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--jobs", type=int, default=2000, help="liczba ofert (na kraj)")
+    ap.add_argument("--page-size", type=int, default=20, help="ofert na stronę listingu")
+    ap.add_argument("--page-kb", type=int, default=50, help="rozmiar wypełnienia strony oferty (KiB)")
+    ap.add_argument("--latency", type=float, default=0.0, help="opóźnienie odpowiedzi (s)")
+    ap.add_argument("--jitter", type=float, default=0.0, help="± losowo do opóźnienia (s)")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="odsetek odpowiedzi 500")
+    ap.add_argument("--throttle-rate", type=float, default=0.0, help="odsetek odpowiedzi 429")
+    ap.add_argument("--retry-after", type=int, default=1, help="Retry-After przy 429 (s)")
+    ap.add_argument("--seed", type=int, default=1)
+
+
+def app_from_args(args: argparse.Namespace) -> FakeNFJ:
+    return FakeNFJ(
+        jobs=args.jobs, page_size=args.page_size, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        page_kb=args.page_kb, seed=args.seed,
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_server_args(ap)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+    server = NFJServer(app_from_args(args), args.host, args.port)
+    print(f"NFJ stand-in: {server.base_url} ({args.jobs} ofert)  —  NFJ_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
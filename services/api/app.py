@@ -1,9 +1,21 @@
 import os
-from fastapi import FastAPI
+import re
+import json
+import base64
+import threading
+import datetime as dt
+from collections import OrderedDict
+from typing import Callable, Literal
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy import create_engine, text
-import pandas as pd
+from sqlalchemy.exc import OperationalError
+
+from services.common.export import EXPORT_CHUNK, check_since, iter_batches, stream_batches
+from services.common.normalize import fold  # ta sama postać co jobs_clean.city i jobs_fts
 
 DB_PATH = os.getenv("DB_PATH", "data/ai_jobs.db")
 engine = create_engine(f"sqlite:///{DB_PATH}", echo=False)
@@ -26,39 +38,283 @@ class JobOut(BaseModel):
     skills: str
     seniority: str
     source: str
+    posted_at: str
+
+_JOB_COLS = (
+    "j.id, COALESCE(j.title,'') AS title, COALESCE(j.company,'') AS company, "
+    "COALESCE(j.location,'') AS location, COALESCE(j.skills,'') AS skills, "
+    "COALESCE(j.seniority,'') AS seniority, COALESCE(j.source,'') AS source, "
+    "COALESCE(j.posted_at,'') AS posted_at"
+)
+# klucz sortowania "recent" — to samo wyrażenie co w indeksie idx_jobs_clean_recent
+_RECENT_KEY = "COALESCE(j.posted_at, '')"
+# wagi BM25 kolumn jobs_fts: title, company, location, skills
+_BM25 = "bm25(jobs_fts, 10.0, 3.0, 2.0, 5.0)"
+_FTS_TOKEN = re.compile(r"\w+")
+_has_fts = False
+def _table_exists(name: str) -> bool:
+    with engine.begin() as conn:
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": name}
+        ).first() is not None
+
+def fts_available() -> bool:
+    global _has_fts
+    if not _has_fts:
+        _has_fts = _table_exists("jobs_fts")
+    return _has_fts
+
+def fts_query(q: str) -> str | None:
+    # każde słowo jako fraza z prefiksem ("pyth"* -> python); słowa łączone AND-em.
+    # fold jak tekst w jobs_fts (search.py): "Łódź" i "Lodz" -> "lodz"
+    toks = _FTS_TOKEN.findall(fold(q))
+    return " ".join(f'"{t}"*' for t in toks) or None
+
+# ===== cache wyników + ETag =====
+# Klucz = (baza, zapytanie, wersja danych, dzień). Wersję (db_meta.data_version) podbijają
+# triggery ETL-a przy każdej zmianie jobs_clean, więc wpis żyje dokładnie do następnego zapisu;
+# dzień, bo okna typu days=7 przesuwają się bez zapisu.
+API_CACHE_SIZE = int(os.getenv("API_CACHE_SIZE", "256"))
+API_MAX_PAGE = int(os.getenv("API_MAX_PAGE", "1000"))  # większe zrzuty: kursor albo format=ndjson
+NDJSON_CHUNK = 500
+_result_cache: "OrderedDict[tuple, object]" = OrderedDict()
+# endpointy synchroniczne działają w puli wątków FastAPI — odczyt z move_to_end i wstawianie
+# z eviction pod jednym lockiem (inaczej move_to_end na właśnie wyrzuconym kluczu -> KeyError)
+_cache_lock = threading.Lock()
+
+def data_version() -> int | None:
+    """Wersja danych z ETL-a albo None (baza sprzed db_meta — wtedy bez cache i ETag)."""
+    try:
+        with engine.begin() as conn:
+            return conn.execute(text("SELECT value FROM db_meta WHERE key = 'data_version'")).scalar()
+    except OperationalError:
+        return None
+
+def _etag(ver: int) -> str:
+    return f'"{ver}-{dt.date.today().isoformat()}"'
+
+def cached_response(
+    request: Request,
+    key: tuple,
+    compute: Callable[[], object],
+    headers_for: Callable[[object], dict] | None = None,
+) -> Response:
+    """`headers_for(body)` — nagłówki zależne od treści (np. X-Next-Cursor), liczone także dla trafień."""
+    ver = data_version()
+    if ver is None:
+        body = jsonable_encoder(compute())
+        return JSONResponse(body, headers=headers_for(body) if headers_for else None)
+    etag = _etag(ver)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    full_key = (str(engine.url), key, etag)
+    with _cache_lock:
+        body = _result_cache.get(full_key)
+        if body is not None:
+            _result_cache.move_to_end(full_key)
+    if body is None:
+        body = jsonable_encoder(compute())  # zapytanie poza lockiem
+        with _cache_lock:
+            _result_cache[full_key] = body
+            while len(_result_cache) > API_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+    if headers_for:
+        headers.update(headers_for(body))
+    return JSONResponse(body, headers=headers)
+
+def encode_cursor(posted_at: str, id_: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([posted_at, id_]).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        posted_at, id_ = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(posted_at), str(id_)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
 
 @app.get("/jobs", response_model=list[JobOut])
-def list_jobs(q: str | None = None, location: str | None = None, seniority: str | None = None, limit: int = 50):
-    where = []
+def list_jobs(
+    request: Request,
+    q: str | None = None,
+    location: str | None = None,
+    city: str | None = None,
+    remote: bool | None = None,
+    seniority: str | None = None,
+    skill: list[str] = Query(default=[]),
+    skill_mode: Literal["all", "any"] = "all",
+    sort: Literal["relevance", "recent"] | None = None,
+    cursor: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+    limit: int | None = Query(default=None, ge=1),
+    include_expired: bool = False,
+    source: str | None = None,
+):
+    """
+    `skill=python&skill=sql` — oferty z wszystkimi (all) albo którymkolwiek (any) ze skilli.
+    `city=Poznan` / `remote=true` / `seniority=senior` / `source=justjoin` — równości po indeksowanych kolumnach.
+
+    Kolejność: `sort=recent` (domyślnie bez `q`) — od najnowszych po (posted_at, id), stronicowana
+    kursorem: nagłówek `X-Next-Cursor` podaje się jako `cursor=` po następną stronę.
+    `sort=relevance` (domyślnie z `q`) — BM25, tylko pierwsza strona.
+    `format=ndjson` — strumień, wiersz po wierszu prosto z kursora bazy (bez limitu, o ile nie podano).
+    JSON zwraca najwyżej API_MAX_PAGE ofert na stronę.
+    Oferty wygasłe (zdjęte z serwisu, `expired_at`) są pomijane, chyba że `include_expired=true`.
+    """
+    sort = sort or ("relevance" if q else "recent")
+    if cursor and sort != "recent":
+        raise HTTPException(status_code=400, detail="cursor requires sort=recent")
+    after = decode_cursor(cursor) if cursor else None
+    skills = tuple(sorted({s.strip().lower() for s in skill if s.strip()}))
+    filters = (q, location, city, remote, seniority, skills, skill_mode, include_expired, source)
+    if format == "ndjson":
+        sql, params = _jobs_sql(*filters, sort=sort, after=after, limit=limit)
+        return ndjson_response(request, sql, params)
+    limit = min(limit or 50, API_MAX_PAGE)
+    sql, params = _jobs_sql(*filters, sort=sort, after=after, limit=limit)
+
+    def next_cursor(body: list) -> dict:
+        if sort != "recent" or len(body) < limit:
+            return {}
+        last = body[-1]
+        return {"X-Next-Cursor": encode_cursor(last["posted_at"], last["id"])}
+
+    key = ("jobs", filters, sort, after, limit)
+    return cached_response(request, key, lambda: _fetch(sql, params), headers_for=next_cursor)
+
+def _jobs_sql(q, location, city, remote, seniority, skills, skill_mode, include_expired=False, source=None,
+              sort: str = "recent", after: tuple[str, str] | None = None, limit: int | None = None):
+    where = [] if include_expired else ["j.expired_at IS NULL"]
     params = {}
-    if q:
-        where.append("(title LIKE :q OR skills LIKE :q)")
+    if skills:
+        names = ", ".join(f":sk{i}" for i in range(len(skills)))
+        params.update({f"sk{i}": s for i, s in enumerate(skills)})
+        sub = f"SELECT job_id FROM job_skills WHERE skill IN ({names})"
+        if skill_mode == "all" and len(skills) > 1:
+            sub += " GROUP BY job_id HAVING COUNT(*) = :nsk"
+            params["nsk"] = len(skills)
+        where.append(f"j.id IN ({sub})")
+    match = fts_query(q) if q else None
+    use_fts = match is not None and fts_available()
+    if use_fts:
+        where.append("jobs_fts MATCH :q")
+        params["q"] = match
+    elif q:
+        where.append("(j.title LIKE :q OR j.skills LIKE :q)")
         params["q"] = f"%{q}%"
     if location:
-        where.append("location = :loc")
+        where.append("j.location = :loc")
         params["loc"] = location
+    if city:
+        where.append("j.city = :city")
+        params["city"] = fold(city)
+    if remote is not None:
+        where.append("j.remote = :remote")
+        params["remote"] = int(remote)
     if seniority:
-        where.append("seniority = :sen")
-        params["sen"] = seniority
-    sql = "SELECT id,title,company,location,skills,seniority,source FROM jobs_clean"
+        where.append("j.seniority = :sen")
+        params["sen"] = seniority.strip().capitalize()
+    if source:
+        where.append("j.source = :src COLLATE NOCASE")  # idx_jobs_clean_source ma tę samą kolację
+        params["src"] = source.strip()
+    if after:
+        # keyset: wyrażenie takie jak w indeksie idx_jobs_clean_recent; pierwszy warunek daje
+        # zakres na indeksie (row value na wyrażeniu SQLite przegląda od początku), bez OFFSET-u
+        where.append(f"{_RECENT_KEY} <= :after_pa AND ({_RECENT_KEY} < :after_pa OR j.id < :after_id)")
+        params["after_pa"], params["after_id"] = after
+    if use_fts:
+        sql = f"SELECT {_JOB_COLS} FROM jobs_fts JOIN jobs_clean j ON j.rowid = jobs_fts.rowid"
+    else:
+        sql = f"SELECT {_JOB_COLS} FROM jobs_clean j"
     if where:
         sql += " WHERE " + " AND ".join(where)
-    sql += " LIMIT :lim"
-    params["lim"] = limit
+    if sort == "relevance" and use_fts:
+        sql += f" ORDER BY {_BM25}"
+    elif sort == "recent":
+        sql += f" ORDER BY {_RECENT_KEY} DESC, j.id DESC"
+    if limit is not None:
+        sql += " LIMIT :lim"
+        params["lim"] = limit
+    return sql, params
+
+def _fetch(sql: str, params: dict) -> list[dict]:
     with engine.begin() as conn:
-        rows = conn.execute(text(sql), params).mappings().all()
-    return [JobOut(**dict(r)) for r in rows]
+        return [dict(r) for r in conn.execute(text(sql), params).mappings()]
+
+def ndjson_response(request: Request, sql: str, params: dict) -> Response:
+    """Jeden JSON na linię, partiami z otwartego kursora — pamięć stała niezależnie od liczby wierszy."""
+    ver = data_version()
+    headers = {}
+    if ver is not None:
+        headers = {"ETag": _etag(ver), "Cache-Control": "no-cache"}
+        if headers["ETag"] in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+    def rows():
+        with engine.connect() as conn:
+            result = conn.execution_options(yield_per=NDJSON_CHUNK).execute(text(sql), params).mappings()
+            for part in result.partitions():
+                yield "".join(json.dumps(dict(r), ensure_ascii=False) + "\n" for r in part)
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson", headers=headers)
+
+def _trending_sql(days: int | None) -> str:
+    if _table_exists("skill_counts"):
+        sql = "SELECT skill, SUM(n) AS cnt FROM skill_counts"
+        if days:
+            sql += " WHERE day >= :since"
+        return sql + " GROUP BY skill ORDER BY cnt DESC, skill LIMIT :top"
+    # baza bez skill_counts (ETL jeszcze nie biegł na nowym schemacie): liczymy w SQLite
+    sql = (
+        "SELECT trim(s.value) AS skill, COUNT(*) AS cnt FROM jobs_clean j, "
+        "json_each('[\"' || replace(replace(j.skills, '\"', ''), ',', '\",\"') || '\"]') s "
+        "WHERE COALESCE(j.skills, '') != '' AND trim(s.value) != '' AND j.expired_at IS NULL"
+    )
+    if days:
+        sql += " AND j.posted_at >= :since"  # "YYYY-MM-DD" (kolumna DATE) — zakres po idx_jobs_clean_posted
+    return sql + " GROUP BY 1 ORDER BY cnt DESC, skill LIMIT :top"
 
 @app.get("/skills/trending")
-def trending_skills(top: int = 10):
-    df = pd.read_sql("SELECT skills FROM jobs_clean", engine)
-    from collections import Counter
-    c = Counter()
-    for s in df["skills"].dropna():
-        for sk in s.split(","):
-            if sk.strip():
-                c[sk.strip()] += 1
-    return [{"skill": k, "count": v} for k, v in c.most_common(top)]
+def trending_skills(request: Request, top: int = 10, days: int | None = None):
+    """Najczęstsze skille; `days=7` / `days=30` = tylko oferty z ostatnich N dni."""
+    return cached_response(request, ("trending", top, days), lambda: _query_trending(top, days))
+
+def _query_trending(top: int, days: int | None) -> list[dict]:
+    params = {"top": top}
+    if days:
+        params["since"] = (dt.date.today() - dt.timedelta(days=days)).isoformat()
+    with engine.begin() as conn:
+        rows = conn.execute(text(_trending_sql(days)), params).all()
+    return [{"skill": r.skill, "count": int(r.cnt)} for r in rows]
+
+# ===== eksport kolumnowy =====
+# Ten sam kod co CLI workera (services/common/export.py): schemat i partie z kursora -> record
+# batche, oddawane klientowi po każdej partii — bez składania całego pliku w pamięci.
+_EXPORT_MEDIA = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.file"}
+
+def _export_stream(fmt: str, since: str | None):
+    con = engine.raw_connection()
+    try:
+        yield from stream_batches(iter_batches(con, since, EXPORT_CHUNK), fmt)
+    finally:
+        con.close()
+
+@app.get("/export/jobs")
+def export_jobs(format: Literal["parquet", "arrow"] = "parquet", since: str | None = None):
+    """
+    Cały jobs_clean (skille jako lista) w Parquet albo Arrow IPC (file — da się zmapować w pamięci),
+    strumieniowo, partiami po EXPORT_CHUNK wierszy. `since=2024-05-01` — tylko zapisane od tej chwili (updated_at).
+    """
+    if since:
+        try:
+            check_since(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since must be an ISO date or datetime")
+    name = f"jobs.{format}"
+    return StreamingResponse(
+        _export_stream(format, since), media_type=_EXPORT_MEDIA[format],
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
 
 if __name__ == "__main__":
     import uvicorn
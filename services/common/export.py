@@ -0,0 +1,131 @@
+# services/common/export.py
+"""
+Eksport kolumnowy jobs_clean (+ skille jako lista) do Parquet albo Arrow IPC — jedna implementacja
+dla CLI workera (services/worker/etl/export.py, do pliku) i API (/export/jobs, strumieniowo).
+
+Czyta kursorem w partiach po `chunk` wierszy (każda partia = jeden record batch / row group).
+`since` = tylko oferty zapisane (updated_at) od podanej daty/chwili: eksport przyrostowy.
+"""
+from __future__ import annotations
+
+import os
+import datetime as dt
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Union
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_CHUNK = int(os.getenv("EXPORT_CHUNK", "50000"))
+FORMATS = ("parquet", "arrow")
+
+SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("title", pa.string()),
+    ("company", pa.string()),
+    ("location", pa.string()),
+    ("city", pa.string()),
+    ("remote", pa.bool_()),
+    ("seniority", pa.string()),
+    ("url", pa.string()),
+    ("posted_at", pa.string()),
+    ("source", pa.string()),
+    ("skills", pa.list_(pa.string())),
+    ("updated_at", pa.string()),
+    ("expired_at", pa.string()),  # oferta zdjęta z serwisu (NULL = aktywna)
+])
+
+_SQL = f"SELECT {', '.join(SCHEMA.names)} FROM jobs_clean"
+
+
+def check_since(since: str) -> str:
+    """Data albo data+czas ISO (porównanie tekstowe z updated_at); błędny format -> ValueError."""
+    dt.datetime.fromisoformat(since)
+    return since
+
+
+def iter_batches(con, since: Optional[str] = None, chunk: int = EXPORT_CHUNK) -> Iterator[pa.RecordBatch]:
+    """`con` — połączenie DB-API do SQLite (sqlite3 albo engine.raw_connection())."""
+    sql, params = _SQL + " ORDER BY rowid", ()
+    if since:  # przyrostowo: zakres po idx_jobs_clean_updated, w kolejności zmian
+        sql = _SQL + " WHERE updated_at >= ? ORDER BY updated_at, rowid"
+        params = (check_since(since),)
+    cur = con.cursor()
+    cur.execute(sql, params)
+    names = SCHEMA.names
+    i_remote, i_skills = names.index("remote"), names.index("skills")
+    try:
+        while True:
+            rows = cur.fetchmany(chunk)
+            if not rows:
+                return
+            cols = [list(c) for c in zip(*rows)]
+            cols[i_remote] = [None if v is None else bool(v) for v in cols[i_remote]]
+            cols[i_skills] = [[s for s in v.split(",") if s] if v else [] for v in cols[i_skills]]
+            yield pa.RecordBatch.from_arrays([pa.array(c, type=t) for c, t in zip(cols, SCHEMA.types)],
+                                             schema=SCHEMA)
+    finally:
+        cur.close()
+
+
+def _open_writer(sink: Union[str, Path, BinaryIO], fmt: str):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, SCHEMA, compression="zstd")
+    if fmt == "arrow":
+        return pa.ipc.new_file(sink, SCHEMA)
+    raise ValueError(f"unknown export format: {fmt}")
+
+
+def write_batches(batches: Iterator[pa.RecordBatch], sink: Union[str, Path, BinaryIO], fmt: str) -> int:
+    """Zapisuje partie do pliku/strumienia; zwraca liczbę wierszy."""
+    n = 0
+    writer = _open_writer(sink, fmt)
+    try:
+        for b in batches:
+            writer.write_batch(b)
+            n += b.num_rows
+    finally:
+        writer.close()
+    return n
+
+
+class _ChunkSink:
+    """Plikopodobne ujście tylko-do-dopisywania dla writerów pyarrow; drain() oddaje zebrane bajty."""
+    closed = False
+
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.pos = 0
+
+    def write(self, b) -> int:
+        b = bytes(b)
+        self.parts.append(b)
+        self.pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self.pos
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        out, self.parts = b"".join(self.parts), []
+        return out
+
+
+def stream_batches(batches: Iterator[pa.RecordBatch], fmt: str) -> Iterator[bytes]:
+    """
+    Jak write_batches, ale plik oddawany kawałkami po każdej partii (np. StreamingResponse) —
+    bez składania całego pliku w pamięci.
+    """
+    sink = _ChunkSink()
+    writer = _open_writer(sink, fmt)
+    for b in batches:
+        writer.write_batch(b)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,129 @@
+# services/common/normalize.py
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Wspólny etap normalizacji dla wszystkich źródeł, uruchamiany na całej partii rekordów
+# (Writer.prepare / bulk_upsert / backfill), a nie per wiersz przy odczycie.
+# Wynik trafia do indeksowanych kolumn jobs_clean:
+#   seniority  — Junior | Mid | Senior | Unspecified,
+#   city       — klucz miasta bez polskich znaków, małymi literami ("poznan"), NULL gdy brak,
+#   remote     — 1 = praca zdalna, 0 = nie/nie wiadomo,
+# a location dostaje kanoniczną nazwę do wyświetlania ("Poznań", "Zdalnie", "Nie podano").
+# Moduł jest w services/common (sama biblioteka standardowa): API i dashboard składają filtry
+# tą samą fold / tymi samymi aliasami miast, a ich obrazy nie zawierają kodu workera.
+
+UNSPECIFIED = "Unspecified"
+REMOTE_LABEL = "Zdalnie"
+NO_LOCATION = "Nie podano"
+
+# kolejność = priorytet ("Junior/Mid" -> Junior, "Senior/Lead" -> Senior); teksty już złożone (fold)
+_SENIORITY_RES: Sequence[Tuple[re.Pattern, str]] = (
+    (re.compile(r"\b(junior|jr|intern|internship|trainee|student|stazyst\w*|praktykan\w*|mlodszy)\b"), "Junior"),
+    (re.compile(r"\b(senior|sr|lead|principal|staff|expert|architect|head|c.?level|starszy)\b"), "Senior"),
+    (re.compile(r"\b(mid|middle|regular)\b"), "Mid"),
+)
+
+_REMOTE_RE = re.compile(r"\b(zdaln\w*|remote\w*|home ?office|telecommute|anywhere)\b")
+_NO_LOCATION = {"", "nie podano", "unspecified", "unknown", "brak", "n/a", "hybrid", "hybrydowo", "office",
+                "polska", "poland", "pl", "europe", "eu"}
+_SPLIT_RE = re.compile(r"\s*[,;/|()]\s*")
+
+# klucz (fold) -> nazwa kanoniczna; aliasy też po fold
+CITIES: Dict[str, str] = {
+    "warszawa": "Warszawa", "krakow": "Kraków", "wroclaw": "Wrocław", "poznan": "Poznań",
+    "gdansk": "Gdańsk", "gdynia": "Gdynia", "sopot": "Sopot", "trojmiasto": "Trójmiasto",
+    "lodz": "Łódź", "katowice": "Katowice", "szczecin": "Szczecin", "lublin": "Lublin",
+    "bialystok": "Białystok", "bydgoszcz": "Bydgoszcz", "torun": "Toruń", "rzeszow": "Rzeszów",
+    "kielce": "Kielce", "olsztyn": "Olsztyn", "opole": "Opole", "gliwice": "Gliwice",
+    "bielsko-biala": "Bielsko-Biała", "zielona gora": "Zielona Góra", "czestochowa": "Częstochowa",
+    "radom": "Radom",
+}
+CITY_ALIASES: Dict[str, str] = {
+    "warsaw": "warszawa", "cracow": "krakow", "krakau": "krakow", "breslau": "wroclaw",
+    "posen": "poznan", "danzig": "gdansk", "tricity": "trojmiasto", "3city": "trojmiasto",
+    "bielsko biala": "bielsko-biala",
+}
+
+_FOLD_TABLE = str.maketrans({"ł": "l", "Ł": "L"})  # ł nie rozkłada się w NFKD
+
+
+def fold(s: Optional[str]) -> str:
+    """Małe litery, bez polskich znaków i nadmiarowych spacji: " Łódź " -> "lodz"."""
+    if not s:
+        return ""
+    s = unicodedata.normalize("NFKD", s.translate(_FOLD_TABLE))
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return " ".join(s.lower().split())
+
+
+@lru_cache(maxsize=4096)
+def canonical_seniority(text: Optional[str]) -> str:
+    t = fold(text)
+    for rx, label in _SENIORITY_RES:
+        if rx.search(t):
+            return label
+    return UNSPECIFIED
+
+
+@lru_cache(maxsize=4096)
+def canonical_location(location: Optional[str]) -> Tuple[str, Optional[str], int]:
+    """(nazwa do wyświetlania, klucz miasta albo None, remote 0/1)."""
+    raw = (location or "").strip()
+    t = fold(raw)
+    remote = 1 if _REMOTE_RE.search(t) else 0
+    # separatory są ASCII, więc fragmenty oryginału i wersji złożonej idą parami
+    parts = zip(_SPLIT_RE.split(t), _SPLIT_RE.split(raw))
+    label = city = None
+    for part, orig in parts:
+        key = _REMOTE_RE.sub("", part).strip(" -")
+        key = CITY_ALIASES.get(key, key)
+        if key in _NO_LOCATION:
+            continue
+        if key in CITIES:
+            label, city = CITIES[key], key
+            break
+        if city is None:  # nieznane miasto — pierwsze, chyba że dalej jest znane
+            label, city = orig.strip(" -"), key
+    if city is None:
+        return (REMOTE_LABEL if remote else NO_LOCATION), None, remote
+    return label, city, remote
+
+
+def normalize_columns(
+    titles: Sequence[Optional[str]],
+    seniorities: Sequence[Optional[str]],
+    locations: Sequence[Optional[str]],
+) -> Tuple[List[str], List[Tuple[str, Optional[str], int]]]:
+    """
+    Wersja kolumnowa: każda unikalna wartość liczona raz (lokalizacje i podpowiedzi seniority
+    powtarzają się w partii setki razy). Seniority: podpowiedź źródła, a gdy nic nie mówi — tytuł.
+    """
+    hint = {s: canonical_seniority(s) for s in set(seniorities)}
+    sen = [
+        h if h != UNSPECIFIED else canonical_seniority(t)
+        for h, t in zip((hint[s] for s in seniorities), titles)
+    ]
+    loc_map = {loc: canonical_location(loc) for loc in set(locations)}
+    return sen, [loc_map[loc] for loc in locations]
+
+
+def normalize_batch(records: Iterable[Dict]) -> List[Dict]:
+    """Uzupełnia w miejscu seniority, location, city i remote; zwraca listę rekordów."""
+    records = list(records)
+    if not records:
+        return records
+    sen, locs = normalize_columns(
+        [r.get("title") for r in records],
+        [r.get("seniority") for r in records],
+        [r.get("location") for r in records],
+    )
+    for r, s, (label, city, remote) in zip(records, sen, locs):
+        r["seniority"] = s
+        r["location"] = label
+        r["city"] = city
+        r["remote"] = remote
+    return records
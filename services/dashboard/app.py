@@ -1,6 +1,8 @@
-import os, sqlite3
-import pandas as pd, streamlit as st
-from unicodedata import normalize
+import os, time, sqlite3
+from contextlib import closing
+import streamlit as st
+
+from services.dashboard import queries  # SQL filtrów i stron (wspólny z bench/bench_queries.py)
 
 st.set_page_config(page_title="AI Job Finder", layout="wide")
 st.markdown("<style>div.block-container{padding-top:1rem;}</style>", unsafe_allow_html=True)
@@ -9,56 +11,76 @@ st.title("AI Job Finder — NoFluffJobs")
 DB_PATH = os.getenv("DB_PATH", "data/ai_jobs.db")
 BOX_H = int(os.getenv("UI_BOX_HEIGHT", "560"))  # wysokość scrollowanego boksu (px)
 
-def no_accents(s: str) -> str:
-    if not isinstance(s, str):
-        return s
-    nfkd = normalize("NFKD", s)
-    return "".join(ch for ch in nfkd if ord(ch) < 128)
-
-@st.cache_data(show_spinner=False, ttl=60)
-def load_df():
-    con = sqlite3.connect(DB_PATH)
-    df = pd.read_sql_query(
-        "SELECT title, company, location, seniority, url, posted_at "
-        "FROM jobs_clean "
-        "ORDER BY COALESCE(posted_at,'') DESC, rowid DESC",
-        con,
-    )
-    con.close()
-    for col in ["title", "company", "location"]:
-        df[f"_{col}_na"] = df[col].map(no_accents).str.lower()
-    return df
+SENIORITY = ["", "Junior", "Mid", "Senior", "Unspecified"]
+
+def _connect() -> sqlite3.Connection:
+    # tylko odczyt; ETL pisze w WAL, więc zapytania nie czekają na zapis
+    con = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    con.row_factory = sqlite3.Row
+    return con
+
+def data_version() -> int:
+    """
+    Wersja danych (db_meta, podbijana przez ETL przy każdej zmianie jobs_clean) — klucz cache
+    poniżej: bez zapisu nic nie czytamy ponownie, po zapisie od razu świeże wyniki.
+    Stara baza bez db_meta: minutowe kubełki czasu (zachowanie sprzed wersji).
+    """
+    try:
+        with closing(_connect()) as con:
+            row = con.execute("SELECT value FROM db_meta WHERE key = 'data_version'").fetchone()
+        return row[0]
+    except sqlite3.OperationalError:
+        return -int(time.time() // 60)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def has_fts(version: int) -> bool:
+    with closing(_connect()) as con:
+        return con.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'").fetchone() is not None
+
+def build_where(version: int, ttl: str, loc: str, sen: str, expired: bool = False):
+    return queries.build_where(ttl, loc, sen, expired, fts=has_fts(version))
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def count_jobs(version: int, ttl: str = "", loc: str = "", sen: str = "", expired: bool = False) -> int:
+    cond, params = build_where(version, ttl, loc, sen, expired)
+    with closing(_connect()) as con:
+        return con.execute(queries.COUNT_SQL.format(cond=cond), params).fetchone()[0]
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def fetch_page(version: int, ttl: str, loc: str, sen: str, limit: int, offset: int, expired: bool = False) -> list:
+    """Tylko wiersze z bieżącej strony — pamięć nie rośnie z rozmiarem bazy."""
+    cond, params = build_where(version, ttl, loc, sen, expired)
+    params.update(lim=limit, off=offset)
+    with closing(_connect()) as con:
+        rows = con.execute(queries.PAGE_SQL.format(cond=cond), params).fetchall()
+    return [dict(r) for r in rows]
 
 # ------- Formularz (Enter uruchamia submit) -------
 with st.form("search"):
     c1, c2, c3 = st.columns([2, 2, 1])
     ttl = c1.text_input("Tytuł (np. data, python, analityk)", "")
     loc = c2.text_input("Lokalizacja (np. Poznań / Poznan / Zdalnie)", "")
-    sen = c3.text_input("Seniority (puste = wszystkie)", "")
+    sen = c3.selectbox("Seniority (puste = wszystkie)", SENIORITY)
+    expired = st.checkbox("Pokaż także wygasłe oferty", value=False)
     st.form_submit_button("Szukaj (Enter)")
 
-# ------- Limit poza formularzem (działa natychmiast) -------
-limit = st.selectbox("Limit wyników", [50, 100, 200, 500, 1000], index=2)
-
-# ------- Filtrowanie -------
-df = load_df()
-base_total = len(df)
+# ------- Limit i strona poza formularzem (działają natychmiast) -------
+c4, c5 = st.columns([1, 1])
+limit = c4.selectbox("Wyników na stronę", [50, 100, 200, 500, 1000], index=2)
 
-if ttl.strip():
-    df = df[df["_title_na"].str.contains(no_accents(ttl).lower(), na=False)]
-if loc.strip():
-    df = df[df["_location_na"].str.contains(no_accents(loc).lower(), na=False)]
-if sen.strip():
-    df = df[df["seniority"].fillna("").str.lower().str.contains(sen.lower(), na=False)]
+version = data_version()
+base_total = count_jobs(version)
+filtered_total = count_jobs(version, ttl, loc, sen, expired)
+pages = max(1, -(-filtered_total // limit))
+page = c5.number_input(f"Strona (z {pages})", min_value=1, max_value=pages, value=1, step=1)
 
-filtered_total = len(df)
-displayed_df = df.head(limit).copy()
-showing = len(displayed_df)
+rows = fetch_page(version, ttl, loc, sen, limit, (page - 1) * limit, expired)
+first = (page - 1) * limit + 1 if rows else 0
 
-st.caption(f"Pokazuję {showing} z {filtered_total} wyników (w bazie: {base_total})")
+st.caption(f"Pokazuję {first}–{first + len(rows) - 1 if rows else 0} z {filtered_total} wyników (w bazie: {base_total})")
 
 # ------- Render „tabeli” w scrollowanym boksie -------
-if displayed_df.empty:
+if not rows:
     st.info("Brak wyników dla podanych filtrów.")
 else:
     # zbuduj wiersze HTML (tytuł jako link)
@@ -69,7 +91,7 @@ else:
         '<div>Tytuł</div><div>Firma</div><div>Lokalizacja</div><div>Seniority</div><div>Data</div>'
         "</div>"
     )
-    for _, r in displayed_df.iterrows():
+    for r in rows:
         title = (r["title"] or "").strip()
         url = (r["url"] or "").strip()
         company = (r["company"] or "").strip()
@@ -0,0 +1,58 @@
+"""
+Zapytania dashboardu (bez Streamlita) — app.py i bench/bench_queries.py wykonują ten sam SQL.
+"""
+import re
+
+from services.common.normalize import CITIES, canonical_location, fold
+
+_FTS_TOKEN = re.compile(r"\w+")
+
+COUNT_SQL = "SELECT COUNT(*) FROM jobs_clean j{cond}"
+PAGE_SQL = (
+    "SELECT j.title, j.company, j.location, j.seniority, j.url, j.posted_at "
+    "FROM jobs_clean j{cond} "
+    "ORDER BY COALESCE(j.posted_at, '') DESC, j.id DESC LIMIT :lim OFFSET :off"
+)
+
+def location_filter(loc: str):
+    """
+    Lokalizacja z formularza tą samą ścieżką co w ETL (normalize.canonical_location: aliasy
+    "Warsaw" / "Cracow", "Warszawa, mazowieckie"): znane miasto -> równość na city, słowa
+    „zdalnie”/„remote” -> remote = 1, reszta (np. "Wroc") -> prefiks klucza city jako zakres
+    na indeksie. Zwraca (warunek SQL, parametry).
+    """
+    _, city, remote = canonical_location(loc)
+    if city in CITIES:
+        return "j.city = :city", {"city": city}
+    if remote:
+        return "j.remote = 1", {}
+    key = city or fold(loc)
+    # 'wroc' <= city < 'wrod' — LIKE 'wroc%' nie użyłby indeksu (LIKE bez NOCASE)
+    upper = key[:-1] + chr(ord(key[-1]) + 1)
+    return "j.city >= :city_lo AND j.city < :city_hi", {"city_lo": key, "city_hi": upper}
+
+def build_where(ttl: str, loc: str, sen: str, expired: bool = False, fts: bool = True):
+    """
+    Filtry jako SQL: tytuł przez FTS5 (jobs_fts, bez polskich znaków, także ł; prefiksy słów; `fts=False`
+    — stara baza bez jobs_fts, LIKE), lokalizacja (location_filter) i seniority — po indeksowanych
+    kolumnach z ETL (city / remote / seniority). Oferty wygasłe (expired_at) tylko na życzenie.
+    """
+    where, params, join = ([] if expired else ["j.expired_at IS NULL"]), {}, ""
+    toks = _FTS_TOKEN.findall(ttl)
+    if toks and fts:
+        join = " JOIN jobs_fts ON jobs_fts.rowid = j.rowid"
+        where.append("jobs_fts MATCH :q")
+        # jobs_fts trzyma tekst złożony (search.py) — zapytanie też przez fold
+        params["q"] = "title : (" + " ".join(f'"{t}"*' for t in _FTS_TOKEN.findall(fold(ttl))) + ")"
+    elif toks:
+        for i, t in enumerate(toks):
+            where.append(f"j.title LIKE :t{i}")
+            params[f"t{i}"] = f"%{t}%"
+    if fold(loc):
+        cond, loc_params = location_filter(loc)
+        where.append(cond)
+        params.update(loc_params)
+    if sen:
+        where.append("j.seniority = :sen")
+        params["sen"] = sen
+    return join + (" WHERE " + " AND ".join(where) if where else ""), params
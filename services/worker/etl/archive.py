@@ -0,0 +1,193 @@
+# services/worker/etl/archive.py
+from __future__ import annotations
+
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, NamedTuple, Optional, Union
+
+import zstandard as zstd
+
+
+class ArchivedPage(NamedTuple):
+    url: str
+    kind: str
+    sha256: str
+    fetched_at: float
+    body: str
+
+
+class RawArchive:
+    """
+    Archiwum surowych stron (HTML ofert i listingów) — do ponownego parsowania bez sieci.
+
+    Treść jest adresowana zawartością (sha256 ciała strony): identyczna strona pobrana
+    drugi raz nie zajmuje miejsca, dopisuje się tylko wiersz w indeksie.
+    Ciała lądują w segmentach `seg-NNNNNN.zst` dopisywanych na końcu — każde jako osobna
+    ramka zstd, więc da się je czytać pojedynczo (offset + length z indeksu), a cały
+    segment to zwykły wieloramkowy plik zstd (`zstd -d` też go rozpakuje).
+    Nowy segment zaczyna się po przekroczeniu `segment_bytes`.
+
+    Indeks (`index.db`, SQLite):
+      blobs(sha256 -> segment, offset, length, size) — gdzie leży treść,
+      pages(url, sha256, kind, fetched_at)            — kiedy jaki URL miał jaką treść.
+
+    `classify(url)` nadaje rodzaj strony ("job" / "listing"), gdy put() go nie dostanie.
+    Najpierw zapis do segmentu, potem indeks: przerwany zapis zostawia co najwyżej
+    nieosiągalne bajty w segmencie, nigdy wpis bez treści.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        classify: Optional[Callable[[str], str]] = None,
+        segment_bytes: int = 256 << 20,
+        level: int = 6,
+    ):
+        self.root = Path(root)
+        self.classify = classify or (lambda url: "page")
+        self.segment_bytes = max(1, int(segment_bytes))
+        self.level = level
+        self._con: Optional[sqlite3.Connection] = None
+        self._out: Optional[BinaryIO] = None
+        self._segment = 0
+        self._lock = threading.Lock()
+        self._cctx = zstd.ZstdCompressor(level=level, write_content_size=True)
+        self._dctx = zstd.ZstdDecompressor()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._con is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(str(self.root / "index.db"), check_same_thread=False, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS blobs ("
+                " sha256 TEXT PRIMARY KEY, segment INTEGER NOT NULL, offset INTEGER NOT NULL,"
+                " length INTEGER NOT NULL, size INTEGER NOT NULL) WITHOUT ROWID"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT NOT NULL, sha256 TEXT NOT NULL, kind TEXT NOT NULL, fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (url, sha256)) WITHOUT ROWID"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_pages_kind ON pages(kind, url, fetched_at)")
+            self._segment = con.execute("SELECT COALESCE(MAX(segment), 0) FROM blobs").fetchone()[0]
+            self._con = con
+        return self._con
+
+    def _path(self, segment: int) -> Path:
+        return self.root / f"seg-{segment:06d}.zst"
+
+    def _writer(self) -> BinaryIO:
+        if self._out is not None and self._out.tell() < self.segment_bytes:
+            return self._out
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+        seg = max(1, self._segment)
+        path = self._path(seg)
+        if path.exists() and path.stat().st_size >= self.segment_bytes:
+            seg += 1
+            path = self._path(seg)
+        self._segment = seg
+        self._out = path.open("ab")
+        return self._out
+
+    def put(self, url: str, body: str, kind: Optional[str] = None) -> str:
+        """Zapisuje stronę (o ile tej treści jeszcze nie ma) i wiąże ją z URL-em; zwraca sha256."""
+        raw = body.encode("utf-8")
+        sha = hashlib.sha256(raw).hexdigest()
+        kind = kind or self.classify(url)
+        with self._lock:
+            con = self._conn()
+            if con.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha,)).fetchone() is None:
+                frame = self._cctx.compress(raw)
+                out = self._writer()
+                offset = out.tell()
+                out.write(frame)
+                out.flush()
+                con.execute(
+                    "INSERT INTO blobs(sha256, segment, offset, length, size) VALUES (?, ?, ?, ?, ?)",
+                    (sha, self._segment, offset, len(frame), len(raw)),
+                )
+            con.execute(
+                "INSERT INTO pages(url, sha256, kind, fetched_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url, sha256) DO UPDATE SET fetched_at = excluded.fetched_at",
+                (url, sha, kind, time.time()),
+            )
+        return sha
+
+    def _read(self, files: Dict[int, BinaryIO], segment: int, offset: int, length: int) -> str:
+        f = files.get(segment)
+        if f is None:
+            f = files[segment] = self._path(segment).open("rb")
+        f.seek(offset)
+        return self._dctx.decompress(f.read(length)).decode("utf-8")
+
+    def get(self, sha256: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT segment, offset, length FROM blobs WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._out is not None:
+                self._out.flush()
+        files: Dict[int, BinaryIO] = {}
+        try:
+            return self._read(files, *row)
+        finally:
+            for f in files.values():
+                f.close()
+
+    def iter_latest(self, kind: Optional[str] = None, since: Optional[float] = None) -> Iterator[ArchivedPage]:
+        """
+        Najnowsza treść każdego URL-a (opcjonalnie tylko danego rodzaju / pobrana od `since`),
+        w kolejności ułożenia w segmentach — odczyt idzie sekwencyjnie po dysku.
+        """
+        where, params = [], []
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        cond = " WHERE " + " AND ".join(where) if where else ""
+        having = " HAVING MAX(fetched_at) >= ?" if since is not None else ""
+        if since is not None:
+            params.append(since)
+        # SQLite: przy MAX() pozostałe kolumny pochodzą z wiersza z maksimum
+        sql = (
+            "SELECT l.url, l.kind, l.sha256, l.fetched_at, b.segment, b.offset, b.length FROM ("
+            f" SELECT url, kind, sha256, MAX(fetched_at) AS fetched_at FROM pages{cond} GROUP BY url{having}"
+            ") l JOIN blobs b ON b.sha256 = l.sha256 ORDER BY b.segment, b.offset"
+        )
+        with self._lock:
+            rows = self._conn().execute(sql, params).fetchall()
+            if self._out is not None:
+                self._out.flush()
+        files: Dict[int, BinaryIO] = {}
+        try:
+            for url, kind_, sha, fetched_at, seg, off, length in rows:
+                yield ArchivedPage(url, kind_, sha, fetched_at, self._read(files, seg, off, length))
+        finally:
+            for f in files.values():
+                f.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            con = self._conn()
+            pages, urls = con.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM pages").fetchone()
+            blobs, raw, stored = con.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(length), 0) FROM blobs"
+            ).fetchone()
+        return {"pages": pages, "urls": urls, "blobs": blobs, "raw_bytes": raw, "stored_bytes": stored}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._out is not None:
+                self._out.close()
+                self._out = None
+            if self._con is not None:
+                self._con.close()
+                self._con = None
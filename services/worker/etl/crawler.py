@@ -0,0 +1,323 @@
+# services/worker/etl/crawler.py
+from __future__ import annotations
+
+import time
+import random
+import asyncio
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Mapping, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from services.worker.etl.archive import RawArchive
+from services.worker.etl.httpcache import HttpCache
+from services.worker.etl.metrics import Metrics
+
+
+class TokenBucket:
+    """
+    Klasyczny token bucket: `rate` tokenów/s, maksymalnie `burst` naraz.
+    acquire() czeka dokładnie tyle, ile trzeba — bez blokowania wątku.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = float(rate)
+        self.ceiling = self.rate  # throttle() obniża rate, recover() wraca najwyżej do tej wartości
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self) -> None:
+        # lock = kolejka FIFO czekających, żeby nikt nie „przeskoczył” innych
+        async with self._lock:
+            while True:
+                pause = self._paused_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    self._last = time.monotonic()  # pauza nie nalicza tokenów
+                    continue
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def throttle(self, pause: float = 0.0, factor: float = 0.5) -> None:
+        """Serwer odpowiedział 429: wstrzymaj host na `pause` s (Retry-After) i zwolnij tempo."""
+        self._refill()
+        self._paused_until = max(self._paused_until, time.monotonic() + pause)
+        self.rate = max(self.ceiling / 32, self.rate * factor)
+        self._tokens = min(self._tokens, 0.0)
+
+    def recover(self, step: float = 0.05) -> None:
+        """Udane żądanie: tempo wraca addytywnie (o `step` sufitu) do `ceiling`."""
+        if self.rate < self.ceiling:
+            self._refill()
+            self.rate = min(self.ceiling, self.rate + self.ceiling * step)
+
+
+class HostRateLimiter:
+    """Osobny TokenBucket dla każdego hosta (budżet grzeczności liczony per domena)."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = (urlsplit(url).hostname or "").lower()
+        b = self._buckets.get(host)
+        if b is None:
+            b = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return b
+
+    async def acquire(self, url: str) -> None:
+        await self.bucket(url).acquire()
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def retry_after_seconds(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """Retry-After jako sekundy albo data HTTP -> sekundy od teraz (None, gdy brak/niepoprawny)."""
+    value = (headers.get("Retry-After") or "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+class RetryPolicy:
+    """
+    Ponawianie 429 / 5xx / błędów transportu (timeout, reset połączenia):
+    wykładniczy backoff z pełnym jitterem — losowo z [0, min(cap, base * 2^próba)] —
+    a gdy serwer podał Retry-After, czekamy tyle, ile prosi (najwyżej `max_retry_after`).
+    """
+
+    def __init__(self, retries: int = 3, base: float = 0.5, cap: float = 30.0, max_retry_after: float = 120.0,
+                 statuses=RETRY_STATUSES, rng: Optional[random.Random] = None):
+        self.retries = max(0, int(retries))
+        self.base = base
+        self.cap = cap
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+        self._rng = rng or random.Random()
+
+    def delay(self, attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        ra = retry_after_seconds(headers) if headers is not None else None
+        if ra is not None:
+            return min(ra, self.max_retry_after)
+        return self._rng.uniform(0, min(self.cap, self.base * (2 ** attempt)))
+
+
+class AdaptiveConcurrency:
+    """
+    Limit żądań w locie sterowany AIMD:
+      - sukces z opóźnieniem w normie -> limit += 1/limit (ok. +1 na „okno” żądań),
+      - 429 / 5xx / timeout albo opóźnienie > `latency_factor` x bazowe -> limit *= `decrease`
+        (najwyżej raz na okres chłodzenia, żeby seria błędów z jednego okna nie zdusiła limitu do minimum).
+    Opóźnienie bazowe ~ najmniejsze zaobserwowane; opóźnienie bieżące = EWMA.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 64, decrease: float = 0.7,
+                 latency_factor: float = 4.0, cooldown: float = 1.0):
+        self.minimum = max(1, int(minimum))
+        self.maximum = max(self.minimum, int(maximum))
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.inflight = 0
+        self._base: Optional[float] = None
+        self._ewma: Optional[float] = None
+        self._last_cut = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.inflight < int(self.limit))
+            self.inflight += 1
+
+    async def release(self, latency: Optional[float], ok: bool) -> None:
+        """`latency` = czas żądania (None przy błędzie transportu), `ok` = bez sygnału przeciążenia."""
+        if latency is not None:
+            self._ewma = latency if self._ewma is None else 0.8 * self._ewma + 0.2 * latency
+            # minimum powoli dryfujące w stronę EWMA — trwała zmiana tła nie tnie limitu bez końca
+            self._base = latency if self._base is None else min(latency, self._base + 0.01 * (self._ewma - self._base))
+        slow = ok and self._ewma is not None and self._ewma > self.latency_factor * max(self._base, 0.005)
+        if ok and not slow:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        else:
+            now = time.monotonic()
+            if now - self._last_cut >= max(self.cooldown, self._ewma or 0.0):
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._last_cut = now
+        async with self._cond:
+            self.inflight -= 1
+            self._cond.notify_all()
+
+
+class AsyncFetcher:
+    """
+    Wspólny klient HTTP (keep-alive, pula połączeń) + limiter per host.
+    Przepustowość wyznacza budżet `rate`, a nie liczba wątków.
+
+        async with AsyncFetcher(rate=2.0, headers=...) as f:
+            html = await f.get_text(url)
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        max_connections: int = 16,
+        timeout: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        cache: Optional[HttpCache] = None,
+        archive: Optional[RawArchive] = None,
+        metrics: Optional[Metrics] = None,
+        classify: Optional[Callable[[str], str]] = None,
+        retry: Optional[RetryPolicy] = None,
+        concurrency: Optional[AdaptiveConcurrency] = None,
+    ):
+        self.limiter = HostRateLimiter(rate, burst)
+        self.max_connections = max(1, int(max_connections))
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self.transport = transport
+        self.cache = cache
+        self.archive = archive
+        self.metrics = metrics or Metrics()
+        self.classify = classify or (lambda url: "page")  # etykieta `kind` w metrykach
+        self.retry = retry or RetryPolicy(retries=0)
+        self.concurrency = concurrency
+        if concurrency is not None:
+            self.metrics.gauge("etl_concurrency_limit", lambda: int(concurrency.limit))
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True,
+            transport=self.transport,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, url: str, kind: str, entry, method: str = "GET") -> Optional[httpx.Response]:
+        """Jedna próba: token limitera, miejsce w limicie współbieżności, żądanie, sygnał dla AIMD."""
+        m = self.metrics
+        bucket = self.limiter.bucket(url)
+        t0 = time.perf_counter()
+        await bucket.acquire()
+        if self.concurrency is not None:
+            await self.concurrency.acquire()
+        t1 = time.perf_counter()
+        m.observe("etl_rate_wait_seconds", t1 - t0, kind=kind)
+        r = latency = None
+        try:
+            r = await self._client.request(method, url, headers=HttpCache.conditional_headers(entry))
+            latency = time.perf_counter() - t1
+        except httpx.HTTPError as e:
+            m.inc("etl_fetch_errors_total", kind=kind, error=type(e).__name__)
+        finally:
+            overloaded = r is None or r.status_code in self.retry.statuses
+            if self.concurrency is not None:
+                await self.concurrency.release(latency, ok=not overloaded)
+        if r is None:
+            return None
+        m.observe("etl_fetch_seconds", latency, kind=kind)
+        m.inc("etl_http_responses_total", kind=kind, status=r.status_code)
+        m.inc("etl_fetch_bytes_total", len(r.content), kind=kind)
+        if r.status_code == 429:
+            bucket.throttle(self.retry.delay(0, r.headers) if "Retry-After" in r.headers else 0.0)
+        elif not overloaded:
+            bucket.recover()
+        return r
+
+    async def _send(self, url: str, kind: str, entry=None, method: str = "GET") -> Optional[httpx.Response]:
+        """Żądanie z ponowieniami; ostatnia odpowiedź (także błędna) albo None przy błędzie transportu."""
+        r = None
+        for attempt in range(self.retry.retries + 1):
+            if attempt:
+                delay = self.retry.delay(attempt - 1, r.headers if r is not None else None)
+                self.metrics.inc("etl_retries_total", kind=kind,
+                                 reason=str(r.status_code) if r is not None else "transport")
+                await asyncio.sleep(delay)
+            r = await self._request(url, kind, entry, method)
+            if r is None or r.status_code in self.retry.statuses:
+                continue
+            break
+        return r
+
+    async def probe(self, url: str) -> Optional[httpx.Response]:
+        """
+        Tanie sprawdzenie bez treści (HEAD, te same limity i ponowienia): status po przekierowaniach
+        i walidatory (ETag / Last-Modified). Bez cache i archiwum; w metrykach kind="probe".
+        """
+        assert self._client is not None, "AsyncFetcher used outside `async with`"
+        return await self._send(url, "probe", method="HEAD")
+
+    async def get_text(self, url: str, revalidate: bool = False) -> Optional[str]:
+        """
+        Jak `_safe_get`: treść przy 200, w innym przypadku None.
+        Z cache: świeży wpis bez sieci (i bez zużycia limitu), starszy -> żądanie warunkowe.
+        `revalidate=True` — żądanie warunkowe zawsze, także przy świeżym wpisie (odświeżanie
+        ofert: pytamy serwer, czy strona się zmieniła, a nie cache).
+        Odpowiedź z sieci (200 albo 304) trafia też do `archive`, o ile jest.
+        Cache i archiwum (SQLite, zlib / zstd, zapis segmentu) idą przez asyncio.to_thread —
+        dysk nie wstrzymuje pętli zdarzeń, czyli pozostałych pobrań i sygnału opóźnień AIMD.
+        Każde żądanie (czas, status, bajty, wyjątek) ląduje w `metrics`.
+        429 / 5xx / błąd transportu -> ponowienie wg `retry` (Retry-After albo backoff z jitterem);
+        429 dodatkowo wstrzymuje i zwalnia limiter hosta.
+        """
+        assert self._client is not None, "AsyncFetcher used outside `async with`"
+        m, kind = self.metrics, self.classify(url)
+        entry = await asyncio.to_thread(self.cache.lookup, url) if self.cache else None
+        if entry is not None and not revalidate and self.cache.is_fresh(url, entry):
+            m.inc("etl_cache_total", kind=kind, result="fresh")
+            return entry.body
+
+        r = await self._send(url, kind, entry)
+        if r is None:
+            return None
+        if r.status_code == 304 and entry is not None:
+            m.inc("etl_cache_total", kind=kind, result="not_modified")
+            await asyncio.to_thread(self.cache.touch, url)
+            body = entry.body
+        elif r.status_code != 200:
+            return None
+        else:
+            body = r.text
+            if self.cache:
+                await asyncio.to_thread(
+                    self.cache.store, url, body, r.headers.get("ETag"), r.headers.get("Last-Modified")
+                )
+        if self.archive:
+            await asyncio.to_thread(self.archive.put, url, body)
+        return body
@@ -0,0 +1,38 @@
+# services/worker/etl/data_version.py
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Licznik zmian danych widocznych dla API/dashboardu: db_meta('data_version').
+# Triggery na jobs_clean podbijają go przy każdym INSERT/UPDATE/DELETE — niezależnie od
+# ścieżki zapisu (Writer, bulk_upsert, backfille, ręczny SQL); tabele pochodne
+# (jobs_fts, job_skills, skill_counts) zmieniają się tylko razem z jobs_clean.
+# Czytelnicy trzymają cache wyników kluczowany tą wartością (i ETag z niej),
+# więc bez zapisu nie czytają bazy ponownie, a po zapisie nie serwują starych danych.
+
+VERSION_KEY = "data_version"
+
+_BUMP = f"UPDATE db_meta SET value = value + 1 WHERE key = '{VERSION_KEY}';"
+
+VERSION_DDL = [
+    """CREATE TABLE IF NOT EXISTS db_meta (
+        key   TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    ) WITHOUT ROWID""",
+    f"INSERT OR IGNORE INTO db_meta(key, value) VALUES ('{VERSION_KEY}', 0)",
+    f"CREATE TRIGGER IF NOT EXISTS data_version_ai AFTER INSERT ON jobs_clean BEGIN {_BUMP} END",
+    f"CREATE TRIGGER IF NOT EXISTS data_version_ad AFTER DELETE ON jobs_clean BEGIN {_BUMP} END",
+    f"CREATE TRIGGER IF NOT EXISTS data_version_au AFTER UPDATE ON jobs_clean BEGIN {_BUMP} END",
+]
+
+
+def ensure_data_version(conn: Connection) -> None:
+    for ddl in VERSION_DDL:
+        conn.execute(text(ddl))
+
+
+def get_data_version(conn: Connection) -> int:
+    return conn.execute(
+        text("SELECT value FROM db_meta WHERE key = :k"), {"k": VERSION_KEY}
+    ).scalar_one()
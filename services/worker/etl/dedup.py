@@ -1,4 +1,21 @@
+# services/worker/etl/dedup.py
+from __future__ import annotations
+
+import os
+import re
+import json
+import zlib
+import sqlite3
+import hashlib
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.common.normalize import fold
+
+
 def simple_dedup(rows, key="id"):
+    """Tylko identyczne klucze — do prostych list w pamięci; w ETL działa NearDupIndex."""
     seen = set()
     out = []
     for r in rows:
@@ -8,3 +25,138 @@ def simple_dedup(rows, key="id"):
         seen.add(k)
         out.append(r)
     return out
+
+
+# ===== MinHash + LSH =====
+# Ta sama oferta wraca pod /pl/job/.. i /en/job/.., a także z JustJoin (inny id, inna pisownia firmy).
+# Podpis MinHash liczymy ze zbioru cech oferty:
+#   - słowa i pary słów tytułu (różnica "Senior"/"Junior" czy "Python"/"Java" waży),
+#   - firma złożona i bez formy prawnej ("ACME Sp. z o.o." == "Acme"),
+#   - miasto (x3 — ta sama oferta w innym mieście to osobna pozycja) i kanoniczne seniority,
+#   - skille — z opisu, o ile był; nie zależą od języka strony, a sam opis bywa tłumaczony.
+# LSH: BANDS pasm po ROWS wartości; oferty, które dzielą choć jeden kubełek, są kandydatami.
+# Duplikat potwierdza dokładny Jaccard cech >= NEARDUP_THRESHOLD (cechy są krótkie i zapisane
+# obok podpisu) — estymata z 64 permutacji ma odchylenie ~0.06, za dużo na "Senior" vs "Junior".
+# Podpisy, cechy i kubełki są w bazie (job_minhash, lsh_buckets), więc nowa partia pyta tylko
+# o swoje kubełki. Zmiana NUM_PERM/BANDS/_SEED/features unieważnia zapisane podpisy.
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+NEARDUP_THRESHOLD = float(os.getenv("NEARDUP_THRESHOLD", "0.75"))
+
+_SEED = 20240501
+_PRIME = np.uint64((1 << 61) - 1)
+_MASK = np.uint64(0xFFFFFFFF)
+_rng = np.random.RandomState(_SEED)
+# a, b, hash < 2^32 -> a*h + b < 2^64, bez przepełnienia uint64
+_A = _rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+_LEGAL_RE = re.compile(r"\b(sp\.? ?z ?o\.? ?o\.?|s\.? ?a\.?|sp\.? ?k\.?|gmbh|ltd\.?|inc\.?|llc|s\.? ?r\.? ?o\.?)(?=\W|$)")
+_WORD_RE = re.compile(r"[^\W_]{2,}[+#]*")  # bez jednoliterowych dopisków typu (m/k)
+
+
+def features(rec: Dict) -> Set[str]:
+    words = _WORD_RE.findall(fold(rec.get("title")))
+    out = set(words)
+    out.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    company = " ".join(_WORD_RE.findall(_LEGAL_RE.sub(" ", fold(rec.get("company")))))
+    if company:
+        out.add("@co:" + company)
+    place = rec.get("city") or fold(rec.get("location"))
+    if place:
+        out.update(f"@city{i}:{place}" for i in range(3))
+    if rec.get("seniority"):
+        out.add("@sen:" + rec["seniority"])
+    out.update("#" + s.strip() for s in (rec.get("skills") or "").split(",") if s.strip())
+    return out
+
+
+def signature(feats: Set[str]) -> np.ndarray:
+    hv = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in feats), dtype=np.uint64, count=len(feats))
+    if not hv.size:
+        hv = np.zeros(1, dtype=np.uint64)
+    ph = (_A[:, None] * hv[None, :] + _B[:, None]) % _PRIME & _MASK
+    return ph.min(axis=1).astype(np.uint32)
+
+
+def band_keys(sig: np.ndarray) -> List[int]:
+    """Klucz kubełka dla każdego pasma (int64 ze znakiem — mieści się w INTEGER SQLite)."""
+    return [
+        int.from_bytes(hashlib.blake2b(sig[b * ROWS:(b + 1) * ROWS].tobytes(), digest_size=8).digest(),
+                       "little", signed=True)
+        for b in range(BANDS)
+    ]
+
+
+def estimate(a: np.ndarray, b: np.ndarray) -> float:
+    """Estymata Jaccarda z podpisów (tylko diagnostyka — decyzję podejmuje jaccard)."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class NearDupIndex:
+    """
+    Strumieniowe wykrywanie prawie-duplikatów na partiach rekordów (Writer.prepare).
+
+    mark(rows) dokleja do każdego rekordu:
+      dup_of  — id oferty kanonicznej albo None (pierwsza zapisana wersja zostaje kanoniczna),
+      sig     — podpis MinHash (bytes) do job_minhash,
+      feats   — cechy oferty (JSON) do job_minhash,
+      buckets — JSON z kluczami pasm do lsh_buckets (tylko dla kanonicznych).
+    Kandydatów szuka w kubełkach zapisanych w bazie i w bieżącej partii.
+    Zapis robią zapytania z main.WRITER_STATEMENTS["job"] w tej samej transakcji co oferta.
+    """
+
+    def __init__(self, db_path: str, threshold: float = NEARDUP_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self._con: Optional[sqlite3.Connection] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._con is None:
+            # osobne połączenie tylko do odczytu kubełków; w WAL widzi zatwierdzone partie
+            self._con = sqlite3.connect(self.db_path, check_same_thread=False)
+        return self._con
+
+    def _stored(self, band: int, key: int, exclude: str) -> List[Tuple[str, Set[str]]]:
+        rows = self._conn().execute(
+            "SELECT b.job_id, m.feats FROM lsh_buckets b JOIN job_minhash m ON m.job_id = b.job_id "
+            "WHERE b.band = ? AND b.bucket = ? AND b.job_id != ?", (band, key, exclude)
+        ).fetchall()
+        return [(jid, set(json.loads(feats))) for jid, feats in rows]
+
+    def mark(self, rows: List[Dict]) -> List[Dict]:
+        local: Dict[Tuple[int, int], List[Tuple[str, Set[str]]]] = {}
+        for r in rows:
+            feats = features(r)
+            sig = signature(feats)
+            keys = band_keys(sig)
+            best, best_sim = None, self.threshold
+            seen: Set[str] = set()
+            for band, key in enumerate(keys):
+                cands = local.get((band, key), []) + self._stored(band, key, r["id"])
+                for jid, other in cands:
+                    if jid in seen or jid == r["id"]:
+                        continue
+                    seen.add(jid)
+                    sim = jaccard(feats, other)
+                    if sim >= best_sim:
+                        best, best_sim = jid, sim
+            r["dup_of"] = best
+            r["sig"] = sig.tobytes()
+            r["feats"] = json.dumps(sorted(feats), ensure_ascii=False)
+            r["buckets"] = json.dumps(keys)
+            if best is None:
+                for band, key in enumerate(keys):
+                    local.setdefault((band, key), []).append((r["id"], feats))
+        return rows
+
+    def close(self) -> None:
+        if self._con is not None:
+            self._con.close()
+            self._con = None
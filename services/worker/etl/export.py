@@ -0,0 +1,54 @@
+# services/worker/etl/export.py
+"""
+Eksport kolumnowy jobs_clean (+ skille jako lista) do Parquet albo Arrow IPC.
+
+    python -m services.worker.etl.export --format parquet [--since 2024-05-01] [--out data/export/jobs.parquet]
+
+Czyta kursorem w partiach po --chunk wierszy (każda partia = jeden record batch / row group),
+przez połączenie tylko do odczytu — w WAL nie blokuje Writer-a ETL. Schemat i partie:
+services/common/export.py (ten sam kod eksportuje API /export/jobs).
+`--since` = tylko oferty zapisane (updated_at) od podanej daty/chwili: eksport przyrostowy.
+Plik Arrow (format IPC "file") da się zmapować w pamięci: pyarrow.ipc.open_file(pa.memory_map(...)).
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import Optional, Union
+
+from services.common.export import EXPORT_CHUNK, FORMATS, check_since, iter_batches, write_batches
+
+DB_PATH = os.getenv("DB_PATH", "data/ai_jobs.db")
+
+
+def export_jobs(db_path: str, out: Union[str, Path], fmt: str = "parquet",
+                since: Optional[str] = None, chunk: int = EXPORT_CHUNK) -> int:
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return write_batches(iter_batches(con, since, chunk), str(out), fmt)
+    finally:
+        con.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--format", choices=FORMATS, default="parquet")
+    ap.add_argument("--since", type=check_since, help="np. 2024-05-01 albo 2024-05-01T12:00:00")
+    ap.add_argument("--out", help="domyślnie data/export/jobs[_since].parquet|arrow")
+    ap.add_argument("--chunk", type=int, default=EXPORT_CHUNK)
+    ap.add_argument("--db", default=DB_PATH)
+    args = ap.parse_args()
+
+    ext = "parquet" if args.format == "parquet" else "arrow"
+    suffix = f"_{args.since.replace(':', '')}" if args.since else ""
+    out = args.out or f"data/export/jobs{suffix}.{ext}"
+    n = export_jobs(args.db, out, args.format, args.since, args.chunk)
+    print(f"{n} ofert -> {out}")
+
+
+if __name__ == "__main__":
+    main()
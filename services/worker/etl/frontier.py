@@ -0,0 +1,227 @@
+# services/worker/etl/frontier.py
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+EXPIRED = "expired"
+
+# ten sam SQL (styl :nazwa) działa przez text() w SQLAlchemy i w sqlite3 (Writer)
+INSERT_SQL = (
+    "INSERT OR IGNORE INTO crawl_frontier(url, discovered_at, status, attempts, last_seen_at) "
+    "VALUES (:u, :ts, 'pending', 0, :ts)"
+)
+MARK_SQL = (
+    "UPDATE crawl_frontier SET status = :s, attempts = attempts + 1, last_fetched_at = :ts, "
+    "content_hash = COALESCE(:h, content_hash), "
+    "expired_at = CASE WHEN :s = 'done' THEN NULL ELSE expired_at END WHERE url = :u"
+)
+# oferta pobrana z serwisu -> znów aktywna (wróciła na listing po wygaśnięciu)
+REVIVE_SQL = [
+    "UPDATE jobs_clean SET expired_at = NULL, updated_at = :ts WHERE id = :u AND :s = 'done' AND expired_at IS NOT NULL",
+    "UPDATE jobs_table SET expired_at = NULL WHERE id = :u AND :s = 'done' AND expired_at IS NOT NULL",
+]
+SEEN_SQL = "UPDATE crawl_frontier SET last_seen_at = :ts WHERE url IN (:u, :sib)"
+CHECK_SQL = (
+    "UPDATE crawl_frontier SET checks = checks + 1, last_checked_at = :ts, changes = changes + :c, "
+    "last_changed_at = CASE WHEN :c > 0 THEN :ts ELSE last_changed_at END, "
+    "content_hash = COALESCE(:h, content_hash), validator = COALESCE(:v, validator) WHERE url = :u"
+)
+EXPIRE_SQL = [
+    "UPDATE crawl_frontier SET status = 'expired', expired_at = :ts, checks = checks + 1, "
+    "last_checked_at = :ts WHERE url = :u",
+    # updated_at: eksport przyrostowy (since=) widzi wygaśnięcie jak każdą inną zmianę
+    "UPDATE jobs_clean SET expired_at = :ts, updated_at = :ts WHERE id = :u AND expired_at IS NULL",
+    "UPDATE jobs_table SET expired_at = :ts WHERE id = :u AND expired_at IS NULL",
+]
+# kolejność = kolejność wykonania (flush i partie Writer-a w main)
+WRITER_STATEMENTS = {
+    "frontier_new": [INSERT_SQL],
+    "frontier_mark": [MARK_SQL] + REVIVE_SQL,
+    "frontier_seen": [SEEN_SQL],
+    "frontier_check": [CHECK_SQL],
+    "frontier_expire": EXPIRE_SQL,
+}
+
+
+def sibling_url(url: str) -> str:
+    """Ta sama oferta w drugiej wersji językowej NFJ: /pl/job/x <-> /en/job/x."""
+    if "/pl/job/" in url:
+        return url.replace("/pl/job/", "/en/job/", 1)
+    return url.replace("/en/job/", "/pl/job/", 1)
+
+
+def _now() -> str:
+    return dt.datetime.now().isoformat(timespec="seconds")
+
+
+class Frontier:
+    """
+    Trwały frontier crawla w tabeli `crawl_frontier`.
+
+    Nowe URL-e i wyniki pobrań są buforowane; main przekazuje je (take) do Writer-a
+    zaraz po samej ofercie, więc trafiają do tej samej lub późniejszej transakcji
+    i po Ctrl-C / crashu w bazie zostają `pending` dokładnie te URL-e, których oferty
+    jeszcze nie zapisano. Bez Writer-a działa flush().
+    Sprawdzenie „czy już znamy ten URL” to lookup po kluczu plus zbiór URL-i przyjętych
+    w tym biegu (`_admitted`, take() go nie czyści) — zanim Writer zapisze frontier_new,
+    baza jeszcze ich nie zna, a ta sama oferta wraca z kolejnego listingu / w drugim języku.
+    Poza tym: kiedy URL ostatnio był na listingu (admit) oraz wyniki odświeżania
+    (checked / expire) — z tego refresh.py układa kolejkę ponownych sprawdzeń.
+    """
+
+    def __init__(self, engine: Engine, skip_existing: bool = True, max_attempts: int = 3):
+        self.engine = engine
+        self.skip_existing = skip_existing
+        self.max_attempts = max_attempts
+        self._new: Dict[str, str] = {}
+        self._admitted: Set[str] = set()  # przyjęte do pobrania w tym biegu (rośnie do limitu biegu)
+        self._fetched: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._seen: Dict[str, str] = {}
+        self._checked: Dict[str, dict] = {}
+        self._expired: Dict[str, str] = {}
+
+    def seed_from_jobs(self) -> int:
+        """Stara baza bez frontiera: oferty z jobs_clean traktujemy jako już pobrane."""
+        with self.engine.begin() as conn:
+            if conn.execute(text("SELECT 1 FROM crawl_frontier LIMIT 1")).first():
+                return 0
+            res = conn.execute(text(
+                "INSERT OR IGNORE INTO crawl_frontier(url, discovered_at, status, attempts, last_fetched_at) "
+                "SELECT id, posted_at, :done, 1, posted_at FROM jobs_clean WHERE id IS NOT NULL"
+            ), {"done": DONE})
+            return res.rowcount or 0
+
+    def count(self, status: str) -> int:
+        with self.engine.begin() as conn:
+            return conn.execute(
+                text("SELECT COUNT(*) FROM crawl_frontier WHERE status = :s"), {"s": status}
+            ).scalar_one()
+
+    def known(self, url: str) -> List:
+        """
+        Wiersze crawl_frontier dla URL-a i jego sibling_url — sam odczyt z bazy, bez buforów,
+        więc można go zrobić w wątku (WriterSink.admit), a decyzję podjąć już w pętli zdarzeń.
+        """
+        with self.engine.begin() as conn:
+            return conn.execute(
+                text("SELECT url, status, attempts FROM crawl_frontier WHERE url IN (:u, :s)"),
+                {"u": url, "s": sibling_url(url)},
+            ).all()
+
+    def admit(self, url: str, known: Optional[List] = None) -> bool:
+        """
+        Czy odkryty URL trzeba pobrać? Nowe URL-e lądują w buforze jako `pending`.
+        Znane i pobrane (`done`) pomijamy, chyba że skip_existing=False.
+        Oferty znanej już pod drugą wersją językową (sibling_url) nie pobieramy drugi raz.
+        Wygasła oferta, która wróciła na listing, jest pobierana ponownie.
+        Każdy odkryty URL odnotowujemy jako widziany na listingu (last_seen_at).
+        `known` = gotowy wynik known(url); bez niego odczyt z bazy tutaj.
+        """
+        sib = sibling_url(url)
+        if url in self._admitted or sib in self._admitted:
+            return False
+        if self._check(url, self.known(url) if known is None else known):
+            self._admitted.add(url)
+            return True
+        return False
+
+    def _check(self, url: str, rows: List) -> bool:
+        self._seen[url] = _now()
+        row = next((r for r in rows if r.url == url), None)
+        if row is None:
+            if rows:
+                return False
+            del self._seen[url]  # nowy URL: last_seen_at ustawia już INSERT
+            self._new[url] = _now()
+            return True
+        if row.status == DONE:
+            return not self.skip_existing
+        if row.status == EXPIRED:
+            return True
+        return row.status == PENDING or row.attempts < self.max_attempts
+
+    def pending_page(self, after: int = 0, page: int = 500) -> List[Tuple[int, str]]:
+        """Jedna strona (rowid, url) do wznowienia po rowid > `after` — sam odczyt, można z wątku."""
+        with self.engine.begin() as conn:
+            rows = conn.execute(text(
+                "SELECT rowid, url FROM crawl_frontier "
+                "WHERE rowid > :last AND (status = :p OR (status = :f AND attempts < :max)) "
+                "ORDER BY rowid LIMIT :lim"
+            ), {"last": after, "p": PENDING, "f": FAILED, "max": self.max_attempts, "lim": page}).all()
+        return [(r.rowid, r.url) for r in rows]
+
+    def iter_pending(self, page: int = 500) -> Iterator[str]:
+        """
+        URL-e do wznowienia (pending + failed z zapasem prób), stronicowane po rowid,
+        żeby nie trzymać otwartego kursora w trakcie zapisów.
+        """
+        last = 0
+        while True:
+            rows = self.pending_page(last, page)
+            if not rows:
+                return
+            for _, url in rows:
+                yield url
+            last = rows[-1][0]
+
+    async def aiter_pending(self, page: int = 500) -> AsyncIterator[str]:
+        """iter_pending dla crawla: każda strona czytana w wątku, pętla zdarzeń nie czeka na SQLite."""
+        last = 0
+        while True:
+            rows = await asyncio.to_thread(self.pending_page, last, page)
+            if not rows:
+                return
+            for _, url in rows:
+                yield url
+            last = rows[-1][0]
+
+    @property
+    def dirty(self) -> int:
+        return len(self._new) + len(self._fetched) + len(self._seen) + len(self._checked) + len(self._expired)
+
+    def mark(self, url: str, ok: bool, content_hash: Optional[str] = None) -> None:
+        self._fetched[url] = (DONE if ok else FAILED, content_hash)
+
+    def checked(self, url: str, changed: bool = False, content_hash: Optional[str] = None,
+                validator: Optional[str] = None) -> None:
+        """Wynik odświeżenia pobranej oferty: czy treść się zmieniła, nowy skrót i ETag."""
+        self._checked[url] = {"u": url, "c": int(changed), "h": content_hash, "v": validator}
+
+    def expire(self, url: str) -> None:
+        """Oferty już nie ma w serwisie: status `expired` + jobs_clean.expired_at."""
+        self._expired[url] = _now()
+
+    def take(self) -> List[Tuple[str, dict]]:
+        """
+        Oddaje (i czyści) zbuforowane zmiany jako (kind, params) dla Writer.put
+        — rodzaje jak w WRITER_STATEMENTS.
+        """
+        ts = _now()
+        ops = [("frontier_new", {"u": u, "ts": t}) for u, t in self._new.items()]
+        ops += [("frontier_mark", {"u": u, "s": s, "h": h, "ts": ts}) for u, (s, h) in self._fetched.items()]
+        ops += [("frontier_seen", {"u": u, "sib": sibling_url(u), "ts": t}) for u, t in self._seen.items()]
+        ops += [("frontier_check", dict(p, ts=ts)) for p in self._checked.values()]
+        ops += [("frontier_expire", {"u": u, "ts": t}) for u, t in self._expired.items()]
+        for buf in (self._new, self._fetched, self._seen, self._checked, self._expired):
+            buf.clear()
+        return ops
+
+    def flush(self) -> None:
+        """Zapis bez Writer-a (jedna transakcja przez engine)."""
+        ops = self.take()
+        if not ops:
+            return
+        with self.engine.begin() as conn:
+            for kind, stmts in WRITER_STATEMENTS.items():
+                rows = [p for k, p in ops if k == kind]
+                if rows:
+                    for sql in stmts:
+                        conn.execute(text(sql), rows)
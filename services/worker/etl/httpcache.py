@@ -0,0 +1,95 @@
+# services/worker/etl/httpcache.py
+from __future__ import annotations
+
+import time
+import zlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, NamedTuple, Optional, Union
+
+
+class CacheEntry(NamedTuple):
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class HttpCache:
+    """
+    Cache odpowiedzi HTTP na dysku (osobny plik SQLite), kluczem jest URL.
+
+    - wpis młodszy niż `ttl` sekund -> zwracamy bez sieci (is_fresh),
+    - starszy -> żądanie warunkowe z If-None-Match / If-Modified-Since;
+      304 odświeża znacznik czasu (touch) i oddaje zapisaną treść.
+
+    `ttl` może być liczbą albo funkcją url -> sekundy (np. inne TTL dla listingów).
+    Treść trzymamy skompresowaną zlib-em.
+    """
+
+    def __init__(self, path: Union[str, Path], ttl: Union[float, Callable[[str], float]] = 0.0):
+        self.path = Path(path)
+        self.ttl = ttl
+        self._con: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._con is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            con = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS http_cache ("
+                " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,"
+                " fetched_at REAL NOT NULL, body BLOB NOT NULL)"
+            )
+            self._con = con
+        return self._con
+
+    def _ttl(self, url: str) -> float:
+        return self.ttl(url) if callable(self.ttl) else float(self.ttl)
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT body, etag, last_modified, fetched_at FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(zlib.decompress(row[0]).decode("utf-8"), row[1], row[2], row[3])
+
+    def is_fresh(self, url: str, entry: CacheEntry) -> bool:
+        return time.time() - entry.fetched_at < self._ttl(url)
+
+    @staticmethod
+    def conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        h: Dict[str, str] = {}
+        if entry is None:
+            return h
+        if entry.etag:
+            h["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            h["If-Modified-Since"] = entry.last_modified
+        return h
+
+    def store(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        blob = zlib.compress(body.encode("utf-8"), 6)
+        with self._lock:
+            self._conn().execute(
+                "INSERT INTO http_cache(url, etag, last_modified, fetched_at, body) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET etag=excluded.etag, last_modified=excluded.last_modified, "
+                "fetched_at=excluded.fetched_at, body=excluded.body",
+                (url, etag, last_modified, time.time(), blob),
+            )
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            self._conn().execute("UPDATE http_cache SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._con is not None:
+                self._con.close()
+                self._con = None
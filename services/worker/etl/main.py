@@ -3,62 +3,264 @@ from __future__ import annotations
 
 import os
 import json
+import time
+import asyncio
+import argparse
 import logging
 import datetime as dt
 from pathlib import Path
-from typing import List, Dict, Iterable
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Callable, Optional, Iterable, Iterator, Tuple
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.engine import Engine
-from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from services.worker.etl.schema import metadata, jobs_table, jobs_clean
-from services.worker.etl.sources.nofluff import iter_job_urls, fetch_job
+from services.worker.etl.schema import JOBS_ALL_DDL, metadata
+from services.worker.etl.migrations import migrate
+from services.worker.etl.search import ensure_fts
+from services.worker.etl.skill_stats import ensure_skill_stats
+from services.worker.etl.data_version import ensure_data_version
+from services.worker.etl import frontier as frontier_mod
+from services.worker.etl.frontier import Frontier
+from services.worker.etl.refresh import Refresher, content_hash
+from services.worker.etl.writer import Writer
+from services.worker.etl.nlp import extract_skills, extract_skills_many
+from services.common.normalize import normalize_batch
+from services.worker.etl.dedup import NearDupIndex
+from services.worker.etl.archive import RawArchive
+from services.worker.etl.metrics import METRICS, MetricsExporter
+from services.worker.etl.sources.base import (
+    RecordSink, Source, STATE_SQL, build_sources, load_state, parse_names, state_params,
+)
+from services.worker.etl.sources.nofluff import parse_job, page_kind, NFJ_RAW_ARCHIVE
+from services.worker.etl.sources import jj_apify, dummy_source  # noqa: F401 — rejestracja źródeł
 
 load_dotenv()
 
 DB_PATH = os.getenv("DB_PATH", "data/ai_jobs.db")
 
+# źródła uruchamiane równolegle w jednym biegu (rejestr: sources/base.py): nofluff, jj_apify, dummy
+ETL_SOURCES = os.getenv("ETL_SOURCES", "nofluff")
+
+# ile NOWYCH elementów datasetu JustJoin (jj_apify) wziąć w jednym biegu; 0 = wszystkie
+JJ_LIMIT = int(os.getenv("JJ_LIMIT", "200"))
+
 # limit na JEDEN bieg (baza i tak akumuluje; ustaw spory, np. 10000)
 NFJ_LIMIT = int(os.getenv("NFJ_LIMIT", "10000"))
 
-# ile równolegle pobierać stron ogłoszeń
-NFJ_WORKERS = int(os.getenv("NFJ_WORKERS", "10"))
+# ile korutyn pobiera strony ogłoszeń naraz (tempo i tak wyznacza limiter per host)
+NFJ_CONCURRENCY = int(os.getenv("NFJ_CONCURRENCY", "32"))
 
 # zapisuj partiami co N rekordów (żeby przerwanie nie kasowało postępu)
 ETL_FLUSH_EVERY = int(os.getenv("ETL_FLUSH_EVERY", "150"))
 
+# ...albo co tyle sekund od pierwszego niezapisanego rekordu
+ETL_FLUSH_SECONDS = float(os.getenv("ETL_FLUSH_SECONDS", "2.0"))
+
+# ile rekordów może czekać na wątek zapisu, zanim pobieranie zwolni (backpressure)
+ETL_WRITE_QUEUE = int(os.getenv("ETL_WRITE_QUEUE", "2000"))
+
 # pominąć oferty, które JUŻ są w bazie? (szybsze odświeżenia)
 NFJ_SKIP_EXISTING = os.getenv("NFJ_SKIP_EXISTING", "1") == "1"
 
+# wznów przerwany bieg z frontiera (pending) zamiast od nowa przeszukiwać listingi
+NFJ_RESUME = os.getenv("NFJ_RESUME", "1") == "1"
+
+# ile razy próbować pobrać ofertę, zanim uznamy ją za straconą
+NFJ_MAX_ATTEMPTS = int(os.getenv("NFJ_MAX_ATTEMPTS", "3"))
+
+# odświeżanie znanych ofert (refresh.py): budżet żądań na bieg (0 = wyłączone),
+# minimalny odstęp między sprawdzeniami i po ilu godzinach bez listingu oferta jest „niewidziana”
+NFJ_REFRESH_BUDGET = int(os.getenv("NFJ_REFRESH_BUDGET", "200"))
+NFJ_REFRESH_MIN_AGE = float(os.getenv("NFJ_REFRESH_MIN_AGE", "6"))
+NFJ_UNSEEN_HOURS = float(os.getenv("NFJ_UNSEEN_HOURS", "48"))
+
 # dump surowych partii do data/raw/
 RAW_DUMP = os.getenv("RAW_DUMP") == "1"
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s")
 logger = logging.getLogger("etl-nfj")
+logging.getLogger("httpx").setLevel(logging.WARNING)  # bez linii logu na każde żądanie
 
 def get_engine() -> Engine:
     return create_engine(f"sqlite:///{DB_PATH}", future=True)
 
+def _add_missing_columns(conn, table):
+    # create_all nie zmienia istniejących tabel — dołóż nowe kolumny starym bazom
+    have = {r[1] for r in conn.execute(text(f"PRAGMA table_info({table.name})"))}
+    for col in table.columns:
+        if col.name not in have:
+            extra = ""
+            if col.server_default is not None:  # NOT NULL przy ADD COLUMN tylko z DEFAULT
+                extra = (" NOT NULL" if not col.nullable else "") + f" DEFAULT '{col.server_default.arg}'"
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile()}{extra}"))
+
 def ensure_schema(engine: Engine):
+    fresh = not inspect(engine).has_table("jobs_clean")
     metadata.create_all(engine)
     with engine.begin() as conn:
-        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_table_id ON jobs_table(id)"))
-        conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_clean_id ON jobs_clean(id)"))
+        for table in metadata.sorted_tables:
+            _add_missing_columns(conn, table)
+        conn.execute(text("DROP VIEW IF EXISTS jobs_all"))  # migracje przebudowują tabele pod widokiem
+        migrate(conn, fresh=fresh)
+        conn.execute(text(JOBS_ALL_DDL))
+        # indeksy z schema.py na tabelach, które już istniały (create_all ich nie dokłada);
+        # po nazwie, bo checkfirst nie widzi indeksów na wyrażeniach
+        have = set(conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars())
+        for table in metadata.sorted_tables:
+            for idx in table.indexes:
+                if idx.name not in have:
+                    idx.create(conn)
+        if ensure_fts(conn):
+            logger.info("Utworzono indeks FTS5 jobs_fts")
+        if ensure_skill_stats(conn):
+            logger.info("Utworzono liczniki skill_counts")
+        ensure_data_version(conn)
+
+JOB_COLUMNS = ["id", "title", "company", "location", "seniority", "url", "posted_at", "source", "skills",
+               "city", "remote", "updated_at"]
+
+def _upsert_sql(table: str, columns: List[str] = JOB_COLUMNS, where: Optional[str] = None) -> str:
+    """
+    Upsert po id, który nadpisuje wiersz tylko przy zmianie treści: ponowne pobranie tej samej
+    oferty nie rusza triggerów (jobs_fts, skill_counts, data_version) ani updated_at.
+    """
+    cols = ", ".join(columns)
+    vals = ", ".join(f":{c}" for c in columns)
+    content = [c for c in columns if c not in ("id", "updated_at")]
+    upd = ", ".join(f"{c}=excluded.{c}" for c in columns if c != "id")
+    changed = "({}) IS NOT ({})".format(
+        ", ".join(f"{table}.{c}" for c in content), ", ".join(f"excluded.{c}" for c in content)
+    )
+    on_conflict = f"ON CONFLICT(id) DO UPDATE SET {upd} WHERE {changed}"
+    if where:  # INSERT .. SELECT z WHERE — inaczej parser myli ON CONFLICT z JOIN .. ON
+        return f"INSERT INTO {table}({cols}) SELECT {vals} WHERE {where} {on_conflict}"
+    return f"INSERT INTO {table}({cols}) VALUES ({vals}) {on_conflict}"
+
+# każda oferta w dokładnie jednej tabeli: kanoniczne w jobs_clean, prawie-duplikaty (dup_of)
+# w jobs_table; oferta, która zmieniła rolę, przenosi się między nimi (całość: widok jobs_all)
+JOB_STATEMENTS = [
+    "DELETE FROM jobs_clean WHERE id = :id AND :dup_of IS NOT NULL",
+    "DELETE FROM jobs_table WHERE id = :id AND :dup_of IS NULL",
+    _upsert_sql("jobs_clean", where=":dup_of IS NULL"),
+    _upsert_sql("jobs_table", JOB_COLUMNS + ["dup_of"], where=":dup_of IS NOT NULL"),
+    "INSERT OR REPLACE INTO job_minhash(job_id, sig, feats) VALUES (:id, :sig, :feats)",
+    "DELETE FROM lsh_buckets WHERE job_id = :id",
+    "INSERT OR IGNORE INTO lsh_buckets(band, bucket, job_id) "
+    "SELECT key, value, :id FROM json_each(:buckets) WHERE :dup_of IS NULL",
+]
+
+# kolejność = kolejność wykonania w transakcji partii
+WRITER_STATEMENTS = {
+    "frontier_new": frontier_mod.WRITER_STATEMENTS["frontier_new"],
+    "job": JOB_STATEMENTS,
+    "frontier_mark": frontier_mod.WRITER_STATEMENTS["frontier_mark"],
+    "frontier_seen": frontier_mod.WRITER_STATEMENTS["frontier_seen"],
+    "frontier_check": frontier_mod.WRITER_STATEMENTS["frontier_check"],
+    "frontier_expire": frontier_mod.WRITER_STATEMENTS["frontier_expire"],
+    "source_state": [STATE_SQL],  # na końcu: stan źródła po rekordach, których dotyczy
+}
+
+def enrich(rec: Dict) -> Dict:
+    """Wspólny krok dla każdego źródła: skille z tytułu + opisu (o ile źródło go daje)."""
+    if not rec.get("skills"):
+        with METRICS.time("etl_stage_seconds", stage="enrich"):
+            rec["skills"] = ",".join(extract_skills(f"{rec.get('title') or ''}\n{rec.get('description') or ''}"))
+    return rec
+
+def job_params(rec: Dict) -> Dict:
+    params = {c: rec.get(c) for c in JOB_COLUMNS}
+    params["updated_at"] = dt.datetime.now().isoformat(timespec="seconds")  # znacznik dla eksportu since=
+    return params
+
+def prepare_jobs(index: NearDupIndex) -> Callable[[List[Dict]], List[Dict]]:
+    """Etapy wsadowe przed zapisem partii ofert: normalizacja, potem wykrywanie prawie-duplikatów."""
+    def prepare(rows: List[Dict]) -> List[Dict]:
+        with METRICS.time("etl_stage_seconds", stage="normalize"):
+            rows = normalize_batch(rows)
+        with METRICS.time("etl_stage_seconds", stage="neardup"):
+            rows = index.mark(rows)
+        METRICS.inc("etl_duplicates_total", sum(1 for r in rows if r.get("dup_of")))
+        return rows
+    return prepare
+
+def backfill_skills(engine: Engine, batch: int = 1000) -> int:
+    """Stare wiersze bez skills (sprzed kolumny) — uzupełnij z tytułu, partiami."""
+    done = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text("SELECT id, title FROM jobs_clean WHERE skills IS NULL LIMIT :n"), {"n": batch}
+            ).all()
+            if not rows:
+                return done
+            found = extract_skills_many(r.title or "" for r in rows)
+            params = [{"id": r.id, "skills": ",".join(sk)} for r, sk in zip(rows, found)]
+            conn.execute(text("UPDATE jobs_clean SET skills = :skills WHERE id = :id"), params)
+            conn.execute(text("UPDATE jobs_table SET skills = :skills WHERE id = :id"), params)
+        done += len(rows)
+
+def backfill_normalized(engine: Engine, batch: int = 1000) -> int:
+    """Wiersze sprzed etapu normalizacji (remote IS NULL) — seniority/location/city/remote partiami."""
+    done = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text("SELECT id, title, seniority, location FROM jobs_clean WHERE remote IS NULL LIMIT :n"),
+                {"n": batch},
+            ).mappings().all()
+            if not rows:
+                return done
+            params = [
+                {k: r[k] for k in ("id", "seniority", "location", "city", "remote")}
+                for r in normalize_batch(dict(r) for r in rows)
+            ]
+            for table in ("jobs_clean", "jobs_table"):
+                conn.execute(text(
+                    f"UPDATE {table} SET seniority = :seniority, location = :location, "
+                    "city = :city, remote = :remote WHERE id = :id"
+                ), params)
+        done += len(rows)
+
+def backfill_neardup(engine: Engine, batch: int = 500) -> int:
+    """
+    Oferty bez podpisu MinHash (sprzed dedupu) — w kolejności zapisu, więc kanoniczna
+    zostaje starsza wersja; duplikaty przechodzą z jobs_clean do jobs_table (i znikają z liczników skilli).
+    """
+    index = NearDupIndex(engine.url.database)
+    cols = ", ".join(JOB_COLUMNS)
+    done = 0
+    try:
+        while True:
+            with engine.begin() as conn:
+                rows = conn.execute(text(
+                    f"SELECT {cols} FROM jobs_clean t WHERE NOT EXISTS "
+                    "(SELECT 1 FROM job_minhash m WHERE m.job_id = t.id) ORDER BY rowid LIMIT :n"
+                ), {"n": batch}).mappings().all()
+            if not rows:
+                return done
+            params = index.mark([dict(r) for r in rows])
+            with engine.begin() as conn:
+                for sql in WRITER_STATEMENTS["job"]:
+                    conn.execute(text(sql), params)
+            done += sum(1 for p in params if p["dup_of"])
+    finally:
+        index.close()
 
 def bulk_upsert(engine: Engine, rows: List[Dict]):
+    """Jednorazowy zapis poza biegiem crawla (ten sam SQL i te same etapy co Writer)."""
     if not rows:
         return
-    with engine.begin() as conn:
-        stmt = sqlite_insert(jobs_table).values(rows)
-        upd = {c: getattr(stmt.excluded, c) for c in ["title","company","location","seniority","url","posted_at","source"]}
-        conn.execute(stmt.on_conflict_do_update(index_elements=["id"], set_=upd))
-
-        stmt2 = sqlite_insert(jobs_clean).values(rows)
-        upd2 = {c: getattr(stmt2.excluded, c) for c in ["title","company","location","seniority","url","posted_at","source"]}
-        conn.execute(stmt2.on_conflict_do_update(index_elements=["id"], set_=upd2))
+    index = NearDupIndex(engine.url.database)
+    try:
+        params = prepare_jobs(index)([job_params(enrich(r)) for r in rows])
+        with engine.begin() as conn:
+            for sql in WRITER_STATEMENTS["job"]:
+                conn.execute(text(sql), params)
+    finally:
+        index.close()
 
 def dump_jsonl(rows: List[Dict], tag: str):
     Path("data/raw").mkdir(parents=True, exist_ok=True)
@@ -69,79 +271,284 @@ def dump_jsonl(rows: List[Dict], tag: str):
             f.write(json.dumps(r, ensure_ascii=False) + "\n")
     logger.info("RAW dump -> %s (%d)", p, len(rows))
 
-def load_existing_ids(engine: Engine) -> set:
-    if not NFJ_SKIP_EXISTING:
-        return set()
-    with engine.begin() as conn:
-        rows = conn.execute(text("SELECT id FROM jobs_clean")).fetchall()
-    return {r[0] for r in rows}
+def replay(engine: Engine, archive: RawArchive, since: Optional[float] = None) -> int:
+    """
+    Tryb offline: najnowsza zarchiwizowana wersja każdej strony oferty -> parser -> te same etapy
+    i ten sam Writer co w biegu z siecią. Po zmianie parsera / słownika skilli wystarczy to,
+    bez ponownego crawla. `since` = tylko strony pobrane od tej chwili (timestamp).
+    """
+    neardup = NearDupIndex(engine.url.database)
+    writer = Writer(
+        engine.url.database, {"job": JOB_STATEMENTS},
+        batch_size=ETL_FLUSH_EVERY, max_delay=ETL_FLUSH_SECONDS,
+        queue_size=ETL_WRITE_QUEUE, count_kind="job",
+        prepare={"job": prepare_jobs(neardup)}, metrics=METRICS,
+    )
+    METRICS.gauge("etl_writer_queue_depth", writer.qsize)
+    writer.start()
+    parsed = 0
+    try:
+        for page in archive.iter_latest("job", since=since):
+            with METRICS.time("etl_stage_seconds", stage="parse"):
+                rec = parse_job(page.url, page.body, fetched_on=dt.date.fromtimestamp(page.fetched_at).isoformat())
+            parsed += 1
+            if rec.get("title"):
+                writer.put("job", job_params(enrich(rec)))
+    finally:
+        writer.close()
+        neardup.close()
+    logger.info("Replay: sparsowano %d stron z archiwum, zapisano %d ofert", parsed, writer.committed["job"])
+    return writer.committed["job"]
 
-def main():
-    logger.info("Start ETL NFJ-only | DB_PATH=%s", DB_PATH)
-    engine = get_engine()
-    ensure_schema(engine)
+class WriterSink(RecordSink):
+    """
+    Sink biegu: frontier decyduje, co pobierać; wszystkie źródła piszą przez jeden Writer.
+    Writer.put blokuje przy pełnej kolejce zapisu (backpressure), więc wrzucamy przez jeden
+    osobny wątek: czekają tylko emitujące korutyny, a pętla zdarzeń (odczyty HTTP, timeouty,
+    sygnał opóźnień AIMD) działa dalej. Jeden wątek = wrzutki w kolejności emit.
+    """
 
-    existing = load_existing_ids(engine)
-    if existing:
-        logger.info("Pomijam istniejące oferty: %d", len(existing))
+    def __init__(self, writer: Writer, frontier: Frontier):
+        self.writer = writer
+        self.frontier = frontier
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="etl-sink")
 
-    # Zbiór URL-i (generator) -> filtr na istniejące -> do listy „todo”
-    todo: List[str] = []
-    taken = 0
-    for u in iter_job_urls(limit=NFJ_LIMIT):
-        if NFJ_SKIP_EXISTING and u in existing:
-            continue
-        todo.append(u)
-        taken += 1
-    logger.info("Zebrane URL-e ofert do pobrania: %d (po odfiltrowaniu istniejących)", len(todo))
+    def _put(self, ops: List[Tuple[str, Dict]]) -> None:
+        for kind, params in ops:
+            self.writer.put(kind, params)
 
-    saved_total = 0
-    buf: List[Dict] = []
+    async def _submit(self, ops: List[Tuple[str, Dict]]) -> None:
+        if ops:
+            await asyncio.get_running_loop().run_in_executor(self._pool, self._put, ops)
 
-    try:
-        with ThreadPoolExecutor(max_workers=max(1, NFJ_WORKERS)) as ex:
-            futures = [ex.submit(fetch_job, u) for u in todo]
-            for i, fut in enumerate(as_completed(futures), start=1):
-                try:
-                    rec = fut.result()
-                except Exception:
-                    rec = None
-                if rec and rec.get("title"):
-                    buf.append(rec)
-
-                if buf and (len(buf) >= ETL_FLUSH_EVERY):
-                    bulk_upsert(engine, buf)
-                    saved_total += len(buf)
-                    if RAW_DUMP: dump_jsonl(buf, "nfj_part")
-                    logger.info("Zapisano partię: +%d (łącznie: %d / %d)", len(buf), saved_total, len(todo))
-                    buf.clear()
-
-        # flush końcowy
-        if buf:
-            bulk_upsert(engine, buf)
-            saved_total += len(buf)
-            if RAW_DUMP: dump_jsonl(buf, "nfj_part")
-            logger.info("Zapisano ostatnią partię: +%d (łącznie: %d / %d)", len(buf), saved_total, len(todo))
-            buf.clear()
+    async def admit(self, url: str) -> bool:
+        # odczyt frontiera w wątku, decyzja i bufory (take w emit) w pętli zdarzeń
+        known = await asyncio.to_thread(self.frontier.known, url)
+        return self.frontier.admit(url, known)
+
+    async def emit(self, url: str, rec: Optional[Dict]) -> None:
+        ok = bool(rec and rec.get("title"))
+        METRICS.inc("etl_records_total", result="ok" if ok else "empty")
+        ops = [("job", job_params(enrich(rec)))] if ok else []
+        # status we frontierze za ofertą w tej samej kolejce -> crash nie gubi pobranych
+        self.frontier.mark(url, ok, content_hash(rec) if ok else None)
+        await self._submit(ops + self.frontier.take())
+
+    def state(self, source: str) -> Dict:
+        return load_state(self.frontier.engine, source)
 
+    async def checkpoint(self, source: str, state: Dict) -> None:
+        await self._submit([("source_state", state_params(source, state))])
+
+    async def sync(self) -> None:
+        await self._submit(self.frontier.take())
+        await asyncio.get_running_loop().run_in_executor(self._pool, self.writer.sync)
+
+    def close(self) -> None:
+        """Czeka na wrzutki w toku (np. po Ctrl-C w trakcie asyncio.run)."""
+        self._pool.shutdown(wait=True)
+
+async def run_sources(sources: List[Source], sink: RecordSink) -> Dict[str, Dict[str, int]]:
+    """
+    Wszystkie źródła naraz w jednej pętli zdarzeń (każde z własnym klientem i limitami),
+    wyniki do wspólnego sinka. Błąd jednego źródła nie przerywa pozostałych.
+    """
+    async def one(src: Source) -> Dict[str, int]:
+        reason = src.unavailable()
+        if reason:
+            logger.warning("Źródło %s pominięte: %s", src.name, reason)
+            return {}
+        with METRICS.time("etl_source_seconds", source=src.name):
+            try:
+                return await src.run(sink)
+            except Exception:
+                logger.exception("Źródło %s przerwane błędem", src.name)
+                METRICS.inc("etl_source_errors_total", source=src.name)
+                return {"failed": 1}
+
+    results = await asyncio.gather(*(one(s) for s in sources))
+    return {s.name: r for s, r in zip(sources, results)}
+
+def record_run(engine: Engine, run: Dict) -> None:
+    """Wiersz etl_runs: wynik biegu + liczniki z METRICS (błędy HTTP, wyjątki, bajty) + pełne podsumowanie."""
+    stats = run.get("stats") or {}
+    responses = METRICS.value("etl_http_responses_total")
+    ok = METRICS.value("etl_http_responses_total", status=200) + METRICS.value("etl_http_responses_total", status=304)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO etl_runs(mode, status, started_at, finished_at, seconds, discovered, fetched, saved, "
+            "duplicates, http_errors, fetch_errors, bytes, metrics) VALUES (:mode, :status, :started_at, "
+            ":finished_at, :seconds, :discovered, :fetched, :saved, :duplicates, :http_errors, :fetch_errors, "
+            ":bytes, :metrics)"
+        ), {
+            "mode": run["mode"], "status": run["status"],
+            "started_at": run["started_at"], "finished_at": dt.datetime.now().isoformat(timespec="seconds"),
+            "seconds": round(run["seconds"], 3),
+            "discovered": stats.get("discovered"), "fetched": stats.get("fetched"), "saved": stats.get("saved"),
+            "duplicates": int(METRICS.value("etl_duplicates_total")),
+            "http_errors": int(responses - ok),
+            "fetch_errors": int(METRICS.value("etl_fetch_errors_total")),
+            "bytes": int(METRICS.value("etl_fetch_bytes_total")),
+            "metrics": json.dumps(dict(METRICS.summary(), sources=run.get("sources", {}))),
+        })
+
+@contextmanager
+def run_report(engine: Engine, mode: str) -> Iterator[Dict]:
+    """
+    Ramy biegu: metryki od zera, eksport (plik / endpoint) na czas biegu, na końcu wiersz w etl_runs.
+    Wewnątrz można ustawić run["mode"], run["status"] i run["stats"]; wyjątek -> status "failed".
+    """
+    METRICS.reset()
+    run = {"mode": mode, "status": "ok", "started_at": dt.datetime.now().isoformat(timespec="seconds"), "stats": {}}
+    t0 = time.perf_counter()
+    exporter = MetricsExporter(METRICS).start()
+    try:
+        yield run
     except KeyboardInterrupt:
-        # flush tego co mamy i eleganckie wyjście
-        if buf:
-            bulk_upsert(engine, buf)
-            saved_total += len(buf)
-            if RAW_DUMP: dump_jsonl(buf, "nfj_part")
-            logger.info("Przerwano — zapisano bieżącą partię: +%d (łącznie: %d / %d)", len(buf), saved_total, len(todo))
-
-    # metryki
+        run["status"] = "interrupted"
+        raise
+    except BaseException:
+        run["status"] = "failed"
+        raise
+    finally:
+        exporter.stop()
+        run["seconds"] = time.perf_counter() - t0
+        try:
+            record_run(engine, run)
+        except Exception:
+            logger.exception("Nie udało się zapisać etl_runs")
+
+def log_summary(engine: Engine, saved_total: int):
     with engine.begin() as conn:
         total = conn.execute(text("SELECT COUNT(*) FROM jobs_clean")).scalar_one()
         firms = conn.execute(text("SELECT COUNT(DISTINCT company) FROM jobs_clean")).scalar_one()
     logger.info("NFJ-only — run summary: saved_in_run=%d | total_in_db=%d | firms=%d", saved_total, total, firms)
+
+def analyze(engine: Engine):
+    """
+    Statystyki planera (sqlite_stat1) po biegu: bez nich SQLite nie wie, że np. city jest
+    selektywne, a expired_at IS NULL — nie (plany: bench/bench_queries.py). analysis_limit
+    = próbka z każdego indeksu, więc koszt nie rośnie z rozmiarem bazy.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("PRAGMA analysis_limit = 1000"))
+        conn.execute(text("ANALYZE"))
+
+def main_replay(archive_dir: str = NFJ_RAW_ARCHIVE, since: Optional[str] = None):
+    if not archive_dir:
+        raise ValueError("replay wymaga katalogu archiwum (NFJ_RAW_ARCHIVE albo --archive)")
+    logger.info("Start ETL replay z archiwum %s | DB_PATH=%s", archive_dir, DB_PATH)
+    engine = get_engine()
+    ensure_schema(engine)
+    archive = RawArchive(archive_dir, classify=page_kind)
+    try:
+        with run_report(engine, "replay") as run:
+            ts = dt.datetime.fromisoformat(since).timestamp() if since else None
+            saved_total = replay(engine, archive, since=ts)
+            run["stats"] = {"saved": saved_total}
+    finally:
+        archive.close()
+    analyze(engine)
+    log_summary(engine, saved_total)
+    logger.info("ETL zakończony")
+
+def main() -> Dict[str, int]:
+    logger.info("Start ETL | źródła=%s | DB_PATH=%s", ETL_SOURCES, DB_PATH)
+    engine = get_engine()
+    ensure_schema(engine)
+
+    with run_report(engine, "crawl") as run:
+        filled = backfill_skills(engine)
+        if filled:
+            logger.info("Uzupełniono skills dla %d starszych ofert", filled)
+        normalized = backfill_normalized(engine)
+        if normalized:
+            logger.info("Znormalizowano seniority/lokalizację dla %d starszych ofert", normalized)
+        dups = backfill_neardup(engine)
+        if dups:
+            logger.info("Prawie-duplikaty usunięte z jobs_clean: %d", dups)
+
+        frontier = Frontier(engine, skip_existing=NFJ_SKIP_EXISTING, max_attempts=NFJ_MAX_ATTEMPTS)
+        seeded = frontier.seed_from_jobs()
+        if seeded:
+            logger.info("Frontier zainicjowany z jobs_clean: %d", seeded)
+
+        # niedokończony poprzedni bieg -> dokończ pending/failed bez ponownego discovery
+        resume = NFJ_RESUME and (frontier.count("pending") > 0)
+        run["mode"] = "resume" if resume else "crawl"
+        if resume:
+            logger.info("Wznawiam przerwany bieg: %d URL-i w stanie pending", frontier.count("pending"))
+
+        def on_commit(batch: Dict[str, List[Dict]]):
+            jobs = batch.get("job") or []
+            if jobs:
+                if RAW_DUMP: dump_jsonl([dict(job_params(j), dup_of=j.get("dup_of")) for j in jobs], "nfj_part")
+                dups = sum(1 for j in jobs if j.get("dup_of"))
+                logger.info("Zapisano partię: +%d, w tym prawie-duplikatów: %d (łącznie: %d)",
+                            len(jobs), dups, writer.committed["job"])
+
+        neardup = NearDupIndex(DB_PATH)
+        # jedyny wątek piszący do SQLite; pętla zdarzeń tylko wrzuca do kolejki
+        writer = Writer(
+            DB_PATH, WRITER_STATEMENTS,
+            batch_size=ETL_FLUSH_EVERY, max_delay=ETL_FLUSH_SECONDS,
+            queue_size=ETL_WRITE_QUEUE, count_kind="job", on_commit=on_commit,
+            prepare={"job": prepare_jobs(neardup)},  # etapy wsadowe w wątku zapisu
+            metrics=METRICS,
+        )
+        METRICS.gauge("etl_writer_queue_depth", writer.qsize)
+
+        # odświeżanie znanych ofert tylko w zwykłym biegu (wznowienie najpierw kończy zaległe)
+        refresher = None
+        if NFJ_REFRESH_BUDGET > 0 and not resume:
+            refresher = Refresher(frontier, NFJ_REFRESH_BUDGET, NFJ_REFRESH_MIN_AGE, NFJ_UNSEEN_HOURS)
+        sources = build_sources(parse_names(ETL_SOURCES), nofluff={
+            "limit": NFJ_LIMIT, "concurrency": NFJ_CONCURRENCY,
+            "urls": frontier.aiter_pending() if resume else None, "refresh": refresher,
+        }, jj_apify={"limit": JJ_LIMIT})
+        sink = WriterSink(writer, frontier)
+
+        writer.start()
+        per_source: Dict[str, Dict[str, int]] = {}
+        try:
+            per_source = asyncio.run(run_sources(sources, sink))
+            for name, st in per_source.items():
+                logger.info("Źródło %s: %s", name, ", ".join(f"{k}={v}" for k, v in st.items()) or "pominięte")
+        except KeyboardInterrupt:
+            # zapis tego co w kolejce i eleganckie wyjście; reszta zostaje `pending` na następny bieg
+            logger.info("Przerwano — zapisuję oczekujące rekordy")
+            run["status"] = "interrupted"
+        finally:
+            sink.close()
+            for kind, params in frontier.take():
+                writer.put(kind, params)
+            writer.close()
+            neardup.close()
+        stats: Dict[str, int] = {}
+        for st in per_source.values():
+            for k, v in st.items():
+                stats[k] = stats.get(k, 0) + v
+        run["sources"] = per_source
+        saved_total = writer.committed["job"]
+        run["stats"] = dict(stats, saved=saved_total)
+
+    analyze(engine)
+    log_summary(engine, saved_total)
     logger.info("ETL zakończony")
+    return run["stats"]
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="ETL NoFluffJobs -> SQLite")
+    ap.add_argument("--replay", action="store_true",
+                    help="bez sieci: ponownie sparsuj strony ofert z archiwum HTML (NFJ_RAW_ARCHIVE)")
+    ap.add_argument("--archive", default=NFJ_RAW_ARCHIVE, help="katalog archiwum dla --replay")
+    ap.add_argument("--since", help="--replay: tylko strony pobrane od daty, np. 2024-05-01")
+    args = ap.parse_args()
     try:
-        main()
+        if args.replay:
+            main_replay(args.archive, args.since)
+        else:
+            main()
     except Exception:
         logger.exception("ETL failed")
         raise
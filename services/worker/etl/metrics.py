@@ -0,0 +1,252 @@
+# services/worker/etl/metrics.py
+from __future__ import annotations
+
+import os
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("etl-metrics")
+
+# Metryki biegu ETL w formacie tekstowym Prometheusa.
+# Nazwy (wszystkie z prefiksem etl_):
+#   etl_fetch_seconds{kind}            — czas żądania HTTP (listing / job), bez czekania na limiter,
+#   etl_rate_wait_seconds{kind}        — czekanie na token limitera per host,
+#   etl_http_responses_total{kind,status}, etl_fetch_bytes_total{kind},
+#   etl_fetch_errors_total{kind,error} — wyjątki sieciowe (timeout, reset...), dotąd znikały jako None,
+#   etl_cache_total{kind,result}       — fresh (bez sieci) / not_modified (304),
+#   etl_stage_seconds{stage}           — parse, enrich, normalize, neardup, upsert (transakcja partii),
+#   etl_rows_written_total{kind}, etl_*_queue_depth (gauge).
+# Plik (ETL_METRICS_FILE) nadpisywany co ETL_METRICS_INTERVAL s — pod textfile collector
+# node_exportera; ETL_METRICS_PORT > 0 wystawia dodatkowo GET /metrics na czas biegu.
+
+ETL_METRICS_FILE = os.getenv("ETL_METRICS_FILE", "data/metrics/etl.prom").strip()  # pusty = bez pliku
+ETL_METRICS_PORT = int(os.getenv("ETL_METRICS_PORT", "0"))  # 0 = bez endpointu HTTP
+ETL_METRICS_INTERVAL = float(os.getenv("ETL_METRICS_INTERVAL", "5"))
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+class Histogram:
+    """Kubełki skumulowane jak w Prometheusie + suma i liczba; kwantyle przybliżone z kubełków."""
+
+    def __init__(self, buckets: Sequence[float] = BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # ostatni = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                lo = self.buckets[i - 1] if i else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (rank - seen) / c
+            seen += c
+        return self.buckets[-1]
+
+
+class Metrics:
+    """Rejestr liczników, histogramów i gauge'y; bezpieczny dla wątków (pętla zdarzeń + Writer)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.gauges.clear()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            h = series.get(key)
+            if h is None:
+                h = series[key] = Histogram()
+            h.observe(value)
+
+    @contextmanager
+    def time(self, name: str, **labels) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t, **labels)
+
+    def gauge(self, name: str, fn: Callable[[], float]) -> None:
+        """Gauge liczony przy odczycie (np. długość kolejki)."""
+        with self._lock:
+            self.gauges[name] = fn
+
+    def value(self, name: str, **labels) -> float:
+        """Suma serii licznika pasujących do podanych etykiet (wszystkie, gdy bez etykiet)."""
+        want = set(_labels(labels))
+        with self._lock:
+            return sum(v for k, v in self.counters.get(name, {}).items() if want <= set(k))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self.counters):
+                lines.append(f"# TYPE {name} counter")
+                for key, v in sorted(self.counters[name].items()):
+                    lines.append(f"{name}{_fmt_labels(key)} {v:g}")
+            for name in sorted(self.histograms):
+                lines.append(f"# TYPE {name} histogram")
+                for key, h in sorted(self.histograms[name].items()):
+                    cum = 0
+                    for le, c in zip(list(h.buckets) + ["+Inf"], h.counts):
+                        cum += c
+                        lines.append(f"{name}_bucket{_fmt_labels(key, ('le', str(le)))} {cum}")
+                    lines.append(f"{name}_sum{_fmt_labels(key)} {h.sum:.6f}")
+                    lines.append(f"{name}_count{_fmt_labels(key)} {h.count}")
+            gauges = dict(self.gauges)
+        for name in sorted(gauges):
+            try:
+                v = float(gauges[name]())
+            except Exception:
+                continue
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {v:g}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> Dict:
+        """Zwięzły obraz biegu (do etl_runs): liczniki po etykietach i p50/p99/suma per histogram."""
+        with self._lock:
+            counters = {
+                name + _fmt_labels(key): v
+                for name, series in self.counters.items() for key, v in sorted(series.items())
+            }
+            hist = {
+                name + _fmt_labels(key): {
+                    "count": h.count, "sum": round(h.sum, 6),
+                    "p50": round(h.quantile(0.5), 6), "p99": round(h.quantile(0.99), 6),
+                }
+                for name, series in self.histograms.items() for key, h in sorted(series.items())
+            }
+        return {"counters": counters, "histograms": hist}
+
+    def write(self, path: str) -> None:
+        """Atomowo: zapis do pliku obok i rename — scraper nigdy nie widzi połowy pliku."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(p.suffix + ".tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, p)
+
+
+METRICS = Metrics()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        data = self.server.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsExporter:
+    """
+    Na czas biegu: co `interval` s zapis do `path` i/lub endpoint GET /metrics na `port`.
+    stop() zapisuje stan końcowy.
+
+        with MetricsExporter(METRICS, path="data/metrics/etl.prom", port=9108):
+            ...
+    """
+
+    def __init__(self, metrics: Metrics, path: Optional[str] = None,
+                 port: Optional[int] = None, interval: Optional[float] = None):
+        # domyślne z ENV czytane przy tworzeniu (nie przy imporcie) — łatwo podmienić w testach
+        self.metrics = metrics
+        self.path = (ETL_METRICS_FILE if path is None else path) or None
+        self.port = ETL_METRICS_PORT if port is None else port
+        self.interval = max(0.1, ETL_METRICS_INTERVAL if interval is None else interval)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _flush(self) -> None:
+        if self.path:
+            try:
+                self.metrics.write(self.path)
+            except OSError:
+                logger.warning("Nie udało się zapisać metryk do %s", self.path, exc_info=True)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._flush()
+
+    def start(self) -> "MetricsExporter":
+        if self.port:
+            self._server = ThreadingHTTPServer(("0.0.0.0", self.port), _Handler)
+            self._server.daemon_threads = True
+            self._server.metrics = self.metrics
+            threading.Thread(target=self._server.serve_forever, name="etl-metrics-http", daemon=True).start()
+            logger.info("Metryki: http://localhost:%d/metrics", self._server.server_address[1])
+        if self.path:
+            self._thread = threading.Thread(target=self._loop, name="etl-metrics", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._flush()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "MetricsExporter":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
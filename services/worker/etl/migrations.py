@@ -0,0 +1,104 @@
+# services/worker/etl/migrations.py
+from __future__ import annotations
+
+import logging
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import MetaData, Table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateTable
+
+from services.worker.etl.data_version import VERSION_DDL
+from services.worker.etl.schema import jobs_clean, jobs_table
+from services.worker.etl.search import DROP_FTS
+
+logger = logging.getLogger("etl-migrations")
+
+# Lekkie migracje schematu. create_all tworzy brakujące tabele, _add_missing_columns dokłada
+# kolumny — tutaj reszta, której ALTER TABLE w SQLite nie potrafi (typy, klucze, przenoszenie
+# danych). Numer ostatniej zastosowanej migracji: db_meta('schema_version'). Migracje idą
+# w transakcji ensure_schema — przerwana nie zostawia połowicznego schematu. Nowa baza ma
+# tabele od razu w postaci z schema.py, więc dostaje najnowszy numer bez uruchamiania migracji.
+#
+# Nowa migracja = nowa funkcja na końcu MIGRATIONS (numery rosnące, bez zmian w starych).
+
+SCHEMA_KEY = "schema_version"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[Connection], None]
+
+
+def _rebuild(conn: Connection, table: Table) -> None:
+    """
+    Przebudowa tabeli do definicji z schema.py (typy kolumn, klucz główny): nowa tabela, kopia
+    wierszy z zachowaniem rowid (jobs_fts wskazuje wiersze po rowid), podmiana nazwy.
+    Indeksy i triggery znikają razem ze starą tabelą — odtwarza je reszta ensure_schema.
+    """
+    tmp = f"_{table.name}_new"
+    conn.execute(CreateTable(table.to_metadata(MetaData(), name=tmp)))
+    cols = ", ".join(c.name for c in table.columns)
+    conn.execute(text(
+        f"INSERT OR IGNORE INTO {tmp}(rowid, {cols}) "
+        f"SELECT rowid, {cols} FROM {table.name} WHERE id IS NOT NULL ORDER BY rowid"
+    ))
+    conn.execute(text(f"DROP TABLE {table.name}"))
+    conn.execute(text(f"ALTER TABLE {tmp} RENAME TO {table.name}"))
+
+
+def typed_job_tables(conn: Connection) -> None:
+    # daty jako DATE/DATETIME, id jako PRIMARY KEY NOT NULL (zamiast osobnego UNIQUE INDEX)
+    for table in (jobs_table, jobs_clean):
+        _rebuild(conn, table)
+
+
+def dups_only_in_jobs_table(conn: Connection) -> None:
+    # jobs_table trzymała kopię KAŻDEJ oferty; kanoniczne są już w jobs_clean, zostają duplikaty
+    conn.execute(text("DELETE FROM jobs_table WHERE dup_of IS NULL AND id IN (SELECT id FROM jobs_clean)"))
+
+
+def source_index_nocase(conn: Connection) -> None:
+    # indeks source był z kolacją BINARY — filtr API porównuje COLLATE NOCASE; ensure_schema odtworzy
+    conn.execute(text("DROP INDEX IF EXISTS idx_jobs_clean_source"))
+
+
+def folded_fts(conn: Connection) -> None:
+    # jobs_fts z tekstem po _fold (ł -> l); ensure_fts tworzy go od nowa z istniejących wierszy
+    for ddl in DROP_FTS:
+        conn.execute(text(ddl))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "typed job tables", typed_job_tables),
+    Migration(2, "near-duplicates only in jobs_table", dups_only_in_jobs_table),
+    Migration(3, "case-insensitive source index", source_index_nocase),
+    Migration(4, "FTS index over folded text", folded_fts),
+]
+
+LATEST = MIGRATIONS[-1].version
+
+
+def schema_version(conn: Connection) -> int:
+    conn.execute(text(VERSION_DDL[0]))  # db_meta
+    return conn.execute(
+        text("SELECT value FROM db_meta WHERE key = :k"), {"k": SCHEMA_KEY}
+    ).scalar() or 0
+
+
+def migrate(conn: Connection, fresh: bool = False) -> List[str]:
+    """Stosuje brakujące migracje po kolei; zwraca nazwy zastosowanych. `fresh` = baza z create_all."""
+    current = schema_version(conn)
+    applied = []
+    if not fresh:
+        for m in MIGRATIONS:
+            if m.version > current:
+                logger.info("Migracja schematu %d: %s", m.version, m.name)
+                m.apply(conn)
+                applied.append(m.name)
+    conn.execute(
+        text("INSERT INTO db_meta(key, value) VALUES (:k, :v) ON CONFLICT(key) DO UPDATE SET value = excluded.value"),
+        {"k": SCHEMA_KEY, "v": max(current, LATEST)},
+    )
+    return applied
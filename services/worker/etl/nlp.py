@@ -1,25 +1,162 @@
+import os
 import re
+from typing import Dict, Iterable, List, Optional
+
+from services.common.normalize import canonical_seniority
 
 TECH_DICT = [
     "python","sql","pandas","numpy","scikit-learn","tensorflow","pytorch",
     "aws","gcp","azure","docker","kubernetes","dbt","spark","airflow",
-    "hadoop","kafka","redshift","snowflake","postgresql","mysql","git"
+    "hadoop","kafka","redshift","snowflake","postgresql","mysql","git",
+    "java","kotlin","scala","golang","rust","c++","c#",".net","javascript","typescript",
+    "node.js","react","angular","vue","django","flask","fastapi","spring",
+    "linux","bash","terraform","ansible","jenkins","gitlab","github actions","ci/cd",
+    "mongodb","redis","elasticsearch","oracle","sql server","bigquery","databricks",
+    "power bi","tableau","looker","matlab",
+    "machine learning","deep learning","nlp","computer vision","llm","mlops",
+    "rest api","graphql","microservices","rabbitmq","grpc",
+    "selenium","cypress","playwright","jira",
 ]
 
-SENIORITY_PATTERNS = [
-    (r"senior|sr\.", "Senior"),
-    (r"mid|regular", "Mid"),
-    (r"junior|entry", "Junior"),
-]
+# alias -> nazwa kanoniczna (porównanie po tokenach, wielkość liter bez znaczenia)
+SKILL_ALIASES = {
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "sklearn": "scikit-learn",
+    "torch": "pytorch",
+    "amazon web services": "aws",
+    "google cloud": "gcp",
+    "google cloud platform": "gcp",
+    "microsoft azure": "azure",
+    "apache spark": "spark",
+    "pyspark": "spark",
+    "apache airflow": "airflow",
+    "apache kafka": "kafka",
+    "go lang": "golang",
+    "js": "javascript",
+    "nodejs": "node.js",  # "node.js" / "node js" łapie sam słownik; gołe "node" to zbyt często węzeł klastra
+    "react.js": "react",
+    "reactjs": "react",
+    "vue.js": "vue",
+    "spring boot": "spring",
+    "dotnet": ".net",
+    "csharp": "c#",
+    "cpp": "c++",
+    "mssql": "sql server",
+    "ms sql": "sql server",
+    "elastic": "elasticsearch",
+    "powerbi": "power bi",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "large language models": "llm",
+    "ml ops": "mlops",
+    "gitlab ci": "gitlab",
+    "continuous integration": "ci/cd",
+    "restful": "rest api",
+    "restful api": "rest api",
+}
+
+# opcjonalny plik z dodatkowym słownikiem: "kanoniczna: alias1, alias2" w każdej linii (# = komentarz)
+NLP_SKILLS_FILE = os.getenv("NLP_SKILLS_FILE")
+
+# token = ciąg liter/cyfr (+ opcjonalne ++/#), z kropką z przodu tylko na początku słowa (.net);
+# "-", "/", "." w środku rozdzielają tokeny, więc "python-based" i "Python/SQL" też trafiają
+_TOKEN_RE = re.compile(r"(?:(?<![^\W_])\.)?[^\W_]+[+#]*")
+
+_END = ""  # klucz końca frazy w trie (żaden token nie jest pusty)
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class SkillMatcher:
+    """
+    Trie po tokenach: jeden przebieg po tekście, najdłuższe dopasowanie od każdego tokenu.
+    Koszt nie zależy od wielkości słownika (tylko od długości tekstu i najdłuższej frazy),
+    a dopasowania zawsze kończą się na granicy tokenu — "git" nie trafia w "digital".
+    """
+
+    def __init__(self, skills: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self._trie: Dict = {}
+        for s in skills:
+            self.add(s, s)
+        for alias, canonical in (aliases or {}).items():
+            self.add(alias, canonical)
+
+    def add(self, phrase: str, canonical: str) -> None:
+        node = self._trie
+        toks = _tokens(phrase)
+        if not toks:
+            return
+        for t in toks:
+            node = node.setdefault(t, {})
+        node[_END] = canonical
+
+    def extract(self, text: str) -> List[str]:
+        toks = _tokens(text or "")
+        trie = self._trie
+        found = set()
+        i, n = 0, len(toks)
+        while i < n:
+            node = trie.get(toks[i])
+            if node is None:
+                i += 1
+                continue
+            best, best_end, j = node.get(_END), i + 1, i + 1
+            while j < n:
+                node = node.get(toks[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    best, best_end = node[_END], j
+            if best is not None:
+                found.add(best)
+                i = best_end
+            else:
+                i += 1
+        return sorted(found)
+
+    def extract_many(self, texts: Iterable[str]) -> List[List[str]]:
+        extract = self.extract
+        return [extract(t) for t in texts]
+
+
+def load_skills_file(path: str) -> Dict[str, str]:
+    aliases: Dict[str, str] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            canonical, _, rest = line.partition(":")
+            canonical = canonical.strip().lower()
+            aliases[canonical] = canonical
+            for a in rest.split(","):
+                if a.strip():
+                    aliases[a.strip().lower()] = canonical
+    return aliases
+
+
+def _default_matcher() -> SkillMatcher:
+    aliases = dict(SKILL_ALIASES)
+    if NLP_SKILLS_FILE:
+        aliases.update(load_skills_file(NLP_SKILLS_FILE))
+    return SkillMatcher(TECH_DICT, aliases)
+
+
+MATCHER = _default_matcher()
+
 
 def extract_skills(text: str):
-    t = text.lower()
-    found = sorted({tech for tech in TECH_DICT if tech in t})
-    return found
+    return MATCHER.extract(text)
+
+def extract_skills_many(texts: Iterable[str]) -> List[List[str]]:
+    """Wersja wsadowa (np. cała partia ETL) — ten sam skompilowany trie."""
+    return MATCHER.extract_many(texts)
 
 def infer_seniority(text: str):
-    t = text.lower()
-    for pat, label in SENIORITY_PATTERNS:
-        if re.search(pat, t):
-            return label
-    return "Unspecified"
+    # jedna reguła dla wszystkich źródeł — patrz normalize.py
+    return canonical_seniority(text)
@@ -0,0 +1,179 @@
+# services/worker/etl/refresh.py
+from __future__ import annotations
+
+import json
+import asyncio
+import hashlib
+import datetime as dt
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+from sqlalchemy import text
+
+from services.worker.etl.crawler import AsyncFetcher
+from services.worker.etl.frontier import DONE, Frontier
+from services.worker.etl.metrics import METRICS
+
+logger = logging.getLogger("etl-refresh")
+
+# Odświeżanie już pobranych ofert w stałym budżecie żądań na bieg — zamiast wyboru między
+# „nigdy” (NFJ_SKIP_EXISTING=1) a „wszystko, za każdym razem” (=0).
+#
+# Kolejka z crawl_frontier (status done), malejąco po priorytecie:
+#   godziny od ostatniego sprawdzenia
+#   × szansa zmiany przy sprawdzeniu: (changes + 1) / (checks + 2)  (churn, wygładzenie Laplace'a)
+#   × (1 + wiek oferty w dniach / 30)                               (stare oferty częściej znikają)
+#   × 2, jeśli treść zmieniła się w ostatnim tygodniu
+#   × UNSEEN_BOOST, jeśli oferty od `unseen_hours` nie było na żadnym listingu.
+# Oferty sprawdzone niedawno (< min_age_hours) pomijamy.
+#
+# Każda oferta: najpierw HEAD (1 żądanie) — 404/410 (albo przekierowanie poza ofertę, `gone`)
+# = wygasła, ETag/Last-Modified jak poprzednio = bez zmian. Dopiero potem GET (warunkowy, jeśli
+# jest cache HTTP) i porównanie skrótu sparsowanej oferty; zmieniona idzie do zapisu jak nowa.
+# Nieobecność na listingu tylko podnosi priorytet: listingi są przycinane (NFJ_PAGES), więc
+# o wygaśnięciu decyduje odpowiedź serwisu, nie brak linku.
+
+UNSEEN_BOOST = 4.0
+GONE_STATUSES = {404, 410}
+NO_HEAD = {405, 501}  # serwer nie obsługuje HEAD -> od razu GET
+
+HASH_FIELDS = ("title", "company", "location", "seniority", "posted_at", "description")
+
+
+def content_hash(rec: Dict) -> str:
+    """Skrót treści oferty (bez znaczników czasu) — wykrywanie zmian przy odświeżaniu."""
+    payload = json.dumps([rec.get(f) for f in HASH_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def is_gone(url: str, r: httpx.Response) -> bool:
+    return r.status_code in GONE_STATUSES
+
+
+class Candidate(NamedTuple):
+    url: str
+    priority: float
+    unseen: bool
+    validator: Optional[str]
+    content_hash: Optional[str]
+
+
+_SINCE = "julianday(:now) - julianday({})"
+
+PLAN_SQL = f"""
+SELECT url, validator, content_hash, unseen,
+       hours * churn * (1.0 + MAX(age_days, 0) / 30.0)
+       * (CASE WHEN changed_days < 7 THEN 2.0 ELSE 1.0 END)
+       * (CASE WHEN unseen THEN :boost ELSE 1.0 END) AS priority
+FROM (
+    SELECT f.url, f.validator, f.content_hash,
+           24.0 * ({_SINCE.format("COALESCE(f.last_checked_at, f.last_fetched_at, f.discovered_at, :now)")}) AS hours,
+           (f.changes + 1.0) / (f.checks + 2.0) AS churn,
+           {_SINCE.format("COALESCE(j.posted_at, f.discovered_at, :now)")} AS age_days,
+           {_SINCE.format("f.last_changed_at")} AS changed_days,
+           COALESCE(f.last_seen_at, f.discovered_at, '') < :unseen_before AS unseen
+    FROM crawl_frontier f LEFT JOIN jobs_clean j ON j.id = f.url
+    WHERE f.status = :done
+      AND COALESCE(f.last_checked_at, f.last_fetched_at, '') < :checked_before
+)
+ORDER BY priority DESC, url
+LIMIT :n
+"""
+
+
+class Refresher:
+    """
+    Planuje i wykonuje odświeżenie w budżecie `budget` żądań (HEAD + GET liczone osobno).
+    Wyniki: zmieniona oferta -> `await emit(url, rec)` (jak z crawla), reszta -> frontier
+    (checked / expire; trafia do Writer-a razem z resztą bufora frontiera).
+    """
+
+    def __init__(self, frontier: Frontier, budget: int = 200, min_age_hours: float = 6.0,
+                 unseen_hours: float = 48.0):
+        self.frontier = frontier
+        self.budget = max(0, budget)
+        self.min_age_hours = min_age_hours
+        self.unseen_hours = unseen_hours
+
+    def plan(self, now: Optional[dt.datetime] = None) -> List[Candidate]:
+        now = now or dt.datetime.now()
+        iso = lambda t: t.isoformat(timespec="seconds")
+        params = {
+            "now": iso(now), "done": DONE, "boost": UNSEEN_BOOST, "n": self.budget,
+            "unseen_before": iso(now - dt.timedelta(hours=self.unseen_hours)),
+            "checked_before": iso(now - dt.timedelta(hours=self.min_age_hours)),
+        }
+        with self.frontier.engine.begin() as conn:
+            rows = conn.execute(text(PLAN_SQL), params).all()
+        return [Candidate(r.url, r.priority or 0.0, bool(r.unseen), r.validator, r.content_hash) for r in rows]
+
+    async def run(
+        self,
+        fetcher: AsyncFetcher,
+        parse: Callable[[str, str], Dict],
+        emit: Callable[[str, Optional[Dict]], Awaitable[None]],
+        gone: Callable[[str, httpx.Response], bool] = is_gone,
+        concurrency: int = 8,
+    ) -> Dict[str, int]:
+        # zapytanie planu po całym crawl_frontier w wątku — nie wstrzymuje pobrań w locie (ani AIMD)
+        plan = await asyncio.to_thread(self.plan) if self.budget else []
+        stats: Counter = Counter(planned=len(plan), unseen=sum(c.unseen for c in plan))
+        left = [self.budget]
+
+        def spend() -> bool:
+            if left[0] <= 0:
+                return False
+            left[0] -= 1
+            stats["requests"] += 1
+            return True
+
+        def result(name: str) -> None:
+            stats[name] += 1
+            METRICS.inc("etl_refresh_total", result=name)
+
+        async def one(c: Candidate) -> None:
+            if not spend():
+                return
+            r = await fetcher.probe(c.url)
+            if r is None:
+                return result("error")
+            if gone(c.url, r):
+                self.frontier.expire(c.url)
+                return result("expired")
+            validator = r.headers.get("ETag") or r.headers.get("Last-Modified")
+            if r.status_code not in NO_HEAD:
+                if r.status_code != 200:
+                    return result("error")
+                if validator and validator == c.validator:
+                    self.frontier.checked(c.url, validator=validator)
+                    return result("unchanged")
+            if not spend():
+                return result("deferred")
+            html = await fetcher.get_text(c.url, revalidate=True)  # świeży wpis cache nie zastąpi sieci
+            try:
+                rec = parse(c.url, html) if html else None
+            except Exception:
+                rec = None
+            if not rec or not rec.get("title"):
+                return result("error")
+            h = content_hash(rec)
+            if h != c.content_hash:
+                await emit(c.url, rec)  # zapis jak z crawla; brak poprzedniego skrótu = tylko punkt odniesienia
+            changed = c.content_hash is not None and h != c.content_hash
+            self.frontier.checked(c.url, changed=changed, content_hash=h, validator=validator)
+            result("changed" if changed else "unchanged")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for c in plan:
+            queue.put_nowait(c)
+
+        async def worker():
+            while not queue.empty() and left[0] > 0:
+                await one(queue.get_nowait())
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+        if plan:
+            logger.info("Odświeżanie: %s", ", ".join(f"{k}={v}" for k, v in sorted(stats.items())))
+        return {f"refresh_{k}": v for k, v in stats.items()}
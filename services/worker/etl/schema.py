@@ -1,29 +1,144 @@
 # services/worker/etl/schema.py
 from __future__ import annotations
-from sqlalchemy import MetaData, Table, Column, String
+from sqlalchemy import (
+    MetaData, Table, Column, String, Integer, Float, Date, DateTime, LargeBinary, Text, Index, func, literal_column,
+)
 
 metadata = MetaData()
 
+# Typy kolumn: daty jako DATE / DATETIME (w SQLite tekst ISO — porządek leksykograficzny = chronologiczny,
+# działają date()/julianday()), liczby jako INTEGER. Zmiana typu/klucza istniejącej tabeli = migracja
+# w migrations.py (create_all nie zmienia istniejących tabel).
+
+# oferty będące prawie-duplikatami (dup_of) — każda oferta jest w dokładnie jednej z tabel
+# jobs_table / jobs_clean; całość pobranych ofert: widok jobs_all (JOBS_ALL_DDL)
 jobs_table = Table(
     "jobs_table", metadata,
-    Column("id", String),
+    Column("id", String, primary_key=True),
     Column("title", String),
     Column("company", String),
     Column("location", String),
     Column("seniority", String),
     Column("url", String),
-    Column("posted_at", String),
+    Column("posted_at", Date),
     Column("source", String),
+    Column("skills", String),
+    Column("city", String),
+    Column("remote", Integer),
+    Column("updated_at", DateTime),
+    Column("expired_at", DateTime),  # oferta zniknęła z serwisu (refresh.py); NULL = aktywna
+    Column("dup_of", String),  # id oferty kanonicznej (w jobs_clean)
 )
 
 jobs_clean = Table(
     "jobs_clean", metadata,
-    Column("id", String),
+    Column("id", String, primary_key=True),  # rowid zostaje — jobs_fts wskazuje wiersze po rowid
     Column("title", String),
     Column("company", String),
     Column("location", String),
     Column("seniority", String),
     Column("url", String),
-    Column("posted_at", String),
+    Column("posted_at", Date),  # "YYYY-MM-DD"
     Column("source", String),
+    Column("skills", String),  # "python,sql,..." — indeksowane w jobs_fts
+    # kolumny kanoniczne z normalize.py — filtry API/dashboardu to równości po indeksach
+    Column("city", String),     # "poznan" (bez polskich znaków), NULL = brak miasta
+    Column("remote", Integer),  # 1 = zdalnie; NULL = wiersz jeszcze nieznormalizowany
+    Column("updated_at", DateTime),  # ostatnia ZMIANA treści przez ETL (ISO) — eksport przyrostowy since=
+    Column("expired_at", DateTime),  # oferta zniknęła z serwisu; API/dashboard domyślnie pomijają
+    Index("idx_jobs_clean_location", "location"),
+    Index("idx_jobs_clean_posted", "posted_at"),
+    Index("idx_jobs_clean_seniority", "seniority"),
+    Index("idx_jobs_clean_city", "city"),
+    Index("idx_jobs_clean_remote", "remote"),
+    Index("idx_jobs_clean_updated", "updated_at"),
+    Index("idx_jobs_clean_expired", "expired_at"),
+)
+
+# filtr API source= bez względu na wielkość liter ("NoFluffJobs(HTML)" / "nofluffjobs(html)") — ta sama kolacja co w zapytaniu
+Index("idx_jobs_clean_source", jobs_clean.c.source.collate("NOCASE"))
+# kolejność "od najnowszych" w API (keyset po (posted_at, id)) i dashboardzie — to samo wyrażenie w zapytaniach
+Index("idx_jobs_clean_recent", func.coalesce(jobs_clean.c.posted_at, literal_column("''")), jobs_clean.c.id)
+
+# skille ofert w postaci znormalizowanej (utrzymywane triggerami z jobs_clean.skills)
+job_skills = Table(
+    "job_skills", metadata,
+    Column("job_id", String, primary_key=True),
+    Column("skill", String, primary_key=True),
+    Index("idx_job_skills_skill", "skill", "job_id"),
+    sqlite_with_rowid=False,
+)
+
+# wszystkie pobrane oferty (kanoniczne + prawie-duplikaty); odtwarzany w ensure_schema,
+# więc nadąża za kolumnami dokładanymi do obu tabel
+_JOBS_ALL_COLS = ", ".join(c.name for c in jobs_clean.columns)
+JOBS_ALL_DDL = (
+    f"CREATE VIEW jobs_all AS SELECT {_JOBS_ALL_COLS}, NULL AS dup_of FROM jobs_clean "
+    f"UNION ALL SELECT {_JOBS_ALL_COLS}, dup_of FROM jobs_table"
+)
+
+# podpisy MinHash (dedup.py) i kubełki LSH — nowa partia porównywana tylko z kubełkami
+job_minhash = Table(
+    "job_minhash", metadata,
+    Column("job_id", String, primary_key=True),
+    Column("sig", LargeBinary, nullable=False),
+    Column("feats", Text, nullable=False),  # JSON z cechami — dokładny Jaccard kandydatów
+    sqlite_with_rowid=False,
+)
+
+lsh_buckets = Table(
+    "lsh_buckets", metadata,
+    Column("band", Integer, primary_key=True),
+    Column("bucket", Integer, primary_key=True),
+    Column("job_id", String, primary_key=True),
+    Index("idx_lsh_buckets_job", "job_id"),
+    sqlite_with_rowid=False,
+)
+
+# stan crawla: co odkryto, co pobrano, ile prób — pozwala wznowić przerwany bieg;
+# kolumny last_seen_at.. to historia odświeżania pobranych ofert (refresh.py)
+crawl_frontier = Table(
+    "crawl_frontier", metadata,
+    Column("url", String, primary_key=True),
+    Column("discovered_at", DateTime),
+    Column("status", String, nullable=False, server_default="pending"),  # pending | done | failed | expired
+    Column("attempts", Integer, nullable=False, server_default="0"),
+    Column("last_fetched_at", DateTime),
+    Column("last_seen_at", DateTime),     # ostatnio widziana na listingu
+    Column("last_checked_at", DateTime),  # ostatnie sprawdzenie przez refresh (HEAD / GET)
+    Column("last_changed_at", DateTime),  # ostatnia wykryta zmiana treści
+    Column("checks", Integer, nullable=False, server_default="0"),
+    Column("changes", Integer, nullable=False, server_default="0"),
+    Column("content_hash", String),       # skrót sparsowanej oferty (refresh.content_hash)
+    Column("validator", String),          # ETag / Last-Modified z ostatniej odpowiedzi
+    Column("expired_at", DateTime),
+    Index("idx_crawl_frontier_status", "status"),
+)
+
+# stan przyrostowy źródeł (np. jj_apify: ostatni dataset i offset), JSON; zapisywany przez Writer
+# po rekordach, których dotyczy — crash nie przesuwa stanu przed zapisem ofert
+source_state = Table(
+    "source_state", metadata,
+    Column("source", String, primary_key=True),
+    Column("state", Text, nullable=False),
+    Column("updated_at", DateTime),
+)
+
+# jeden wiersz na bieg ETL (main / --replay): wynik, czasy i metryki — porównanie biegów bez logów
+etl_runs = Table(
+    "etl_runs", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("mode", String, nullable=False),    # crawl | resume | replay
+    Column("status", String, nullable=False),  # ok | interrupted | failed
+    Column("started_at", DateTime, nullable=False),
+    Column("finished_at", DateTime),
+    Column("seconds", Float),
+    Column("discovered", Integer),
+    Column("fetched", Integer),
+    Column("saved", Integer),
+    Column("duplicates", Integer),
+    Column("http_errors", Integer),   # odpowiedzi inne niż 200/304
+    Column("fetch_errors", Integer),  # wyjątki sieciowe
+    Column("bytes", Integer),
+    Column("metrics", Text),          # JSON: Metrics.summary()
 )
@@ -0,0 +1,62 @@
+# services/worker/etl/search.py
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Indeks pełnotekstowy FTS5 nad jobs_clean. unicode61 + remove_diacritics=2 zdejmuje znaki
+# diakrytyczne (ą, ś, ó, ź...), ale „ł” nie jest literą z ogonkiem, tylko osobną literą —
+# dlatego triggery wkładają do indeksu tekst z ł/Ł -> l/L (_fold), a zapytania przechodzą
+# przez normalize.fold. Razem to ta sama postać co fold: "Lodz" trafia "Łódź" i odwrotnie.
+# Indeks jest bezkontekstowy (content=''): trzyma tylko tokeny złożonego tekstu, treść
+# oferty czyta się z jobs_clean po rowid. Triggery utrzymują go przy każdym
+# INSERT/UPSERT/DELETE, niezależnie od ścieżki zapisu.
+
+FTS_COLUMNS = ["title", "company", "location", "skills"]
+
+
+def _fold(expr: str) -> str:
+    return f"replace(replace({expr}, 'ł', 'l'), 'Ł', 'L')"
+
+
+_COLS = ", ".join(FTS_COLUMNS)
+_NEW = ", ".join(_fold(f"new.{c}") for c in FTS_COLUMNS)
+_OLD = ", ".join(_fold(f"old.{c}") for c in FTS_COLUMNS)
+
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+        {_COLS}, content='', tokenize='unicode61 remove_diacritics 2')""",
+    f"""CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs_clean BEGIN
+        INSERT INTO jobs_fts(rowid, {_COLS}) VALUES (new.rowid, {_NEW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs_clean BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, {_COLS}) VALUES ('delete', old.rowid, {_OLD});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS jobs_fts_au AFTER UPDATE OF {_COLS} ON jobs_clean BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, {_COLS}) VALUES ('delete', old.rowid, {_OLD});
+        INSERT INTO jobs_fts(rowid, {_COLS}) VALUES (new.rowid, {_NEW});
+    END""",
+]
+
+# stary jobs_fts (external content z niezłożonym tekstem) — migracja usuwa, ensure_fts odbudowuje
+DROP_FTS = [
+    "DROP TRIGGER IF EXISTS jobs_fts_ai",
+    "DROP TRIGGER IF EXISTS jobs_fts_ad",
+    "DROP TRIGGER IF EXISTS jobs_fts_au",
+    "DROP TABLE IF EXISTS jobs_fts",
+]
+
+
+def ensure_fts(conn: Connection) -> bool:
+    """Tworzy jobs_fts + triggery; przy pierwszym utworzeniu indeksuje istniejące wiersze."""
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_fts'"
+    )).first()
+    for ddl in FTS_DDL:
+        conn.execute(text(ddl))
+    if not exists:
+        conn.execute(text(
+            f"INSERT INTO jobs_fts(rowid, {_COLS}) SELECT rowid, "
+            + ", ".join(_fold(c) for c in FTS_COLUMNS) + " FROM jobs_clean"
+        ))
+    return not exists
@@ -0,0 +1,131 @@
+# services/worker/etl/skill_stats.py
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Tabele pochodne od jobs_clean.skills ("python,sql,..." — wypełnia ETL przez nlp.extract_skills):
+# - job_skills(job_id, skill): relacja do filtrów po skillach (indeks w obie strony),
+# - skill_counts(skill, day, n), gdzie day = dzień posted_at: trendy z ostatnich N dni
+#   to SUM(n) po dniach — bez skanu jobs_clean i bez pandas.
+# Triggery na jobs_clean utrzymują obie przy INSERT / zmianie skills lub posted_at / DELETE.
+# skill_counts liczy tylko oferty aktywne (expired_at IS NULL): wygaśnięcie oferty to dla licznika
+# jak DELETE, powrót na listing — jak INSERT. job_skills trzyma wszystkie (filtr robi API na jobs_clean).
+# W triggerach nie ma CTE, więc listę rozbijamy przez json_each na tablicy sklejonej ze stringa.
+
+
+def _skills_json(col: str) -> str:
+    return f"""'["' || replace(replace({col}, '"', ''), ',', '","') || '"]'"""
+
+
+def _day(col: str) -> str:
+    return f"substr(COALESCE({col}, ''), 1, 10)"
+
+
+def _inc(prefix: str) -> str:
+    return f"""
+        INSERT INTO skill_counts(skill, day, n)
+        SELECT DISTINCT trim(value), {_day(prefix + '.posted_at')}, 1
+        FROM json_each({_skills_json(prefix + '.skills')})
+        WHERE trim(value) != '' AND {prefix}.expired_at IS NULL
+        ON CONFLICT(skill, day) DO UPDATE SET n = n + 1;"""
+
+
+def _dec(prefix: str) -> str:
+    return f"""
+        UPDATE skill_counts SET n = n - 1
+        WHERE {prefix}.expired_at IS NULL AND day = {_day(prefix + '.posted_at')}
+          AND skill IN (SELECT trim(value) FROM json_each({_skills_json(prefix + '.skills')}));
+        DELETE FROM skill_counts WHERE n <= 0;"""
+
+
+def _link(prefix: str) -> str:
+    return f"""
+        INSERT OR IGNORE INTO job_skills(job_id, skill)
+        SELECT {prefix}.id, trim(value)
+        FROM json_each({_skills_json(prefix + '.skills')})
+        WHERE trim(value) != '';"""
+
+
+JOB_SKILLS_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS job_skills_ai AFTER INSERT ON jobs_clean
+        WHEN COALESCE(new.skills, '') != '' BEGIN {_link('new')}
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS job_skills_ad AFTER DELETE ON jobs_clean BEGIN
+        DELETE FROM job_skills WHERE job_id = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS job_skills_au AFTER UPDATE OF skills ON jobs_clean
+        WHEN COALESCE(old.skills, '') IS NOT COALESCE(new.skills, '') BEGIN
+        DELETE FROM job_skills WHERE job_id = old.id;
+        {_link('new')}
+    END""",
+]
+
+SKILL_STATS_DDL = [
+    """CREATE TABLE IF NOT EXISTS skill_counts (
+        skill TEXT NOT NULL,
+        day   TEXT NOT NULL,
+        n     INTEGER NOT NULL,
+        PRIMARY KEY (skill, day)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_skill_counts_day ON skill_counts(day)",
+    f"""CREATE TRIGGER IF NOT EXISTS skill_counts_ai AFTER INSERT ON jobs_clean
+        WHEN COALESCE(new.skills, '') != '' AND new.expired_at IS NULL BEGIN {_inc('new')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS skill_counts_ad AFTER DELETE ON jobs_clean
+        WHEN COALESCE(old.skills, '') != '' AND old.expired_at IS NULL BEGIN {_dec('old')}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS skill_counts_au AFTER UPDATE OF skills, posted_at, expired_at ON jobs_clean
+        WHEN COALESCE(old.skills, '') IS NOT COALESCE(new.skills, '')
+          OR {_day('old.posted_at')} IS NOT {_day('new.posted_at')}
+          OR (old.expired_at IS NULL) != (new.expired_at IS NULL) BEGIN
+        {_dec('old')}
+        {_inc('new')}
+    END""",
+]
+
+
+def rebuild_job_skills(conn: Connection) -> None:
+    conn.execute(text("DELETE FROM job_skills"))
+    conn.execute(text(f"""
+        INSERT OR IGNORE INTO job_skills(job_id, skill)
+        SELECT j.id, trim(s.value)
+        FROM jobs_clean j, json_each({_skills_json('j.skills')}) s
+        WHERE COALESCE(j.skills, '') != '' AND trim(s.value) != ''
+    """))
+
+
+def rebuild_skill_counts(conn: Connection) -> None:
+    conn.execute(text("DELETE FROM skill_counts"))
+    conn.execute(text(f"""
+        INSERT INTO skill_counts(skill, day, n)
+        SELECT trim(s.value), {_day('j.posted_at')}, COUNT(*)
+        FROM jobs_clean j, json_each({_skills_json('j.skills')}) s
+        WHERE COALESCE(j.skills, '') != '' AND trim(s.value) != '' AND j.expired_at IS NULL
+        GROUP BY 1, 2
+    """))
+
+
+def ensure_skill_stats(conn: Connection) -> bool:
+    """
+    Tworzy triggery job_skills i skill_counts (+ tabelę liczników); przy pierwszym
+    utworzeniu przelicza stan z jobs_clean. Tabela job_skills pochodzi z schema.py.
+    """
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'job_skills_ai'"
+    )).first()
+    # triggery sprzed expired_at liczyły też wygasłe oferty — wymiana i przeliczenie liczników
+    old = conn.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'skill_counts_ai'"
+    )).scalar()
+    outdated = old is not None and "expired_at" not in old
+    if outdated:
+        for name in ("skill_counts_ai", "skill_counts_ad", "skill_counts_au"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+    for ddl in JOB_SKILLS_DDL + SKILL_STATS_DDL:
+        conn.execute(text(ddl))
+    if not exists:
+        rebuild_job_skills(conn)
+    if not exists or outdated:
+        rebuild_skill_counts(conn)
+    return not exists
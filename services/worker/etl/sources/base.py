@@ -0,0 +1,125 @@
+# services/worker/etl/sources/base.py
+from __future__ import annotations
+
+import abc
+import json
+import datetime as dt
+from typing import Callable, Dict, List, Optional, Sequence, Type
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Wspólny interfejs źródeł ofert.
+# Źródło (Source) strumieniuje rekordy przez sink: await sink.admit(url) — czy pobierać (frontier),
+# await sink.emit(url, rec) — wynik (rec=None: nieudane pobranie; czeka, gdy zapis nie nadąża).
+# Rekord po finalize() ma zawsze te same pola (RECORD_FIELDS), niezależnie od kształtu danych
+# źródła; resztę (skille, normalizacja, dedup, zapis) robi jeden wspólny etap w main (Writer).
+# Nowe źródło: klasa z @register("nazwa") w module z sources/ + import w main.
+# Źródło przyrostowe czyta swój stan przez sink.state(nazwa) i przesuwa go sink.checkpoint(...)
+# (await) PO wyemitowaniu rekordów, których dotyczy (tabela source_state, zapis w kolejce Writer-a).
+
+RECORD_FIELDS = ("id", "title", "company", "location", "seniority", "url", "posted_at", "source",
+                 "description", "skills")
+
+
+def finalize(rec: Optional[Dict], source: str) -> Optional[Dict]:
+    """Rekord źródła -> wspólny kształt; bez id albo tytułu -> None (nie zapisujemy)."""
+    if not rec or not rec.get("id") or not rec.get("title"):
+        return None
+    out = {f: rec.get(f) for f in RECORD_FIELDS}
+    out["id"] = str(out["id"])
+    if not out["url"] and out["id"].startswith("http"):
+        out["url"] = out["id"]
+    out["posted_at"] = out["posted_at"] or dt.date.today().isoformat()
+    out["source"] = out["source"] or source
+    out["company"] = out["company"] or "Unknown"
+    out["description"] = out["description"] or ""
+    return out
+
+
+STATE_SQL = (
+    "INSERT INTO source_state(source, state, updated_at) VALUES (:source, :state, :ts) "
+    "ON CONFLICT(source) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at"
+)
+
+
+def load_state(engine: Engine, source: str) -> Dict:
+    with engine.begin() as conn:
+        raw = conn.execute(text("SELECT state FROM source_state WHERE source = :s"), {"s": source}).scalar()
+    return json.loads(raw) if raw else {}
+
+
+def state_params(source: str, state: Dict) -> Dict:
+    """Parametry STATE_SQL (dla Writer.put / executemany)."""
+    return {"source": source, "state": json.dumps(state, sort_keys=True),
+            "ts": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds")}
+
+
+class RecordSink:
+    """To, co runner daje źródłom. Domyślnie: wszystko wpuszczamy, wyniki i stan trzymamy w pamięci."""
+
+    def __init__(self):
+        self.records: List[Dict] = []
+        self.states: Dict[str, Dict] = {}
+
+    async def admit(self, url: str) -> bool:
+        return True
+
+    async def emit(self, url: str, rec: Optional[Dict]) -> None:
+        if rec is not None:
+            self.records.append(rec)
+
+    def state(self, source: str) -> Dict:
+        """Zapamiętany stan przyrostowy źródła ({} przy pierwszym biegu)."""
+        return dict(self.states.get(source) or {})
+
+    async def checkpoint(self, source: str, state: Dict) -> None:
+        self.states[source] = dict(state)
+
+    async def sync(self) -> None:
+        """Bariera przed odczytem bazy przez źródło: wszystko wyemitowane dotąd jest już zapisane."""
+
+
+class Source(abc.ABC):
+    """
+    Bazowe źródło. `run(sink)` to korutyna — runner odpala wszystkie źródła naraz
+    w jednej pętli zdarzeń; każde ma własnego klienta HTTP i własne limity.
+    Klasa bez `run` nie da się utworzyć (TypeError już w build_sources, nie w połowie biegu).
+    Źródło blokujące (requests) robi swoje w wątku (asyncio.to_thread).
+    Zwraca statystyki biegu (discovered / fetched / ...).
+    """
+
+    name = "source"
+
+    def unavailable(self) -> Optional[str]:
+        """Powód, dla którego źródła nie da się uruchomić (np. brak tokenu), albo None."""
+        return None
+
+    @abc.abstractmethod
+    async def run(self, sink: RecordSink) -> Dict[str, int]:
+        ...
+
+
+REGISTRY: Dict[str, Type[Source]] = {}
+
+
+def register(name: str) -> Callable[[Type[Source]], Type[Source]]:
+    def deco(cls: Type[Source]) -> Type[Source]:
+        cls.name = name
+        REGISTRY[name] = cls
+        return cls
+    return deco
+
+
+def parse_names(spec: str) -> List[str]:
+    """"nofluff, jj_apify" -> ["nofluff", "jj_apify"]; nieznana nazwa -> ValueError."""
+    names = [n.strip() for n in (spec or "").split(",") if n.strip()]
+    unknown = [n for n in names if n not in REGISTRY]
+    if unknown:
+        raise ValueError(f"unknown source(s): {', '.join(unknown)} (known: {', '.join(sorted(REGISTRY))})")
+    return list(dict.fromkeys(names))
+
+
+def build_sources(names: Sequence[str], **options: Dict) -> List[Source]:
+    """Instancje źródeł; `options[nazwa]` = kwargs konstruktora danego źródła."""
+    return [REGISTRY[n](**options.get(n, {})) for n in names]
@@ -1,3 +1,8 @@
+from typing import Dict
+
+from services.worker.etl.sources.base import RecordSink, Source, finalize, register
+
+
 def fetch_jobs():
     # Demo source returning a few fake postings
     return [
@@ -26,3 +31,14 @@ def fetch_jobs():
             "source": "demo"
         }
     ]
+
+
+@register("dummy")
+class DummySource(Source):
+    """Kilka stałych ofert — do sprawdzenia całej ścieżki zapisu bez sieci."""
+
+    async def run(self, sink: RecordSink) -> Dict[str, int]:
+        recs = [finalize(r, "demo") for r in fetch_jobs()]
+        for rec in recs:
+            await sink.emit(rec["id"], rec)
+        return {"discovered": len(recs), "fetched": len(recs)}
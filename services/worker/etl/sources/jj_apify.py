@@ -1,16 +1,24 @@
 # services/worker/etl/sources/jj_apify.py
-import os, requests
-from typing import List, Dict
+import os, asyncio, logging, requests
+from typing import List, Dict, Iterator, Optional, Tuple
 from dotenv import load_dotenv
+
+from services.worker.etl.metrics import METRICS
+from services.worker.etl.sources.base import RecordSink, Source, finalize, register
+
 load_dotenv()
 
+logger = logging.getLogger("etl-jj")
+
 APIFY_TOKEN = os.getenv("APIFY_TOKEN")
 ACTOR_ID    = os.getenv("APIFY_ACTOR_ID")  # np. "piotrv1001~just-join-it-scraper"
+APIFY_BASE  = os.getenv("APIFY_BASE_URL", "https://api.apify.com").rstrip("/")
+JJ_PAGE_SIZE = int(os.getenv("JJ_PAGE_SIZE", "500"))  # elementów datasetu na żądanie
 
-def _norm_location(rec: dict) -> str:
+def _location(rec: dict) -> str:
+    # surowe miasto albo typ pracy (remote/hybrid/office) — kanonizuje normalize.normalize_batch
     city = (rec.get("city") or "").strip()
-    wt   = (rec.get("workplace_type") or "").strip()  # remote/hybrid/office
-    return city or (wt.title() if wt else "Unspecified")
+    return city or (rec.get("workplace_type") or "").strip()
 
 def _skills(rec: dict) -> str:
     names = []
@@ -21,56 +29,129 @@ def _skills(rec: dict) -> str:
             names.append(s.lower())
     return ",".join(sorted(set(names)))
 
-def _seniority(rec: dict) -> str:
-    exp = (rec.get("experience") or rec.get("experience_level") or "").lower()
-    if "junior" in exp: return "Junior"
-    if "senior" in exp or "sr" in exp: return "Senior"
-    if "mid" in exp or "regular" in exp: return "Mid"
-    return "Unspecified"
+def map_item(rec: dict) -> Optional[Dict]:
+    """Element datasetu aktora JJ -> rekord w kształcie wspólnym (sources.base.RECORD_FIELDS)."""
+    job_id = str(rec.get("id") or rec.get("slug") or rec.get("uuid") or "").strip()
+    title  = (rec.get("title") or rec.get("position") or "").strip()
+    company = (rec.get("company_name") or rec.get("company") or "Unknown").strip()
+    desc = rec.get("body") or rec.get("description") or ""
+    skills = _skills(rec)
+    if skills:
+        desc = f"{desc}\nSkills: {skills}"
+    slug = rec.get("slug")
+    url = rec.get("url") or (f"https://justjoin.it/job-offer/{slug}" if slug else None)
+    published = rec.get("published_at") or rec.get("publishedAt") or ""
+    return finalize({
+        "id": job_id,
+        "title": title,
+        "company": company,
+        "location": _location(rec),
+        "description": desc,
+        "source": "justjoin",
+        "seniority": rec.get("experience") or rec.get("experience_level"),
+        "url": url,
+        "posted_at": str(published)[:10] or None,
+    }, "justjoin")
+
+def _raise_for_status(r: requests.Response) -> None:
+    METRICS.inc("etl_http_responses_total", kind="jj", status=r.status_code)
+    r.raise_for_status()
+
+def latest_dataset(session: requests.Session) -> str:
+    """datasetId OSTATNIEGO udanego runu aktora — nie uruchamia nowego runu."""
+    r = session.get(f"{APIFY_BASE}/v2/acts/{ACTOR_ID}/runs/last",
+                    params={"token": APIFY_TOKEN, "status": "SUCCEEDED"}, timeout=30)
+    _raise_for_status(r)
+    ds_id = (r.json().get("data") or {}).get("defaultDatasetId")
+    if not ds_id:
+        raise RuntimeError(f"No successful run or dataset found for actor {ACTOR_ID}")
+    return ds_id
+
+def fetch_page(session: requests.Session, ds_id: str, offset: int, limit: int) -> List[Dict]:
+    """
+    Jedna strona datasetu (offset/limit), surowa — w pamięci najwyżej `limit` elementów.
+    Bez clean=true: Apify stosuje offset/limit PRZED pominięciem pustych elementów, więc
+    z clean strona bywa krótsza niż limit w środku datasetu, a offset po liczbie zwróconych
+    elementów rozjeżdża się z pozycją w datasecie. Czyścimy po naszej stronie (_clean).
+    """
+    r = session.get(f"{APIFY_BASE}/v2/datasets/{ds_id}/items",
+                    params={"token": APIFY_TOKEN, "offset": str(offset), "limit": str(limit)},
+                    timeout=60)
+    _raise_for_status(r)
+    METRICS.inc("etl_fetch_bytes_total", len(r.content), kind="jj")
+    return r.json()
+
+def _clean(item: Dict) -> Optional[Dict]:
+    """To, co robi clean=true Apify: bez pól ukrytych ("#...") i bez pustych elementów."""
+    item = {k: v for k, v in item.items() if not k.startswith("#")} if isinstance(item, dict) else {}
+    return item or None
 
-def fetch_jobs(limit: int = 200, query: str = None) -> List[Dict]:
+def iter_pages(session: requests.Session, ds_id: str, offset: int = 0,
+               limit: Optional[int] = None, page_size: Optional[int] = None) -> Iterator[Tuple[int, List[Dict]]]:
     """
-    Pobiera oferty z OSTATNIEGO udanego runu aktora JJ na Apify.
-    Szybkie i stabilne: nie uruchamia nowego runu.
+    (offset w datasecie po stronie, niepuste elementy strony) strona po stronie; offset i `limit`
+    liczone w surowych elementach datasetu, koniec na niepełnej stronie albo po `limit` elementach.
+    """
+    page_size = max(1, page_size or JJ_PAGE_SIZE)
+    left = limit if limit is not None else float("inf")
+    while left > 0:
+        n = int(min(page_size, left))
+        raw = fetch_page(session, ds_id, offset, n)
+        offset += len(raw)
+        left -= len(raw)
+        if raw:
+            yield offset, [it for it in map(_clean, raw) if it]
+        if len(raw) < n:
+            return
+
+def fetch_jobs(limit: int = 200, query: str = None) -> Iterator[Dict]:
+    """
+    Oferty z ostatniego udanego runu aktora JJ, od początku datasetu — generator,
+    pobiera stronami (JJ_PAGE_SIZE) na jednej sesji HTTP.
     """
     assert APIFY_TOKEN, "Missing APIFY_TOKEN in .env"
     assert ACTOR_ID,    "Missing APIFY_ACTOR_ID in .env"
+    with requests.Session() as session:
+        ds_id = latest_dataset(session)
+        for _, items in iter_pages(session, ds_id, limit=limit):
+            yield from (r for r in map(map_item, items) if r)
 
-    # 1) Weź ostatni udany run, żeby zdobyć datasetId
-    run_url = f"https://api.apify.com/v2/acts/{ACTOR_ID}/runs/last"
-    params  = {"token": APIFY_TOKEN, "status": "SUCCEEDED"}
-    r = requests.get(run_url, params=params, timeout=30)
-    r.raise_for_status()
-    data = r.json().get("data") or {}
-    ds_id = data.get("defaultDatasetId")
-    if not ds_id:
-        raise RuntimeError(f"No successful run or dataset found for actor {ACTOR_ID}")
 
-    # 2) Pobierz elementy datasetu (z limitem)
-    items_url = f"https://api.apify.com/v2/datasets/{ds_id}/items"
-    params = {"token": APIFY_TOKEN, "clean": "true", "limit": str(limit)}
-    r = requests.get(items_url, params=params, timeout=60)
-    r.raise_for_status()
-    items = r.json()
-
-    out: List[Dict] = []
-    for rec in items:
-        job_id = str(rec.get("id") or rec.get("slug") or rec.get("uuid") or "").strip()
-        title  = (rec.get("title") or rec.get("position") or "").strip()
-        company = (rec.get("company_name") or rec.get("company") or "Unknown").strip()
-        desc = rec.get("body") or rec.get("description") or ""
-        skills = _skills(rec)
-        if skills:
-            desc = f"{desc}\nSkills: {skills}"
-        if not (job_id and title):
-            continue
-        out.append({
-            "id": job_id,
-            "title": title,
-            "company": company,
-            "location": _norm_location(rec),
-            "description": desc,
-            "source": "justjoin",
-            "seniority": _seniority(rec),
-        })
-    return out
+@register("jj_apify")
+class JustJoinSource(Source):
+    """
+    JustJoin.it z datasetu Apify, przyrostowo: stan {dataset, offset} w source_state.
+    Ten sam dataset -> tylko elementy za zapamiętanym offsetem; nowy run aktora -> od zera.
+    Blokujące requests (jedna sesja) w wątku, strona po stronie; rekordy emitowane
+    w pętli zdarzeń, checkpoint po każdej stronie.
+    """
+
+    def __init__(self, limit: Optional[int] = 200, page_size: Optional[int] = None):
+        self.limit = limit or None  # 0 / None = cała reszta datasetu
+        self.page_size = page_size
+
+    def unavailable(self) -> Optional[str]:
+        if not (APIFY_TOKEN and ACTOR_ID):
+            return "brak APIFY_TOKEN / APIFY_ACTOR_ID"
+        return None
+
+    async def run(self, sink: RecordSink) -> Dict[str, int]:
+        stats = {"discovered": 0, "fetched": 0}
+        state = sink.state(self.name)
+        with requests.Session() as session:
+            ds_id = await asyncio.to_thread(latest_dataset, session)
+            offset = state.get("offset", 0) if state.get("dataset") == ds_id else 0
+            if offset:
+                logger.info("JJ: dataset %s, wznawiam od elementu %d", ds_id, offset)
+            pages = iter_pages(session, ds_id, offset, self.limit, self.page_size)
+            while True:
+                page = await asyncio.to_thread(next, pages, None)
+                if page is None:
+                    break
+                offset, items = page
+                stats["discovered"] += len(items)
+                for rec in filter(None, map(map_item, items)):
+                    stats["fetched"] += 1
+                    await sink.emit(rec["url"] or rec["id"], rec)
+                await sink.checkpoint(self.name, {"dataset": ds_id, "offset": offset})
+        return stats
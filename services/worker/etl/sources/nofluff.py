@@ -3,15 +3,26 @@ from __future__ import annotations
 
 import os
 import re
-import json
 import time
+import asyncio
+import logging
 import datetime as dt
-from typing import List, Dict, Optional, Iterable, Set
+from typing import Awaitable, Callable, List, Dict, Optional, Iterable, Set, AsyncIterable, AsyncIterator, Union
 
 import requests
 
+from services.worker.etl.archive import RawArchive
+from services.worker.etl.crawler import AsyncFetcher, AdaptiveConcurrency, RetryPolicy
+from services.worker.etl.httpcache import HttpCache
+from services.worker.etl.metrics import METRICS
+from services.worker.etl.refresh import GONE_STATUSES, Refresher
+from services.worker.etl.sources.base import RecordSink, Source, register
+from services.worker.etl.sources.nofluff_parser import NFJ_BASE, parse_job_fields, extract_job_links
+
 SOURCE_NAME = "NoFluffJobs(HTML)"
 
+logger = logging.getLogger("etl-nfj")
+
 # ===== Konfiguracja (ENV) =====
 NFJ_COUNTRY     = os.getenv("NFJ_COUNTRY", "pl").strip()  # "pl" | "en"
 NFJ_REMOTE      = os.getenv("NFJ_REMOTE", "1") == "1"     # dołóż /remote/...
@@ -19,6 +30,21 @@ NFJ_PAGES       = int(os.getenv("NFJ_PAGES", "12"))       # głębokość pagina
 NFJ_DELAY       = float(os.getenv("NFJ_DELAY", "0.6"))    # throttle per HTTP (sek.)
 NFJ_ALL_LISTINGS= os.getenv("NFJ_ALL_LISTINGS", "1") == "1"  # root /{country}?page=...
 NFJ_HARD_LIMIT  = int(os.getenv("NFJ_HARD_LIMIT", "20000"))  # bezpiecznik
+NFJ_BURST       = int(os.getenv("NFJ_BURST", "2"))        # ile żądań „na zapas” w token buckecie
+NFJ_CONNECTIONS = int(os.getenv("NFJ_CONNECTIONS", "16")) # pula połączeń keep-alive (tryb async)
+NFJ_LISTING_CONCURRENCY = int(os.getenv("NFJ_LISTING_CONCURRENCY", "4"))  # ile listingów stronicujemy naraz
+NFJ_URL_QUEUE   = int(os.getenv("NFJ_URL_QUEUE", "500"))  # bufor discovery -> pobieranie ofert
+NFJ_HTTP_CACHE  = os.getenv("NFJ_HTTP_CACHE", "data/http_cache.db").strip()  # pusty = bez cache
+NFJ_CACHE_TTL   = float(os.getenv("NFJ_CACHE_TTL", "21600"))       # świeżość strony oferty (sek.)
+NFJ_CACHE_TTL_LISTING = float(os.getenv("NFJ_CACHE_TTL_LISTING", "0"))  # listingi: zawsze rewalidacja
+NFJ_RAW_ARCHIVE = os.getenv("NFJ_RAW_ARCHIVE", "data/raw_archive").strip()  # pusty = bez archiwum HTML
+NFJ_ARCHIVE_SEGMENT_MB = int(os.getenv("NFJ_ARCHIVE_SEGMENT_MB", "256"))  # rozmiar segmentu archiwum
+NFJ_RETRIES     = int(os.getenv("NFJ_RETRIES", "3"))          # ponowienia 429/5xx/timeoutów
+NFJ_BACKOFF     = float(os.getenv("NFJ_BACKOFF", "0.5"))      # baza backoffu wykładniczego (sek.)
+NFJ_BACKOFF_MAX = float(os.getenv("NFJ_BACKOFF_MAX", "30"))   # sufit pojedynczego backoffu
+NFJ_RETRY_AFTER_MAX = float(os.getenv("NFJ_RETRY_AFTER_MAX", "120"))  # dłuższe Retry-After przycinamy
+NFJ_AIMD        = os.getenv("NFJ_AIMD", "1") == "1"           # adaptacyjny limit żądań w locie
+NFJ_MIN_CONCURRENCY = int(os.getenv("NFJ_MIN_CONCURRENCY", "2"))
 
 # fallback kategorii, gdyby auto-discovery nic nie znalazł
 DEFAULT_CATEGORIES = [
@@ -32,55 +58,91 @@ USER_AGENT = os.getenv(
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome Safari"
 )
 
-# ===== Heurystyki seniority =====
-_JUN = re.compile(r"\b(junior|intern|trainee|student|jr)\b", re.I)
-_SEN = re.compile(r"\b(senior|lead|principal|staff|expert|architect|sr)\b", re.I)
-_MID = re.compile(r"\b(mid|middle|regular)\b", re.I)
-_REMOTE_HINT = re.compile(r"\b(remote|zdaln\w*|home\s*office|hybryd\w*)\b", re.I)
-
-def _sen_from_title(title: str) -> str:
-    t = (title or "")
-    if _JUN.search(t): return "Junior"
-    if _SEN.search(t): return "Senior"
-    if _MID.search(t): return "Mid"
-    return "Mid"
-
-# ===== RegEx do linków i kategorii =====
-_LIST_JOB_LINK_RE        = re.compile(r'href="(/(?:en|pl)/job/[^"]+)"', re.I)
-_LIST_JOB_LINK_DATAHREF  = re.compile(r'data-href="(/(?:en|pl)/job/[^"]+)"', re.I)
-_LIST_JOB_LINK_ABS_RE    = re.compile(r'href="(https://nofluffjobs\.com/(?:en|pl)/job/[^"]+)"', re.I)
-_ANY_JOB_URL_RE          = re.compile(r'https://nofluffjobs\.com/(?:en|pl)/job/[^"\'<>\s]+', re.I)
+# ===== RegEx do kategorii (linki ofert: nofluff_parser.extract_job_links) =====
 _CAT_SLUG_RE             = re.compile(r'href="/(?:en|pl)/([a-z0-9\-]+)"', re.I)
 
-def _normalize_job_url(u: str) -> str:
-    return u if u.startswith("http") else f"https://nofluffjobs.com{u}"
+HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept-Language": "pl,en;q=0.9",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+def page_kind(url: str) -> str:
+    return "job" if "/job/" in url else "listing"
+
+def _cache_ttl(url: str) -> float:
+    return NFJ_CACHE_TTL if page_kind(url) == "job" else NFJ_CACHE_TTL_LISTING
+
+HTTP_CACHE: Optional[HttpCache] = HttpCache(NFJ_HTTP_CACHE, ttl=_cache_ttl) if NFJ_HTTP_CACHE else None
+
+# każda strona pobrana z sieci (oferty i listingi) -> archiwum do ponownego parsowania (main --replay)
+RAW_ARCHIVE: Optional[RawArchive] = (
+    RawArchive(NFJ_RAW_ARCHIVE, classify=page_kind, segment_bytes=NFJ_ARCHIVE_SEGMENT_MB << 20)
+    if NFJ_RAW_ARCHIVE else None
+)
+
+RETRY = RetryPolicy(NFJ_RETRIES, base=NFJ_BACKOFF, cap=NFJ_BACKOFF_MAX, max_retry_after=NFJ_RETRY_AFTER_MAX)
+
+def make_fetcher(max_concurrency: int = NFJ_CONNECTIONS) -> AsyncFetcher:
+    """
+    Współdzielony klient async dla NFJ. NFJ_DELAY przekłada się na budżet
+    1/NFJ_DELAY żądań/s na host (ten sam „grzecznościowy” odstęp co w trybie sync) — to sufit;
+    429 go obniża, udane żądania przywracają. Liczbę żądań w locie (do `max_concurrency`,
+    nie więcej niż pula NFJ_CONNECTIONS) dobiera AIMD z opóźnień i błędów.
+    """
+    rate = 1.0 / NFJ_DELAY if NFJ_DELAY > 0 else 1000.0
+    # powyżej puli żądania czekają na połączenie w httpx — AIMD mierzyłby kolejkę, nie serwer
+    max_concurrency = max(1, min(max_concurrency, NFJ_CONNECTIONS))
+    concurrency = AdaptiveConcurrency(
+        initial=max(NFJ_MIN_CONCURRENCY, max_concurrency // 4),
+        minimum=NFJ_MIN_CONCURRENCY, maximum=max_concurrency,
+    ) if NFJ_AIMD else None
+    return AsyncFetcher(
+        rate=rate, burst=NFJ_BURST, max_connections=NFJ_CONNECTIONS, headers=HEADERS, cache=HTTP_CACHE,
+        archive=RAW_ARCHIVE, metrics=METRICS, classify=page_kind, retry=RETRY, concurrency=concurrency,
+    )
 
 def _safe_get(url: str, timeout: int = 30) -> Optional[str]:
-    try:
-        r = requests.get(
-            url,
-            timeout=timeout,
-            headers={
-                "User-Agent": USER_AGENT,
-                "Accept-Language": "pl,en;q=0.9",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Cache-Control": "no-cache",
-            },
-        )
-        if r.status_code != 200:
-            return None
-        return r.text
-    except Exception:
+    """Wersja sync AsyncFetcher.get_text (z tymi samymi ponowieniami); porażki trafiają do METRICS."""
+    kind = page_kind(url)
+    entry = HTTP_CACHE.lookup(url) if HTTP_CACHE else None
+    if entry is not None and HTTP_CACHE.is_fresh(url, entry):
+        METRICS.inc("etl_cache_total", kind=kind, result="fresh")
+        return entry.body
+    r = None
+    for attempt in range(RETRY.retries + 1):
+        if attempt:
+            METRICS.inc("etl_retries_total", kind=kind, reason=str(r.status_code) if r is not None else "transport")
+            time.sleep(RETRY.delay(attempt - 1, r.headers if r is not None else None))
+        t0 = time.perf_counter()
+        try:
+            r = requests.get(url, timeout=timeout, headers={**HEADERS, **HttpCache.conditional_headers(entry)})
+        except requests.RequestException as e:
+            METRICS.inc("etl_fetch_errors_total", kind=kind, error=type(e).__name__)
+            r = None
+            continue
+        METRICS.observe("etl_fetch_seconds", time.perf_counter() - t0, kind=kind)
+        METRICS.inc("etl_http_responses_total", kind=kind, status=r.status_code)
+        METRICS.inc("etl_fetch_bytes_total", len(r.content), kind=kind)
+        if r.status_code not in RETRY.statuses:
+            break
+    if r is None:
         return None
+    if r.status_code == 304 and entry is not None:
+        METRICS.inc("etl_cache_total", kind=kind, result="not_modified")
+        HTTP_CACHE.touch(url)
+        body = entry.body
+    elif r.status_code != 200:
+        return None
+    else:
+        body = r.text
+        if HTTP_CACHE:
+            HTTP_CACHE.store(url, body, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+    if RAW_ARCHIVE:
+        RAW_ARCHIVE.put(url, body)
+    return body
 
-def _discover_categories(country: str) -> List[str]:
-    base = f"https://nofluffjobs.com/{country}"
-    htmls = []
-    for path in ("", "/remote"):
-        h = _safe_get(base + path)
-        if h: htmls.append(h)
-        time.sleep(NFJ_DELAY)
-
+def _categories_from_html(htmls: List[str]) -> List[str]:
     slugs: Set[str] = set()
     for h in htmls:
         for m in _CAT_SLUG_RE.finditer(h):
@@ -91,79 +153,136 @@ def _discover_categories(country: str) -> List[str]:
     slugs = {s for s in slugs if len(s) >= 2 and all(ch.isalnum() or ch == "-" for ch in s)}
     return sorted(slugs) or DEFAULT_CATEGORIES
 
-def _extract_links_from_listing(html: str) -> List[str]:
-    links = []
-    for m in _LIST_JOB_LINK_RE.finditer(html):
-        links.append(_normalize_job_url(m.group(1)))
-    for m in _LIST_JOB_LINK_DATAHREF.finditer(html):
-        links.append(_normalize_job_url(m.group(1)))
-    for m in _LIST_JOB_LINK_ABS_RE.finditer(html):
-        links.append(_normalize_job_url(m.group(1)))
-    for m in _ANY_JOB_URL_RE.finditer(html):
-        links.append(_normalize_job_url(m.group(0)))
-
-    seen: Set[str] = set()
+def _discover_categories(country: str) -> List[str]:
+    base = f"{NFJ_BASE}/{country}"
+    htmls = []
+    for path in ("", "/remote"):
+        h = _safe_get(base + path)
+        if h: htmls.append(h)
+        time.sleep(NFJ_DELAY)
+    return _categories_from_html(htmls)
+
+async def _discover_categories_async(fetcher: AsyncFetcher, country: str) -> List[str]:
+    base = f"{NFJ_BASE}/{country}"
+    htmls = await asyncio.gather(*(fetcher.get_text(base + path) for path in ("", "/remote")))
+    return _categories_from_html([h for h in htmls if h])
+
+def _countries() -> List[str]:
+    countries = [NFJ_COUNTRY]
+    if NFJ_COUNTRY.lower() != "en":
+        countries.append("en")
+    return countries
+
+def _listing_bases(country: str, cats: List[str]) -> List[str]:
+    """
+    Wszystkie „strumienie” listingów dla kraju (bez ?page=): kategorie,
+    /remote/kategorie oraz root i /remote. Każdy stronicujemy osobno.
+    """
+    base = f"{NFJ_BASE}/{country}"
     out = []
-    for u in links:
-        if u not in seen:
-            seen.add(u)
-            out.append(u)
+    for cat in cats:
+        out.append(f"{base}/{cat}")
+        if NFJ_REMOTE:
+            out.append(f"{base}/remote/{cat}")
+    if NFJ_ALL_LISTINGS:
+        out.append(base)
+        if NFJ_REMOTE:
+            out.append(f"{base}/remote")
     return out
 
 def iter_job_urls(limit: Optional[int] = None) -> Iterable[str]:
     """
     Generator URL-i ofert (PL + opcjonalnie EN, kategorie + root + /remote).
     Yielduje na bieżąco, żeby main mógł od razu zaczynać pobieranie i zapisy.
+    Paginacja strumienia kończy się na pierwszej stronie bez linków nowych dla TEGO strumienia
+    (pusta albo powtórzona — NFJ za ostatnią stroną oddaje ją ponownie). Strumienie się pokrywają
+    (/remote/kat ⊂ /kat, root zawiera wszystko), więc globalny zbiór tylko odsiewa duplikaty
+    przy emisji — inaczej pierwsza strona roota, znana już z kategorii, ucinałaby głębsze strony.
     """
-    countries = [NFJ_COUNTRY]
-    if NFJ_COUNTRY.lower() != "en":
-        countries.append("en")
-
     seen_urls: Set[str] = set()
     yielded = 0
     lim = min(limit or NFJ_HARD_LIMIT, NFJ_HARD_LIMIT)
 
-    for country in countries:
-        base = "https://nofluffjobs.com"
-        cats = _discover_categories(country)
-        # kategorie
-        for cat in cats:
+    for country in _countries():
+        for lst in _listing_bases(country, _discover_categories(country)):
+            in_stream: Set[str] = set()
             for p in range(1, NFJ_PAGES + 1):
-                lst = f"{base}/{country}/{cat}?page={p}"
-                html = _safe_get(lst); time.sleep(NFJ_DELAY)
+                html = _safe_get(f"{lst}?page={p}"); time.sleep(NFJ_DELAY)
                 if not html: continue
-                for u in _extract_links_from_listing(html):
-                    if u not in seen_urls:
-                        seen_urls.add(u); yield u; yielded += 1
-                        if yielded >= lim: return
-            if NFJ_REMOTE:
-                for p in range(1, NFJ_PAGES + 1):
-                    lst = f"{base}/{country}/remote/{cat}?page={p}"
-                    html = _safe_get(lst); time.sleep(NFJ_DELAY)
-                    if not html: continue
-                    for u in _extract_links_from_listing(html):
-                        if u not in seen_urls:
-                            seen_urls.add(u); yield u; yielded += 1
-                            if yielded >= lim: return
-        # root listingi
-        if NFJ_ALL_LISTINGS:
+                fresh = [u for u in extract_job_links(html) if u not in in_stream]
+                if not fresh: break
+                in_stream.update(fresh)
+                for u in fresh:
+                    if u in seen_urls: continue
+                    seen_urls.add(u); yield u; yielded += 1
+                    if yielded >= lim: return
+
+async def iter_job_urls_async(
+    fetcher: AsyncFetcher,
+    limit: Optional[int] = None,
+    concurrency: int = NFJ_LISTING_CONCURRENCY,
+) -> AsyncIterator[str]:
+    """
+    To samo co iter_job_urls, ale listingi pobiera `concurrency` korutyn naraz
+    (każda stronicuje jeden strumień). Nowe URL-e przechodzą przez ograniczoną
+    kolejkę, więc pobieranie ofert rusza od pierwszej strony listingu,
+    a wolny konsument hamuje discovery zamiast puchnąć pamięć.
+    """
+    lim = min(limit or NFJ_HARD_LIMIT, NFJ_HARD_LIMIT)
+    seen_urls: Set[str] = set()
+    found: asyncio.Queue = asyncio.Queue(maxsize=NFJ_URL_QUEUE)
+    streams: asyncio.Queue = asyncio.Queue()
+
+    async def seed(country: str):
+        for lst in _listing_bases(country, await _discover_categories_async(fetcher, country)):
+            streams.put_nowait(lst)
+
+    async def walk():
+        while True:
+            try:
+                lst = streams.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            in_stream: Set[str] = set()  # koniec strumienia — jak w iter_job_urls
             for p in range(1, NFJ_PAGES + 1):
-                lst = f"{base}/{country}?page={p}"
-                html = _safe_get(lst); time.sleep(NFJ_DELAY)
+                html = await fetcher.get_text(f"{lst}?page={p}")
                 if not html: continue
-                for u in _extract_links_from_listing(html):
-                    if u not in seen_urls:
-                        seen_urls.add(u); yield u; yielded += 1
-                        if yielded >= lim: return
-            if NFJ_REMOTE:
-                for p in range(1, NFJ_PAGES + 1):
-                    lst = f"{base}/{country}/remote?page={p}"
-                    html = _safe_get(lst); time.sleep(NFJ_DELAY)
-                    if not html: continue
-                    for u in _extract_links_from_listing(html):
-                        if u not in seen_urls:
-                            seen_urls.add(u); yield u; yielded += 1
-                            if yielded >= lim: return
+                fresh = [u for u in extract_job_links(html) if u not in in_stream]
+                if not fresh: break
+                in_stream.update(fresh)
+                for u in fresh:
+                    if u in seen_urls: continue
+                    seen_urls.add(u)
+                    await found.put(u)
+
+    errors: List[BaseException] = []
+
+    async def run():
+        walkers: List[asyncio.Task] = []
+        try:
+            await asyncio.gather(*(seed(c) for c in _countries()))
+            walkers = [asyncio.create_task(walk()) for _ in range(max(1, concurrency))]
+            await asyncio.gather(*walkers)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            for w in walkers:
+                w.cancel()
+        await found.put(None)  # koniec discovery (przy cancel tu nie dochodzimy)
+
+    task = asyncio.create_task(run())
+    try:
+        yielded = 0
+        while yielded < lim:
+            u = await found.get()
+            if u is None:
+                if errors:
+                    raise errors[0]
+                break
+            yield u
+            yielded += 1
+    finally:
+        task.cancel()
 
 def fetch_job(url: str) -> Optional[Dict]:
     """
@@ -173,76 +292,128 @@ def fetch_job(url: str) -> Optional[Dict]:
     time.sleep(NFJ_DELAY)
     if not html:
         return None
+    with METRICS.time("etl_stage_seconds", stage="parse"):
+        return parse_job(url, html)
 
-    # JSON-LD JobPosting
-    job = None
-    for m in re.finditer(r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>', html, flags=re.S|re.I):
-        raw = m.group(1).strip()
-        try:
-            data = json.loads(raw)
-        except Exception:
-            continue
-
-        def pick(d):
-            nonlocal job
-            if isinstance(d, dict) and d.get("@type") == "JobPosting":
-                job = d
-
-        if isinstance(data, dict):
-            if data.get("@type") == "JobPosting":
-                job = data
-            elif "@graph" in data and isinstance(data["@graph"], list):
-                for d in data["@graph"]:
-                    pick(d)
-        elif isinstance(data, list):
-            for d in data:
-                pick(d)
-        if job:
-            break
-
-    title = ""
-    company = ""
-    location = ""
-    posted = None
-
-    if job:
-        title = job.get("title") or ""
-        hiring = job.get("hiringOrganization") or {}
-        if isinstance(hiring, dict):
-            company = hiring.get("name") or ""
-        locobj = job.get("jobLocation")
-        addr = {}
-        if isinstance(locobj, list) and locobj:
-            addr = locobj[0].get("address", {}) or {}
-        elif isinstance(locobj, dict):
-            addr = (locobj.get("address", {}) or {})
-        location = addr.get("addressLocality") or addr.get("addressRegion") or addr.get("addressCountry") or ""
-        posted = job.get("datePosted") or job.get("validFrom")
-
-    # fallbacki
-    if not location:
-        if _REMOTE_HINT.search(html) or _REMOTE_HINT.search(title or ""):
-            location = "Zdalnie"
-    if not title:
-        mt = re.search(r"<title>(.*?)</title>", html, re.S|re.I)
-        if mt: title = mt.group(1).split("|")[0].strip()
-    if not company:
-        mco = re.search(r'"hiringOrganization"\s*:\s*{[^}]*"name"\s*:\s*"([^"]+)"', html)
-        if mco: company = mco.group(1)
-    if not location:
-        mx = re.search(r'"addressLocality"\s*:\s*"([^"]+)"', html)
-        if mx: location = mx.group(1)
-
-    if not location:
-        location = "Nie podano"
+async def fetch_job_async(fetcher: AsyncFetcher, url: str) -> Optional[Dict]:
+    """
+    Wersja async: throttling robi limiter per host w `fetcher`, bez time.sleep.
+    """
+    html = await fetcher.get_text(url)
+    if not html:
+        return None
+    with METRICS.time("etl_stage_seconds", stage="parse"):
+        return parse_job(url, html)
 
+def parse_job(url: str, html: str, fetched_on: Optional[str] = None) -> Dict:
+    """
+    HTML strony oferty -> rekord. Bez daty publikacji na stronie: `fetched_on`
+    (dzień pobrania, przy ponownym parsowaniu z archiwum), a domyślnie dziś.
+    """
+    f = parse_job_fields(html)
     return {
         "id": url,
-        "title": title,
-        "company": company,
-        "location": location,
-        "seniority": _sen_from_title(title),
+        "title": f["title"],
+        "company": f["company"],
+        "location": f["location"],
+        "seniority": None,  # z tytułu, w normalize.normalize_batch
         "url": url,
-        "posted_at": posted or dt.date.today().isoformat(),
+        "posted_at": f["posted_at"] or fetched_on or dt.date.today().isoformat(),
         "source": SOURCE_NAME,
+        "description": f["description"],
     }
+
+async def crawl(
+    on_record: Callable[[str, Optional[Dict]], Awaitable[None]],
+    admit: Optional[Callable[[str], Awaitable[bool]]] = None,
+    urls: Optional[Union[Iterable[str], AsyncIterable[str]]] = None,
+    limit: Optional[int] = None,
+    concurrency: int = 32,
+) -> Dict[str, int]:
+    """
+    Pipeline producent/konsument na wspólnym kliencie HTTP:
+    discovery listingów (albo gotowa lista `urls`, np. wznowienie z frontiera — wtedy
+    asynchroniczna, Frontier.aiter_pending) -> ograniczona kolejka URL-i -> pula korutyn pobierających oferty.
+    Pobieranie startuje od pierwszego znalezionego URL-a; każdy wynik (również None)
+    trafia do `await on_record(url, rec)` — wolny zapis wstrzymuje tylko pobierające korutyny.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, concurrency) * 2)
+    stats = {"discovered": 0, "skipped": 0, "fetched": 0}
+    METRICS.gauge("etl_url_queue_depth", queue.qsize)
+
+    async with make_fetcher(max(1, concurrency)) as fetcher:
+        async def producer():
+            async def source():
+                if urls is None:
+                    async for u in iter_job_urls_async(fetcher, limit=limit):
+                        yield u
+                elif hasattr(urls, "__aiter__"):
+                    async for u in urls:
+                        yield u
+                else:
+                    for u in urls:
+                        yield u
+
+            try:
+                async for u in source():
+                    stats["discovered"] += 1
+                    if admit is not None and not await admit(u):
+                        stats["skipped"] += 1
+                        continue
+                    await queue.put(u)
+            except Exception:
+                logger.exception("Discovery przerwane błędem — dokańczam pobrane URL-e")
+            for _ in range(max(1, concurrency)):
+                await queue.put(None)
+
+        async def worker():
+            while True:
+                u = await queue.get()
+                if u is None:
+                    return
+                try:
+                    rec = await fetch_job_async(fetcher, u)
+                except Exception:
+                    rec = None
+                stats["fetched"] += 1
+                await on_record(u, rec)
+
+        tasks = [asyncio.create_task(producer())]
+        tasks += [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+    return stats
+
+def job_gone(url: str, r) -> bool:
+    """Oferta zdjęta: 404/410 albo przekierowanie poza stronę oferty (np. na listing)."""
+    if r.status_code in GONE_STATUSES:
+        return True
+    return bool(r.history) and "/job/" not in r.url.path
+
+@register("nofluff")
+class NoFluffSource(Source):
+    """
+    Crawl HTML NFJ: discovery listingów -> frontier (sink.admit) -> pobieranie ofert,
+    potem (opcjonalnie) odświeżenie znanych ofert w budżecie `refresh`.
+    `urls` = gotowa lista do pobrania (wznowienie z frontiera) zamiast discovery.
+    """
+
+    def __init__(self, limit: Optional[int] = None, concurrency: int = 32,
+                 urls: Optional[Union[Iterable[str], AsyncIterable[str]]] = None, refresh: Optional[Refresher] = None):
+        self.limit = limit
+        self.concurrency = concurrency
+        self.urls = urls
+        self.refresh = refresh
+
+    async def run(self, sink: RecordSink) -> Dict[str, int]:
+        admit = sink.admit if self.urls is None else None
+        stats = await crawl(sink.emit, admit=admit, urls=self.urls, limit=self.limit, concurrency=self.concurrency)
+        if self.refresh is not None:
+            await sink.sync()  # plan odświeżania czyta last_seen_at zapisane przez discovery
+            async with make_fetcher(max(1, self.concurrency)) as fetcher:
+                stats.update(await self.refresh.run(fetcher, parse_job, sink.emit, gone=job_gone,
+                                                    concurrency=max(1, self.concurrency)))
+        return stats
@@ -0,0 +1,141 @@
+# services/worker/etl/sources/nofluff_parser.py
+from __future__ import annotations
+
+import os
+import re
+import json
+from typing import Dict, List, Optional, Tuple
+
+# Parser strony oferty NFJ.
+# Jeden przebieg po dokumencie: szukamy tylko otwarć <script type="application/ld+json">,
+# blok bez „JobPosting” pomijamy bez json.loads, a na pierwszym trafieniu kończymy.
+# Fallbacki (regexy) działają już wyłącznie na wyciętym regionie — bloku JobPosting
+# i <head> — przez pos/endpos, bez kopiowania całego HTML.
+
+_LD_OPEN_RE   = re.compile(r'<script[^>]+type="application/ld\+json"[^>]*>', re.I)
+_SCRIPT_CLOSE = re.compile(r'</script\s*>', re.I)
+_TITLE_RE     = re.compile(r"<title[^>]*>(.*?)</title>", re.S | re.I)
+_HEAD_END_RE  = re.compile(r"</head\s*>", re.I)
+_LD_TITLE_RE  = re.compile(r'"title"\s*:\s*"([^"]+)"')
+_COMPANY_RE   = re.compile(r'"hiringOrganization"\s*:\s*{[^}]*"name"\s*:\s*"([^"]+)"')
+_LOCALITY_RE  = re.compile(r'"addressLocality"\s*:\s*"([^"]+)"')
+_REMOTE_HINT  = re.compile(r"\b(remote|zdaln\w*|home\s*office|hybryd\w*|telecommute)\b", re.I)
+
+# Linki do ofert na listingu — jeden regex na wszystkie formy:
+# href="/pl/job/..", data-href="/pl/job/.." (kończy się na href="), href="https://nofluffjobs.com/..",
+# oraz gołe absolutne URL-e (np. w stanie aplikacji). Grupa 1 = sama ścieżka, bez ?query i #fragmentu.
+_JOB_LINK_RE  = re.compile(r'(?:href="|https://(?:www\.)?nofluffjobs\.com)(/(?:en|pl)/job/[^"\'<>\s?#]+)', re.I)
+NFJ_BASE      = os.getenv("NFJ_BASE_URL", "https://nofluffjobs.com").rstrip("/")  # inny np. dla bench/nfj_server.py
+
+
+def _pick_job_posting(data) -> Optional[Dict]:
+    if isinstance(data, dict):
+        if data.get("@type") == "JobPosting":
+            return data
+        graph = data.get("@graph")
+        if isinstance(graph, list):
+            data = graph
+    if isinstance(data, list):
+        for d in data:
+            if isinstance(d, dict) and d.get("@type") == "JobPosting":
+                return d
+    return None
+
+
+def find_job_posting(html: str) -> Tuple[Optional[Dict], Optional[Tuple[int, int]]]:
+    """
+    Zwraca (JobPosting albo None, (start, end) bloku z JobPosting albo None).
+    Region jest zwracany także gdy JSON jest uszkodzony — wtedy fallbacki mają gdzie szukać.
+    """
+    pos = 0
+    while True:
+        m = _LD_OPEN_RE.search(html, pos)
+        if m is None:
+            return None, None
+        start = m.end()
+        close = _SCRIPT_CLOSE.search(html, start)
+        end = close.start() if close else len(html)
+        pos = close.end() if close else len(html)
+
+        if html.find("JobPosting", start, end) < 0:
+            continue
+        try:
+            job = _pick_job_posting(json.loads(html[start:end]))
+        except ValueError:
+            job = None
+        return job, (start, end)
+
+
+def extract_job_links(html: str) -> List[str]:
+    """
+    Kanoniczne URL-e ofert z listingu, w kolejności wystąpienia, bez duplikatów.
+    /pl/job/x, /pl/job/x?foo, /pl/job/x#a, /pl/job/x/ i https://nofluffjobs.com/pl/job/x -> jeden URL.
+    """
+    seen: Dict[str, None] = {}
+    for m in _JOB_LINK_RE.finditer(html):
+        path = m.group(1).rstrip("/")
+        if path not in seen:
+            seen[path] = None
+    return [NFJ_BASE + p for p in seen]
+
+
+def _address(job: Dict) -> Dict:
+    locobj = job.get("jobLocation")
+    if isinstance(locobj, list) and locobj:
+        locobj = locobj[0]
+    if isinstance(locobj, dict):
+        return locobj.get("address") or {}
+    return {}
+
+
+def parse_job_fields(html: str) -> Dict[str, Optional[str]]:
+    """
+    Minimalne pola oferty: title, company, location, posted_at (None, jeśli brak)
+    + description (opis/skille z JobPosting, tylko do ekstrakcji skilli — nie trafia do bazy).
+    """
+    job, region = find_job_posting(html)
+    title = company = location = description = ""
+    posted = None
+
+    if job:
+        title = job.get("title") or ""
+        hiring = job.get("hiringOrganization") or {}
+        if isinstance(hiring, dict):
+            company = hiring.get("name") or ""
+        addr = _address(job)
+        if isinstance(addr, dict):
+            location = addr.get("addressLocality") or addr.get("addressRegion") or addr.get("addressCountry") or ""
+        posted = job.get("datePosted") or job.get("validFrom")
+        description = " ".join(x for x in (job.get("description"), job.get("skills")) if isinstance(x, str))
+        if not location and job.get("jobLocationType") == "TELECOMMUTE":
+            location = "Zdalnie"
+
+    # fallbacki — tylko na regionie JobPosting (np. uszkodzony JSON)
+    if region is not None:
+        rs, re_ = region
+        if not title:
+            mti = _LD_TITLE_RE.search(html, rs, re_)
+            if mti: title = mti.group(1)
+        if not company:
+            mco = _COMPANY_RE.search(html, rs, re_)
+            if mco: company = mco.group(1)
+        if not location:
+            mx = _LOCALITY_RE.search(html, rs, re_)
+            if mx: location = mx.group(1)
+
+    if not title:
+        mh = _HEAD_END_RE.search(html)
+        mt = _TITLE_RE.search(html, 0, mh.start() if mh else len(html))
+        if mt: title = mt.group(1).split("|")[0].strip()
+
+    if not location:
+        if _REMOTE_HINT.search(title) or (region is not None and _REMOTE_HINT.search(html, *region)):
+            location = "Zdalnie"
+
+    return {
+        "title": title,
+        "company": company,
+        "location": location or "Nie podano",
+        "posted_at": posted,
+        "description": description,
+    }
@@ -0,0 +1,190 @@
+# services/worker/etl/writer.py
+from __future__ import annotations
+
+import time
+import queue
+import logging
+import sqlite3
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+from services.worker.etl.metrics import Metrics
+
+logger = logging.getLogger("etl-writer")
+
+# WAL: czytelnicy (API, dashboard) nie blokują zapisu i odwrotnie;
+# synchronous=NORMAL w WAL nie grozi uszkodzeniem bazy, a oszczędza fsync na każdym commicie.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",  # 64 MiB
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=10000",
+)
+
+_STOP = object()
+_SYNC = object()
+
+
+class Writer(threading.Thread):
+    """
+    Jedyny wątek piszący do SQLite w trakcie biegu ETL.
+
+    Producent woła put(kind, params) — kolejka jest ograniczona, więc gdy zapis
+    nie nadąża, producent czeka (backpressure). Wątek zbiera partię i commituje ją,
+    gdy uzbiera się `batch_size` rekordów `count_kind` albo minie `max_delay` sekund
+    od pierwszego elementu partii. Każdy rodzaj (`kind`) ma listę gotowych zapytań
+    wykonywanych przez executemany, w kolejności z `statements`, w jednej transakcji.
+    `prepare[kind]` (opcjonalnie) dostaje całą listę parametrów danego rodzaju tuż przed
+    zapisem — miejsce na etapy wsadowe (np. normalizacja) zamiast pracy per rekord.
+    `metrics`: czas transakcji partii (etl_stage_seconds{stage="upsert"}) i zapisane wiersze per rodzaj.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        statements: Dict[str, Sequence[str]],
+        batch_size: int = 150,
+        max_delay: float = 2.0,
+        queue_size: int = 1000,
+        count_kind: Optional[str] = None,
+        on_commit: Optional[Callable[[Dict[str, List[dict]]], None]] = None,
+        prepare: Optional[Dict[str, Callable[[List[dict]], List[dict]]]] = None,
+        metrics: Optional[Metrics] = None,
+    ):
+        super().__init__(name="etl-writer", daemon=True)
+        self.db_path = db_path
+        self.statements = {k: list(v) for k, v in statements.items()}
+        self.batch_size = max(1, batch_size)
+        self.max_delay = max_delay
+        self.count_kind = count_kind
+        self.on_commit = on_commit
+        self.prepare = dict(prepare or {})
+        self.metrics = metrics or Metrics()
+        self.committed: Dict[str, int] = {k: 0 for k in self.statements}
+        self.error: Optional[BaseException] = None
+        self._q: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+
+    # ===== strona producenta =====
+    def put(self, kind: str, params: dict) -> None:
+        if kind not in self.statements and kind is not _SYNC:
+            raise KeyError(f"unknown writer kind: {kind}")
+        while True:
+            if self.error is not None:
+                raise RuntimeError("writer thread failed") from self.error
+            try:
+                self._q.put((kind, params), timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def qsize(self) -> int:
+        return self._q.qsize()
+
+    def sync(self, timeout: Optional[float] = None) -> bool:
+        """
+        Bariera: czeka, aż wszystko wrzucone wcześniej będzie zatwierdzone (commit bieżącej partii).
+        Dla producenta, który zaraz czyta bazę i musi zobaczyć własne zapisy. False = minął timeout.
+        """
+        if not self.is_alive():
+            return self.error is None
+        done = threading.Event()
+        self.put(_SYNC, done)
+        waited = 0.0
+        while not done.wait(0.5):  # wątek, który padł przed obsłużeniem znacznika, go nie ustawi
+            waited += 0.5
+            if not self.is_alive() or (timeout is not None and waited >= timeout):
+                break
+        return done.is_set() and self.error is None
+
+    def close(self) -> None:
+        """Zapisuje resztę kolejki i kończy wątek; błąd z wątku jest rzucany tutaj."""
+        if self.is_alive():
+            self._q.put(_STOP)
+            self.join()
+        if self.error is not None:
+            raise RuntimeError("writer thread failed") from self.error
+
+    def __enter__(self) -> "Writer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ===== wątek =====
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.db_path, check_same_thread=False)
+        for p in PRAGMAS:
+            con.execute(p)
+        return con
+
+    def _commit(self, con: sqlite3.Connection, batch: Dict[str, List[dict]]) -> None:
+        for kind, fn in self.prepare.items():
+            if batch.get(kind):
+                batch[kind] = fn(batch[kind])
+        with self.metrics.time("etl_stage_seconds", stage="upsert"), con:
+            for kind, stmts in self.statements.items():
+                rows = batch.get(kind)
+                if not rows:
+                    continue
+                for sql in stmts:
+                    con.executemany(sql, rows)
+        for kind, rows in batch.items():
+            self.committed[kind] += len(rows)
+            self.metrics.inc("etl_rows_written_total", len(rows), kind=kind)
+        if self.on_commit:
+            self.on_commit(batch)
+
+    def run(self) -> None:
+        try:
+            con = self._connect()
+        except BaseException as e:
+            self.error = e
+            return
+        batch: Dict[str, List[dict]] = {}
+        counted = total = 0
+        first: Optional[float] = None
+        try:
+            while True:
+                timeout = None if first is None else max(0.0, first + self.max_delay - time.monotonic())
+                try:
+                    item = self._q.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    if batch:
+                        self._commit(con, batch)
+                    return
+                if item is not None and item[0] is _SYNC:
+                    if batch:
+                        self._commit(con, batch)
+                        batch, counted, total, first = {}, 0, 0, None
+                    item[1].set()
+                    continue
+                if item is not None:
+                    kind, params = item
+                    batch.setdefault(kind, []).append(params)
+                    total += 1
+                    counted += kind == self.count_kind
+                    if first is None:
+                        first = time.monotonic()
+
+                due = first is not None and time.monotonic() - first >= self.max_delay
+                if batch and (counted >= self.batch_size or total >= 4 * self.batch_size or due):
+                    self._commit(con, batch)
+                    batch, counted, total, first = {}, 0, 0, None
+        except BaseException as e:
+            logger.exception("Writer przerwany błędem")
+            self.error = e
+            # odblokuj producenta czekającego na pełnej kolejce
+            while True:
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, tuple) and item[0] is _SYNC:
+                    item[1].set()
+        finally:
+            con.close()
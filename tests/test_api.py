@@ -0,0 +1,159 @@
+import json
+import time
+import datetime as dt
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from services.api import app as api
+from services.worker.etl.main import ensure_schema, bulk_upsert
+from services.worker.etl.sources import nofluff
+
+def _job(i, title, company, location, skills=""):
+    return {"id": f"https://nofluffjobs.com/pl/job/{i}", "title": title, "company": company,
+            "location": location, "seniority": "Mid", "url": f"https://nofluffjobs.com/pl/job/{i}",
+            "posted_at": dt.date.today().isoformat(), "source": "test", "skills": skills}
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}", future=True)
+    ensure_schema(engine)
+    bulk_upsert(engine, [
+        _job(1, "Python Developer", "Acme", "Poznań"),
+        _job(2, "Data Engineer", "Python Labs", "Warszawa"),
+        _job(3, "Java Developer", "Acme", "Poznań"),
+    ])
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET skills = 'python,sql' WHERE id LIKE '%/2'"))
+    monkeypatch.setattr(api, "engine", engine)
+    monkeypatch.setattr(api, "_has_fts", False)
+    return TestClient(api.app)
+
+def test_jobs_search_folds_diacritics(client):
+    ids = {j["id"][-1] for j in client.get("/jobs", params={"q": "poznan"}).json()}
+    assert ids == {"1", "3"}
+
+def test_jobs_search_folds_polish_l(client):
+    bulk_upsert(api.engine, [_job(4, "Backend Developer", "Łódzka Fabryka", "Łódź")])
+    for q in ("Lodz", "łódź", "ŁÓDŹ", "lodzka"):
+        assert [j["id"][-1] for j in client.get("/jobs", params={"q": q}).json()] == ["4"], q
+    with api.engine.begin() as conn:  # trigger usuwa z indeksu złożony tekst starej wersji
+        conn.execute(text("UPDATE jobs_clean SET location = 'Poznań', company = 'Acme' WHERE id LIKE '%/4'"))
+    assert client.get("/jobs", params={"q": "lodz"}).json() == []
+
+def test_jobs_search_is_bm25_ranked(client):
+    # "python" w tytule waży więcej niż w firmie/skills
+    ids = [j["id"][-1] for j in client.get("/jobs", params={"q": "python"}).json()]
+    assert ids == ["1", "2"]
+
+def test_jobs_filter_by_source(client):
+    with api.engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET source = 'justjoin' WHERE id LIKE '%/3'"))
+    assert [j["id"][-1] for j in client.get("/jobs", params={"source": "JustJoin"}).json()] == ["3"]
+
+def test_jobs_filter_by_nfj_source_any_case(client):
+    bulk_upsert(api.engine, [dict(_job(4, "Go Developer", "Gopher", "Kraków"), source=nofluff.SOURCE_NAME)])
+    for src in ("NoFluffJobs(HTML)", "nofluffjobs(html)"):
+        assert [j["id"][-1] for j in client.get("/jobs", params={"source": src}).json()] == ["4"]
+
+def test_trending_skills_follow_updates_and_deletes(client):
+    client.get("/skills/trending")  # w cache — zapis niżej musi go unieważnić
+    with api.engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET skills = 'python,docker' WHERE id LIKE '%/1'"))
+        conn.execute(text("UPDATE jobs_clean SET skills = 'sql' WHERE id LIKE '%/2'"))
+        conn.execute(text("UPDATE jobs_clean SET skills = 'python', posted_at = '2000-01-01' WHERE id LIKE '%/3'"))
+    assert client.get("/skills/trending").json()[0] == {"skill": "python", "count": 2}
+
+    recent = {r["skill"]: r["count"] for r in client.get("/skills/trending", params={"days": 30}).json()}
+    assert recent == {"docker": 1, "python": 1, "sql": 1}
+
+    with api.engine.begin() as conn:
+        conn.execute(text("DELETE FROM jobs_clean WHERE id LIKE '%/1'"))
+        assert conn.execute(text("SELECT COUNT(*) FROM skill_counts WHERE skill = 'docker'")).scalar_one() == 0
+
+def test_expired_offers_hidden_by_default_and_not_counted(client):
+    with api.engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET expired_at = '2024-06-01T00:00:00' WHERE id LIKE '%/2'"))
+        assert conn.execute(text("SELECT COUNT(*) FROM skill_counts WHERE skill = 'sql'")).scalar_one() == 0
+    assert sorted(j["id"][-1] for j in client.get("/jobs").json()) == ["1", "3"]
+    assert len(client.get("/jobs", params={"include_expired": "true"}).json()) == 3
+    assert client.get("/jobs", params={"skill": "sql"}).json() == []
+    with api.engine.begin() as conn:  # oferta wróciła na listing
+        conn.execute(text("UPDATE jobs_clean SET expired_at = NULL WHERE id LIKE '%/2'"))
+    assert "sql" in {r["skill"] for r in client.get("/skills/trending").json()}
+
+def test_skill_filters_use_exact_skills(client):
+    with api.engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET skills = 'postgresql,python' WHERE id LIKE '%/1'"))
+        conn.execute(text("UPDATE jobs_clean SET skills = 'java,sql' WHERE id LIKE '%/3'"))
+    ids = lambda **p: sorted(j["id"][-1] for j in client.get("/jobs", params=p).json())
+    assert ids(skill="sql") == ["2", "3"]  # bez fałszywego trafienia w postgresql
+    assert ids(skill=["python", "sql"]) == ["2"]
+    assert ids(skill=["python", "sql"], skill_mode="any") == ["1", "2", "3"]
+
+def test_jobs_filters_on_canonical_columns(client):
+    bulk_upsert(api.engine, [
+        {**_job(4, "Senior Data Engineer", "Acme", "Remote"), "seniority": None},
+        {**_job(5, "Junior Analyst", "Acme", "Lodz"), "seniority": None},
+    ])
+    ids = lambda **p: sorted(j["id"][-1] for j in client.get("/jobs", params=p).json())
+    assert ids(city="Poznan") == ["1", "3"]
+    assert ids(city="Łódź") == ["5"]
+    assert ids(remote="true") == ["4"]
+    assert ids(seniority="senior") == ["4"]
+
+def test_etag_and_cache_follow_data_version(client):
+    r = client.get("/jobs", params={"city": "poznan"})
+    etag = r.headers["etag"]
+    assert client.get("/jobs", params={"city": "poznan"}, headers={"If-None-Match": etag}).status_code == 304
+
+    with api.engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET title = 'Rust Developer' WHERE id LIKE '%/1'"))
+    r2 = client.get("/jobs", params={"city": "poznan"}, headers={"If-None-Match": etag})
+    assert r2.status_code == 200 and r2.headers["etag"] != etag
+    assert "Rust Developer" in {j["title"] for j in r2.json()}
+
+def test_result_cache_survives_concurrent_hits_and_evictions(client, monkeypatch):
+    class SlowReads(OrderedDict):
+        def get(self, key, default=None):  # odczyt oddaje GIL — inne wątki wstawiają i wyrzucają klucze
+            value = super().get(key, default)
+            time.sleep(0.0005)
+            return value
+
+    monkeypatch.setattr(api, "API_CACHE_SIZE", 2)
+    monkeypatch.setattr(api, "_result_cache", SlowReads())
+    monkeypatch.setattr(api, "data_version", lambda: 1)
+    request = Request({"type": "http", "method": "GET", "headers": []})
+    compute = lambda: [{"skill": "python", "count": 1}]
+
+    def hit(i):
+        return api.cached_response(request, ("concurrent", i % 3), compute).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert set(pool.map(hit, range(400))) == {200}
+
+def test_keyset_pagination_walks_all_rows_in_order(client):
+    bulk_upsert(api.engine, [
+        dict(_job(i, f"{lang} Developer", f"{lang} House", "Gdańsk"), posted_at=f"2024-01-{i % 3:02d}")
+        for i, lang in enumerate(["Rust", "Go", "Scala", "Elixir", "Kotlin", "Swift"], start=4)
+    ])
+    seen, cursor = [], None
+    while True:
+        r = client.get("/jobs", params={"limit": 4, **({"cursor": cursor} if cursor else {})})
+        seen += [(j["posted_at"], j["id"]) for j in r.json()]
+        cursor = r.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert len(seen) == 9 and len(set(seen)) == 9
+    assert seen == sorted(seen, reverse=True)
+    assert client.get("/jobs", params={"q": "python", "cursor": cursor or "x"}).status_code == 400
+
+def test_ndjson_streams_every_row(client):
+    r = client.get("/jobs", params={"format": "ndjson", "city": "poznan"})
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert sorted(j["id"][-1] for j in rows) == ["1", "3"]
@@ -0,0 +1,67 @@
+import asyncio
+from pathlib import Path
+
+import httpx
+import zstandard as zstd
+from sqlalchemy import create_engine, text
+
+from services.worker.etl.archive import RawArchive
+from services.worker.etl.crawler import AsyncFetcher
+from services.worker.etl.main import ensure_schema, replay
+from services.worker.etl.sources.nofluff import page_kind
+
+FIXTURES = Path(__file__).parent / "fixtures" / "nfj"
+
+def test_archive_is_content_addressed(tmp_path):
+    arch = RawArchive(tmp_path / "a", classify=page_kind)
+    sha = arch.put("https://nofluffjobs.com/pl/job/a", "<html>same</html>")
+    assert arch.put("https://nofluffjobs.com/en/job/a", "<html>same</html>") == sha
+    arch.put("https://nofluffjobs.com/pl/backend?page=1", "<html>listing</html>")
+    assert arch.get(sha) == "<html>same</html>"
+    assert arch.stats()["pages"] == 3 and arch.stats()["blobs"] == 2
+    assert {p.kind for p in arch.iter_latest()} == {"job", "listing"}
+    arch.close()
+    # segment = zwykły wieloramkowy plik zstd
+    seg = (tmp_path / "a" / "seg-000001.zst").read_bytes()
+    out = zstd.ZstdDecompressor().decompressobj()
+    assert b"same" in out.decompress(seg)
+
+def test_latest_version_per_url_and_segment_rollover(tmp_path):
+    arch = RawArchive(tmp_path / "a", segment_bytes=1)
+    for v in range(3):
+        arch.put("https://x.test/pl/job/1", f"<html>v{v}</html>")
+    arch.close()
+    assert len(list((tmp_path / "a").glob("seg-*.zst"))) == 3
+    arch = RawArchive(tmp_path / "a", segment_bytes=1)  # po ponownym otwarciu dopisuje do nowego segmentu
+    arch.put("https://x.test/pl/job/2", "<html>w</html>")
+    assert [(p.url, p.body) for p in arch.iter_latest()] == [
+        ("https://x.test/pl/job/1", "<html>v2</html>"), ("https://x.test/pl/job/2", "<html>w</html>"),
+    ]
+    assert len(list((tmp_path / "a").glob("seg-*.zst"))) == 4
+
+def test_fetcher_archives_network_responses(tmp_path):
+    arch = RawArchive(tmp_path / "a", classify=page_kind)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200 if "ok" in request.url.path else 404, text="<html>ok</html>")
+
+    async def run():
+        async with AsyncFetcher(rate=1000, burst=10, transport=httpx.MockTransport(handler), archive=arch) as f:
+            return [await f.get_text(u) for u in ("https://x.test/pl/job/ok", "https://x.test/pl/job/gone")]
+
+    assert asyncio.run(run()) == ["<html>ok</html>", None]
+    assert [p.url for p in arch.iter_latest("job")] == ["https://x.test/pl/job/ok"]
+
+def test_replay_parses_archive_without_network(tmp_path):
+    arch = RawArchive(tmp_path / "a", classify=page_kind)
+    for name in ("job_ld_direct.html", "job_ld_graph.html"):
+        arch.put(f"https://nofluffjobs.com/pl/job/{name[:-5]}", (FIXTURES / name).read_text(encoding="utf-8"))
+    arch.put("https://nofluffjobs.com/pl/backend?page=1", (FIXTURES / "listing_backend.html").read_text(encoding="utf-8"))
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'r.db'}", future=True)
+    ensure_schema(engine)
+    assert replay(engine, arch) == 2
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT title, city, skills FROM jobs_clean ORDER BY title")).all()
+    assert [(r.title, r.city) for r in rows] == [("Data Engineer", "poznan"), ("Senior Python Developer", "warszawa")]
+    assert "python" in rows[1].skills
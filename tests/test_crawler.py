@@ -0,0 +1,79 @@
+import time
+import asyncio
+
+import httpx
+
+from services.worker.etl.crawler import (
+    TokenBucket, AsyncFetcher, AdaptiveConcurrency, RetryPolicy, retry_after_seconds,
+)
+
+def test_token_bucket_caps_rate_after_burst():
+    async def run():
+        b = TokenBucket(rate=50, burst=2)
+        t0 = time.monotonic()
+        for _ in range(6):
+            await b.acquire()
+        return time.monotonic() - t0
+
+    # 2 z burstu od razu, pozostałe 4 co 1/50 s
+    assert asyncio.run(run()) >= 4 / 50 * 0.9
+
+def test_fetcher_returns_text_only_for_200():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/ok":
+            return httpx.Response(200, text="<html>ok</html>")
+        return httpx.Response(404)
+
+    async def run():
+        async with AsyncFetcher(rate=1000, burst=10, transport=httpx.MockTransport(handler)) as f:
+            return await f.get_text("https://example.test/ok"), await f.get_text("https://example.test/missing")
+
+    assert asyncio.run(run()) == ("<html>ok</html>", None)
+
+def test_retry_after_and_backoff():
+    assert retry_after_seconds({"Retry-After": "7"}) == 7
+    assert retry_after_seconds({"Retry-After": "Wed, 21 Oct 2015 07:28:10 GMT"}, now=1445412480) == 10
+    assert retry_after_seconds({}) is None
+    policy = RetryPolicy(retries=3, base=1.0, cap=3.0, max_retry_after=5)
+    assert all(0 <= policy.delay(a) <= min(3.0, 2 ** a) for a in range(6) for _ in range(20))
+    assert policy.delay(0, {"Retry-After": "60"}) == 5
+
+def test_fetcher_retries_throttling_and_server_errors():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        n = calls.count(request.url.path)
+        if request.url.path == "/flaky" and n == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        if request.url.path == "/flaky" and n == 2:
+            return httpx.Response(503)
+        if request.url.path == "/down":
+            return httpx.Response(500)
+        return httpx.Response(200, text="ok")
+
+    async def run():
+        async with AsyncFetcher(rate=1000, burst=10, transport=httpx.MockTransport(handler),
+                                retry=RetryPolicy(retries=2, base=0.001)) as f:
+            out = await f.get_text("https://example.test/flaky"), await f.get_text("https://example.test/down")
+            return out, f.limiter.bucket("https://example.test/").rate
+
+    (flaky, down), rate = asyncio.run(run())
+    assert (flaky, down) == ("ok", None)
+    assert calls.count("/flaky") == 3 and calls.count("/down") == 3
+    assert rate < 1000  # 429 zwolnił limiter hosta (sukces odbudowuje tylko o krok)
+
+def test_adaptive_concurrency_aimd():
+    async def run():
+        c = AdaptiveConcurrency(initial=4, minimum=1, maximum=8, cooldown=0)
+        for _ in range(40):
+            await c.acquire()
+            await c.release(0.01, ok=True)
+        grown = c.limit
+        await c.acquire()
+        await c.release(None, ok=False)
+        return grown, c.limit
+
+    grown, cut = asyncio.run(run())
+    assert grown == 8
+    assert cut == 8 * 0.7
@@ -0,0 +1,53 @@
+import datetime as dt
+import sqlite3
+
+from sqlalchemy import create_engine, text
+
+from services.dashboard.queries import COUNT_SQL, build_where
+from services.worker.etl.main import ensure_schema, bulk_upsert
+
+def test_title_uses_fts_or_like_fallback():
+    cond, params = build_where("data eng", "", "")
+    assert "JOIN jobs_fts" in cond and params["q"] == 'title : ("data"* "eng"*)'
+    cond, params = build_where("data eng", "", "", fts=False)
+    assert "jobs_fts" not in cond and params == {"t0": "%data%", "t1": "%eng%"}
+
+def test_location_goes_through_etl_aliases():
+    for loc in ("Warsaw", "warszawa", "Warszawa, mazowieckie"):
+        assert build_where("", loc, "")[1] == {"city": "warszawa"}
+    assert build_where("", "Bielsko Biala", "")[1] == {"city": "bielsko-biala"}
+    assert build_where("", "Cracow", "")[1] == {"city": "krakow"}
+    # niepełna nazwa -> prefiks klucza city
+    assert build_where("", "Wroc", "")[1] == {"city_lo": "wroc", "city_hi": "wrod"}
+
+def test_remote_words_seniority_and_expired():
+    for loc in ("Zdalnie", "remote", "praca zdalna"):
+        cond, params = build_where("", loc, "")
+        assert "j.remote = 1" in cond and params == {}
+    cond, params = build_where("", "", "Senior")
+    assert "j.seniority = :sen" in cond and params == {"sen": "Senior"}
+    assert "j.expired_at IS NULL" in cond
+    assert build_where("", "", "", expired=True) == ("", {})
+
+def test_filters_match_rows_written_by_etl(tmp_path):
+    db = tmp_path / "d.db"
+    engine = create_engine(f"sqlite:///{db}", future=True)
+    ensure_schema(engine)
+    bulk_upsert(engine, [
+        {"id": f"u{i}", "title": f"Developer {i}", "company": f"Firma {i}", "location": loc, "url": f"u{i}",
+         "posted_at": dt.date.today().isoformat(), "source": "test"}
+        for i, loc in enumerate(["Wrocław", "Warszawa", "Remote", "Bielsko-Biała"])
+    ])
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET expired_at = '2024-01-01' WHERE id = 'u1'"))
+    con = sqlite3.connect(db)
+
+    def count(loc, expired=False):
+        cond, params = build_where("", loc, "", expired)
+        return con.execute(COUNT_SQL.format(cond=cond), params).fetchone()[0]
+
+    try:
+        assert (count("Wroc"), count("Bielsko Biala"), count("zdalnie")) == (1, 1, 1)
+        assert (count("Warsaw"), count("Warsaw", expired=True)) == (0, 1)
+    finally:
+        con.close()
@@ -1,4 +1,9 @@
-from services.worker.etl.dedup import simple_dedup
+import datetime as dt
+
+from sqlalchemy import create_engine, text
+
+from services.worker.etl.dedup import features, jaccard, simple_dedup
+from services.worker.etl.main import ensure_schema, bulk_upsert, backfill_neardup
 
 def test_simple_dedup():
     rows = [
@@ -8,3 +13,49 @@ def test_simple_dedup():
     ]
     out = simple_dedup(rows, key="id")
     assert len(out) == 2
+
+def _offer(id_, title="Senior Python Developer", company="Acme", location="Poznań", skills="aws,docker,python,sql"):
+    return {"id": id_, "title": title, "company": company, "location": location, "seniority": None,
+            "url": id_, "posted_at": dt.date.today().isoformat(), "source": "test", "skills": skills}
+
+def _sim(a, b):
+    return jaccard(features(a), features(b))
+
+def test_near_duplicate_features():
+    base = dict(_offer("1"), city="poznan", seniority="Senior")
+    jj = dict(base, title="Senior Python Developer (m/k)", company="ACME Sp. z o.o.", skills="django,python,sql")
+    assert _sim(base, jj) >= 0.75
+    assert _sim(base, dict(base, title="Junior Python Developer", seniority="Junior")) < 0.75
+    assert _sim(base, dict(base, city="krakow")) < 0.75
+
+def test_near_duplicates_stay_out_of_jobs_clean(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'd.db'}", future=True)
+    ensure_schema(engine)
+    bulk_upsert(engine, [_offer("pl/1"), _offer("en/1"), _offer("pl/2", title="Junior Python Developer")])
+    bulk_upsert(engine, [_offer("jj/1", title="Senior Python Developer (m/k)", company="ACME Sp. z o.o.",
+                                location="Poznan", skills="django,python,sql")])
+    with engine.begin() as conn:
+        clean = conn.execute(text("SELECT id FROM jobs_clean ORDER BY id")).scalars().all()
+        dups = dict(conn.execute(text("SELECT id, dup_of FROM jobs_table WHERE dup_of IS NOT NULL")).all())
+        n = conn.execute(text("SELECT n FROM skill_counts WHERE skill = 'python'")).scalar_one()
+    assert clean == ["pl/1", "pl/2"]
+    assert dups == {"en/1": "pl/1", "jj/1": "pl/1"}
+    assert n == 2
+
+def test_backfill_neardup_removes_existing_duplicates(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'd.db'}", future=True)
+    ensure_schema(engine)
+    bulk_upsert(engine, [_offer("pl/1"), _offer("pl/2", title="Data Engineer")])
+    with engine.begin() as conn:  # stara baza: duplikat zapisany przed dedupem, bez podpisu
+        conn.execute(text(
+            "INSERT INTO jobs_clean(id, title, company, location, seniority, url, posted_at, source, skills, city, remote) "
+            "SELECT 'en/1', title, company, location, seniority, 'en/1', posted_at, source, skills, city, remote "
+            "FROM jobs_clean WHERE id = 'pl/1'"))
+        conn.execute(text(
+            "INSERT INTO jobs_table(id, title, company, location, seniority, url, posted_at, source, skills, city, remote) "
+            "SELECT id, title, company, location, seniority, url, posted_at, source, skills, city, remote "
+            "FROM jobs_clean WHERE id = 'en/1'"))
+    assert backfill_neardup(engine) == 1
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT id FROM jobs_clean ORDER BY id")).scalars().all() == ["pl/1", "pl/2"]
+    assert backfill_neardup(engine) == 0
@@ -0,0 +1,60 @@
+import io
+import datetime as dt
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, text
+
+from services.worker.etl.export import export_jobs
+from services.worker.etl.main import ensure_schema, bulk_upsert
+
+def _db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'e.db'}", future=True)
+    ensure_schema(engine)
+    bulk_upsert(engine, [
+        {"id": f"j{i}", "title": t, "company": "Acme", "location": loc, "seniority": None, "url": f"j{i}",
+         "posted_at": dt.date.today().isoformat(), "source": "test", "skills": sk}
+        for i, (t, loc, sk) in enumerate([("Python Dev", "Poznań", "python,sql"), ("IT Recruiter", "Remote", ""),
+                                          ("Go Dev", "Kraków", "go")])
+    ])
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET updated_at = '2020-01-01T00:00:00' WHERE id = 'j0'"))
+    return engine
+
+def test_export_parquet_in_chunks_with_since(tmp_path):
+    engine = _db(tmp_path)
+    out = tmp_path / "jobs.parquet"
+    assert export_jobs(engine.url.database, out, "parquet", chunk=2) == 3
+    f = pq.ParquetFile(out)
+    assert f.num_row_groups == 2
+    t = f.read()
+    assert t.column("skills").to_pylist() == [["python", "sql"], [], ["go"]]
+    assert t.column("remote").to_pylist() == [False, True, False]
+
+    assert export_jobs(engine.url.database, tmp_path / "inc.parquet", "parquet",
+                       since=dt.date.today().isoformat()) == 2
+
+def test_export_arrow_is_memory_mappable(tmp_path):
+    engine = _db(tmp_path)
+    out = tmp_path / "jobs.arrow"
+    export_jobs(engine.url.database, out, "arrow", chunk=2)
+    with pa.memory_map(str(out)) as src:
+        t = pa.ipc.open_file(src).read_all()
+    assert t.column("id").to_pylist() == ["j0", "j1", "j2"]
+
+def test_export_endpoint_streams_parquet(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from services.api import app as api
+
+    monkeypatch.setattr(api, "engine", _db(tmp_path))
+    monkeypatch.setattr(api, "EXPORT_CHUNK", 2)
+    client = TestClient(api.app)
+    r = client.get("/export/jobs", params={"since": dt.date.today().isoformat()})
+    assert r.status_code == 200
+    assert sorted(pq.read_table(io.BytesIO(r.content)).column("id").to_pylist()) == ["j1", "j2"]
+    r = client.get("/export/jobs", params={"format": "arrow"})
+    assert pa.ipc.open_file(pa.BufferReader(r.content)).read_all().num_rows == 3
+    # API i CLI workera piszą tym samym kodem — ten sam schemat i te same wiersze
+    export_jobs(api.engine.url.database, tmp_path / "cli.parquet", "parquet")
+    assert pq.read_table(io.BytesIO(client.get("/export/jobs").content)).equals(pq.read_table(tmp_path / "cli.parquet"))
+    assert client.get("/export/jobs", params={"since": "yesterday"}).status_code == 400
@@ -0,0 +1,57 @@
+import asyncio
+
+from sqlalchemy import create_engine
+
+from services.worker.etl.schema import metadata
+from services.worker.etl.frontier import Frontier
+
+def _frontier(tmp_path, **kw):
+    engine = create_engine(f"sqlite:///{tmp_path / 'f.db'}", future=True)
+    metadata.create_all(engine)
+    return Frontier(engine, **kw)
+
+def test_frontier_resumes_only_unsaved_urls(tmp_path):
+    f = _frontier(tmp_path)
+    for u in ("a", "b", "c"):
+        assert f.admit(u)
+    f.mark("a", ok=True)
+    f.mark("b", ok=False)
+    f.flush()
+
+    # „nowy bieg”: a pobrane, b do ponowienia, c nigdy nie ruszone
+    f2 = Frontier(f.engine, max_attempts=3)
+    assert not f2.admit("a")
+    assert sorted(f2.iter_pending()) == ["b", "c"]
+
+    async def resume():  # wersja dla crawla: strony czytane w wątku
+        return [u async for u in f2.aiter_pending(page=1)]
+
+    assert asyncio.run(resume()) == list(f2.iter_pending())
+    assert f2.count("done") == 1
+
+def test_frontier_gives_up_after_max_attempts(tmp_path):
+    f = _frontier(tmp_path, max_attempts=2)
+    f.admit("x")
+    f.flush()
+    for _ in range(2):
+        f.mark("x", ok=False)
+        f.flush()
+    assert list(f.iter_pending()) == []
+    assert not f.admit("x")
+
+def test_frontier_skips_other_language_version(tmp_path):
+    f = _frontier(tmp_path)
+    pl, en = "https://nofluffjobs.com/pl/job/x", "https://nofluffjobs.com/en/job/x"
+    assert f.admit(pl)
+    assert not f.admit(en)
+    f.flush()
+    assert not Frontier(f.engine).admit(en)
+
+def test_frontier_dedups_within_run_before_writer_flush(tmp_path):
+    f = _frontier(tmp_path, skip_existing=False)
+    pl, en = "https://nofluffjobs.com/pl/job/y", "https://nofluffjobs.com/en/job/y"
+    assert f.admit(pl)
+    ops = f.take()  # jak WriterSink.emit: bufor oddany do Writer-a, który jeszcze nic nie zapisał
+    assert [k for k, _ in ops] == ["frontier_new"]
+    assert not f.admit(en)
+    assert not f.admit(pl)  # drugi listing z tą samą ofertą
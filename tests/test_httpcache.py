@@ -0,0 +1,72 @@
+import time
+import asyncio
+
+import httpx
+
+from services.worker.etl.crawler import AsyncFetcher
+from services.worker.etl.httpcache import HttpCache
+
+def _etag_handler(seen):
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="<html>v1</html>", headers={"ETag": '"v1"'})
+    return handler
+
+def _get_twice(cache, seen):
+    async def run():
+        transport = httpx.MockTransport(_etag_handler(seen))
+        async with AsyncFetcher(rate=1000, burst=10, transport=transport, cache=cache) as f:
+            return [await f.get_text("https://example.test/pl/job/x") for _ in range(2)]
+    return asyncio.run(run())
+
+def test_stale_entry_is_revalidated_with_etag(tmp_path):
+    seen = []
+    bodies = _get_twice(HttpCache(tmp_path / "c.db", ttl=0), seen)
+    assert bodies == ["<html>v1</html>"] * 2
+    assert seen == [None, '"v1"']
+
+def test_fresh_entry_skips_network(tmp_path):
+    seen = []
+    bodies = _get_twice(HttpCache(tmp_path / "c.db", ttl=3600), seen)
+    assert bodies == ["<html>v1</html>"] * 2
+    assert seen == [None]
+
+def test_revalidate_sends_conditional_request_for_fresh_entry(tmp_path):
+    seen = []
+
+    async def run():
+        transport = httpx.MockTransport(_etag_handler(seen))
+        async with AsyncFetcher(rate=1000, burst=10, transport=transport,
+                                cache=HttpCache(tmp_path / "c.db", ttl=3600)) as f:
+            await f.get_text("https://example.test/pl/job/x")
+            return await f.get_text("https://example.test/pl/job/x", revalidate=True)
+
+    assert asyncio.run(run()) == "<html>v1</html>"
+    assert seen == [None, '"v1"']
+
+def test_slow_cache_write_does_not_stall_event_loop(tmp_path):
+    class SlowCache(HttpCache):
+        def store(self, *a):
+            time.sleep(0.3)  # wolny dysk
+            super().store(*a)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        t = asyncio.create_task(ticker())
+        transport = httpx.MockTransport(_etag_handler([]))
+        async with AsyncFetcher(rate=1000, burst=10, transport=transport, cache=SlowCache(tmp_path / "c.db")) as f:
+            body = await f.get_text("https://example.test/pl/job/x")
+        t.cancel()
+        return body, ticks
+
+    body, ticks = asyncio.run(run())
+    assert body == "<html>v1</html>" and ticks >= 10
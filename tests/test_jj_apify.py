@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from sqlalchemy import create_engine, text
+
+from bench.apify_server import FakeApify
+from bench.nfj_server import NFJServer
+from services.worker.etl.dedup import NearDupIndex
+from services.worker.etl.frontier import Frontier
+from services.worker.etl.main import ensure_schema, run_sources, WriterSink, WRITER_STATEMENTS, prepare_jobs
+from services.worker.etl.writer import Writer
+from services.worker.etl.sources import jj_apify
+from services.worker.etl.sources.base import RecordSink
+
+def _point_at(monkeypatch, server):
+    monkeypatch.setattr(jj_apify, "APIFY_BASE", server.base_url)
+    monkeypatch.setattr(jj_apify, "APIFY_TOKEN", "test-token")
+    monkeypatch.setattr(jj_apify, "ACTOR_ID", "someone~jj-scraper")
+
+def test_fetch_jobs_pages_through_dataset(monkeypatch):
+    app = FakeApify(items=23)
+    with NFJServer(app) as server:
+        _point_at(monkeypatch, server)
+        monkeypatch.setattr(jj_apify, "JJ_PAGE_SIZE", 5)
+        gen = jj_apify.fetch_jobs(limit=12)
+        first = next(gen)
+        assert app.requests == 1  # generator: kolejne strony dopiero na żądanie
+        recs = [first] + list(gen)
+    assert len(recs) == 12 and app.requests == 3 and app.served == 12
+    assert recs[0]["url"].startswith("https://justjoin.it/job-offer/") and recs[0]["source"] == "justjoin"
+
+def test_source_resumes_from_offset_and_restarts_on_new_run(monkeypatch):
+    app = FakeApify(items=23)
+    sink = RecordSink()
+    with NFJServer(app) as server:
+        _point_at(monkeypatch, server)
+        first = asyncio.run(jj_apify.JustJoinSource(limit=10, page_size=4).run(sink))
+        assert first == {"discovered": 10, "fetched": 10}
+        assert sink.state("jj_apify") == {"dataset": "ds1", "offset": 10}
+        rest = asyncio.run(jj_apify.JustJoinSource(limit=None, page_size=4).run(sink))
+        assert rest["fetched"] == 13 and sink.state("jj_apify")["offset"] == 23
+        served = app.served
+        assert asyncio.run(jj_apify.JustJoinSource(limit=None, page_size=4).run(sink))["fetched"] == 0
+        assert app.served == served  # nic nowego -> nic nie pobrano ponownie
+        app.new_run(5)
+        assert asyncio.run(jj_apify.JustJoinSource(limit=None, page_size=4).run(sink))["fetched"] == 5
+    assert len({r["id"] for r in sink.records}) == 28
+    assert sink.state("jj_apify") == {"dataset": "ds2", "offset": 5}
+
+def test_offset_counts_raw_dataset_items_despite_empty_ones(monkeypatch):
+    app = FakeApify(items=23, empty_every=5)  # puste elementy 4, 9, 14, 19
+    sink = RecordSink()
+    with NFJServer(app) as server:
+        _point_at(monkeypatch, server)
+        first = asyncio.run(jj_apify.JustJoinSource(limit=10, page_size=4).run(sink))
+        assert sink.state("jj_apify")["offset"] == 10 and first["fetched"] == 8
+        rest = asyncio.run(jj_apify.JustJoinSource(limit=None, page_size=4).run(sink))
+    assert rest["fetched"] == 11 and sink.state("jj_apify")["offset"] == 23
+    assert len({r["id"] for r in sink.records}) == 19 and app.served == 23  # nic nie czytane dwa razy
+
+def test_offset_is_persisted_with_records(tmp_path, monkeypatch):
+    db = tmp_path / "jj.db"
+    engine = create_engine(f"sqlite:///{db}", future=True)
+    ensure_schema(engine)
+
+    def run_once(limit):
+        neardup = NearDupIndex(str(db))
+        writer = Writer(str(db), WRITER_STATEMENTS, batch_size=3, prepare={"job": prepare_jobs(neardup)})
+        writer.start()
+        try:
+            src = jj_apify.JustJoinSource(limit=limit, page_size=4)
+            return asyncio.run(run_sources([src], WriterSink(writer, Frontier(engine))))["jj_apify"]
+        finally:
+            writer.close()
+            neardup.close()
+
+    with NFJServer(FakeApify(items=9)) as server:
+        _point_at(monkeypatch, server)
+        assert run_once(6)["fetched"] == 6
+        assert run_once(None)["fetched"] == 3
+    with engine.begin() as conn:
+        state = conn.execute(text("SELECT state FROM source_state WHERE source = 'jj_apify'")).scalar_one()
+        saved = conn.execute(text("SELECT COUNT(*) FROM jobs_all WHERE source = 'justjoin'")).scalar_one()
+    assert json.loads(state) == {"dataset": "ds1", "offset": 9} and saved == 9
@@ -0,0 +1,75 @@
+import json
+import asyncio
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from services.worker.etl import metrics as metrics_mod
+from services.worker.etl.metrics import Metrics, METRICS
+from services.worker.etl.crawler import AsyncFetcher, RetryPolicy
+from services.worker.etl.main import ensure_schema, run_report
+from services.worker.etl.sources import nofluff
+
+def test_render_is_prometheus_text():
+    m = Metrics()
+    m.inc("etl_http_responses_total", kind="job", status=200)
+    m.inc("etl_http_responses_total", 2, kind="job", status=429)
+    for v in (0.002, 0.02, 0.2):
+        m.observe("etl_stage_seconds", v, stage="parse")
+    m.gauge("etl_writer_queue_depth", lambda: 7)
+    out = m.render()
+    assert 'etl_http_responses_total{kind="job",status="429"} 2' in out
+    assert 'etl_stage_seconds_bucket{stage="parse",le="0.025"} 2' in out
+    assert 'etl_stage_seconds_bucket{stage="parse",le="+Inf"} 3' in out
+    assert 'etl_stage_seconds_count{stage="parse"} 3' in out
+    assert "etl_writer_queue_depth 7" in out
+    assert m.value("etl_http_responses_total") == 3
+    assert m.value("etl_http_responses_total", status=429) == 2
+
+def test_fetcher_counts_statuses_and_network_errors():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "down" in request.url.path:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200 if "ok" in request.url.path else 503, text="x" * 10)
+
+    m = Metrics()
+
+    async def run():
+        async with AsyncFetcher(rate=1000, burst=10, transport=httpx.MockTransport(handler), metrics=m,
+                                classify=nofluff.page_kind) as f:
+            return [await f.get_text(f"https://x.test/pl/job/{p}") for p in ("ok", "busy", "down")]
+
+    assert asyncio.run(run()) == ["x" * 10, None, None]
+    assert m.value("etl_http_responses_total", kind="job", status=503) == 1
+    assert m.value("etl_fetch_errors_total", error="ConnectError") == 1
+    assert m.value("etl_fetch_bytes_total") == 20
+
+def test_safe_get_failures_reach_metrics(monkeypatch):
+    def boom(*a, **kw):
+        raise nofluff.requests.Timeout("slow")
+
+    monkeypatch.setattr(nofluff, "HTTP_CACHE", None)
+    monkeypatch.setattr(nofluff, "RAW_ARCHIVE", None)
+    monkeypatch.setattr(nofluff.requests, "get", boom)
+    monkeypatch.setattr(nofluff, "RETRY", RetryPolicy(retries=1, base=0))
+    METRICS.reset()
+    assert nofluff._safe_get("https://x.test/pl/backend?page=1") is None
+    assert METRICS.value("etl_fetch_errors_total", kind="listing", error="Timeout") == 2
+    assert METRICS.value("etl_retries_total", reason="transport") == 1
+
+def test_run_report_persists_row_and_metrics_file(tmp_path, monkeypatch):
+    prom = tmp_path / "etl.prom"
+    monkeypatch.setattr(metrics_mod, "ETL_METRICS_FILE", str(prom))
+    engine = create_engine(f"sqlite:///{tmp_path / 'm.db'}", future=True)
+    ensure_schema(engine)
+    with run_report(engine, "crawl") as run:
+        METRICS.inc("etl_http_responses_total", 5, kind="job", status=200)
+        METRICS.inc("etl_http_responses_total", 2, kind="job", status=500)
+        METRICS.inc("etl_fetch_bytes_total", 1234, kind="job")
+        METRICS.observe("etl_stage_seconds", 0.01, stage="upsert")
+        run["stats"] = {"discovered": 9, "fetched": 7, "saved": 5}
+    with engine.begin() as conn:
+        row = conn.execute(text("SELECT * FROM etl_runs")).mappings().one()
+    assert (row["mode"], row["status"], row["saved"], row["http_errors"], row["bytes"]) == ("crawl", "ok", 5, 2, 1234)
+    assert json.loads(row["metrics"])["histograms"]['etl_stage_seconds{stage="upsert"}']["count"] == 1
+    assert 'etl_http_responses_total{kind="job",status="500"} 2' in prom.read_text()
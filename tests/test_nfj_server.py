@@ -0,0 +1,32 @@
+import asyncio
+
+from bench.nfj_server import FakeNFJ, NFJServer
+from services.worker.etl.crawler import AsyncFetcher
+from services.worker.etl.sources import nofluff, nofluff_parser
+
+def test_fake_nfj_routes_and_faults():
+    app = FakeNFJ(jobs=30, page_size=10, page_kb=1)
+    status, _, html = app.route("/pl/backend", "page=1")
+    assert status == 200 and "/pl/job/" in html
+    assert app.route("/pl/backend", "page=9")[2].count("/job/") == 0
+    assert app.route("/pl/job/nope", "")[0] == 404
+    throttled = FakeNFJ(jobs=1, throttle_rate=1.0, retry_after=3)
+    assert throttled.handle("/pl", "")[:2] == (429, {"Retry-After": "3"})
+
+def test_crawl_against_stand_in_discovers_and_parses_all_offers(monkeypatch):
+    app = FakeNFJ(jobs=40, page_size=7, page_kb=1)
+    with NFJServer(app) as server:
+        monkeypatch.setattr(nofluff, "NFJ_BASE", server.base_url)
+        monkeypatch.setattr(nofluff_parser, "NFJ_BASE", server.base_url)
+        monkeypatch.setattr(nofluff, "NFJ_COUNTRY", "pl")
+
+        async def run():
+            async with AsyncFetcher(rate=1000, burst=50) as f:
+                urls = [u async for u in nofluff.iter_job_urls_async(f)]
+                recs = await asyncio.gather(*(nofluff.fetch_job_async(f, u) for u in urls if "/pl/job/" in u))
+            return urls, recs
+
+        urls, recs = asyncio.run(run())
+    assert len(urls) == len(set(urls)) == 80  # /pl/job/ + /en/job/
+    assert sorted(r["title"] for r in recs) == sorted(j["title"] for j in app.jobs)
+    assert all(r["company"].startswith("Firma ") and r["posted_at"] for r in recs)
@@ -0,0 +1,20 @@
+from services.worker.etl.nlp import SkillMatcher, extract_skills, extract_skills_many, load_skills_file
+
+def test_extract_skills_respects_token_boundaries():
+    assert extract_skills("Digital marketing, PostgreSQL") == ["postgresql"]
+    assert extract_skills("Python/SQL, Python-based ETL") == ["python", "sql"]
+
+def test_extract_skills_aliases_and_phrases():
+    assert extract_skills("k8s, Postgres, Google Cloud Platform, ML Ops") == ["gcp", "kubernetes", "mlops", "postgresql"]
+    assert extract_skills(".NET, C#, C++ and node.js") == [".net", "c#", "c++", "node.js"]
+    assert extract_skills("NodeJS, Node JS") == ["node.js"]
+
+def test_bare_node_is_not_node_js():
+    assert extract_skills("każdy node ma 64GB RAM, klaster Kubernetes") == ["kubernetes"]
+
+def test_extract_skills_many_and_skills_file(tmp_path):
+    f = tmp_path / "skills.txt"
+    f.write_text("# dodatkowe\nclickhouse: ch db\nc#: csharp\n", encoding="utf-8")
+    m = SkillMatcher(["python"], load_skills_file(str(f)))
+    assert m.extract_many(["CH DB i Python", "CSharp"]) == [["clickhouse", "python"], ["c#"]]
+    assert extract_skills_many(["", "git"]) == [[], ["git"]]
@@ -0,0 +1,81 @@
+import asyncio
+
+import httpx
+
+from services.worker.etl.crawler import AsyncFetcher
+from services.worker.etl.sources import nofluff
+
+def _listing_handler(calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url)
+        page = int(request.url.params.get("page", "0"))
+        if page == 0:  # strony do auto-discovery kategorii
+            return httpx.Response(200, text='<a href="/pl/data">data</a>')
+        # od strony 3 listing „stoi w miejscu” — te same linki co na 2
+        page = min(page, 2)
+        slug = request.url.path.strip("/").replace("/", "-")
+        return httpx.Response(200, text="".join(f'<a href="/pl/job/{slug}-{page}-{i}">x</a>' for i in range(3)))
+    return handler
+
+def test_async_discovery_stops_paginating_without_new_links(monkeypatch):
+    monkeypatch.setattr(nofluff, "NFJ_PAGES", 12)
+    calls = []
+
+    async def run():
+        transport = httpx.MockTransport(_listing_handler(calls))
+        async with AsyncFetcher(rate=10_000, burst=100, transport=transport) as f:
+            return [u async for u in nofluff.iter_job_urls_async(f)]
+
+    urls = asyncio.run(run())
+    assert len(urls) == len(set(urls))
+    listing_pages = [c for c in calls if c.params.get("page")]
+    # 2 kraje x (data, remote/data, root, remote) x (2 strony z ofertami + 1 pusta)
+    assert len(listing_pages) == 2 * 4 * 3
+    assert len(urls) == 2 * 4 * 2 * 3
+
+# strumienie jak na NFJ: /remote/data ⊂ /data, root zawiera wszystko; za ostatnią stroną powtórka
+_OVERLAP = {
+    "/pl/data": [["a0", "a1"], ["a2", "a3"]],
+    "/pl/remote/data": [["a0"], ["r0"]],   # r0 tylko na 2. stronie zdalnych
+    "/pl": [["a0", "a1"], ["a2", "r0"], ["z0"]],  # z0 tylko głęboko w roocie
+    "/pl/remote": [["a0", "r0"]],
+}
+
+def _overlap_page(path, page):
+    if page == 0:  # auto-discovery kategorii
+        return '<a href="/pl/data">data</a>' if path.startswith("/pl") else ""
+    pages = _OVERLAP.get(path, [[]])
+    return "".join(f'<a href="/pl/job/{slug}">x</a>' for slug in pages[min(page, len(pages)) - 1])
+
+def _overlap_setup(monkeypatch):
+    monkeypatch.setattr(nofluff, "NFJ_BASE", "https://nfj.test")
+    monkeypatch.setattr(nofluff, "NFJ_COUNTRY", "pl")
+    monkeypatch.setattr(nofluff, "NFJ_PAGES", 6)
+    monkeypatch.setattr(nofluff, "NFJ_REMOTE", True)
+    monkeypatch.setattr(nofluff, "NFJ_ALL_LISTINGS", True)
+
+def test_overlapping_streams_are_paged_to_their_own_end(monkeypatch):
+    _overlap_setup(monkeypatch)
+    expected = ["a0", "a1", "a2", "a3", "r0", "z0"]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, text=_overlap_page(request.url.path, int(request.url.params.get("page", "0"))))
+
+    async def run():
+        async with AsyncFetcher(rate=10_000, burst=100, transport=httpx.MockTransport(handler)) as f:
+            return [u async for u in nofluff.iter_job_urls_async(f, concurrency=1)]
+
+    urls = asyncio.run(run())
+    assert sorted(u.rsplit("/", 1)[1] for u in urls) == expected
+
+    monkeypatch.setattr(nofluff, "NFJ_DELAY", 0)
+    monkeypatch.setattr(nofluff, "_safe_get", lambda url: _overlap_page(
+        httpx.URL(url).path, int(httpx.URL(url).params.get("page", "0"))))
+    assert sorted(u.rsplit("/", 1)[1] for u in nofluff.iter_job_urls()) == expected
+
+def test_aimd_ceiling_never_exceeds_connection_pool(monkeypatch):
+    monkeypatch.setattr(nofluff, "NFJ_AIMD", True)
+    monkeypatch.setattr(nofluff, "NFJ_CONNECTIONS", 16)
+    f = nofluff.make_fetcher(32)
+    assert f.concurrency.maximum == f.max_connections == 16
+    assert nofluff.make_fetcher(8).concurrency.maximum == 8
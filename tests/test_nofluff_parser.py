@@ -0,0 +1,22 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from services.worker.etl.sources.nofluff_parser import parse_job_fields, extract_job_links
+
+FIXTURES = Path(__file__).parent / "fixtures" / "nfj"
+EXPECTED = json.loads((FIXTURES / "expected.json").read_text(encoding="utf-8"))
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_parse_job_fields_on_fixture_corpus(name):
+    html = (FIXTURES / name).read_text(encoding="utf-8")
+    got = parse_job_fields(html)
+    assert {k: got[k] for k in EXPECTED[name]} == EXPECTED[name]
+
+def test_extract_job_links_canonicalizes_and_dedups():
+    html = (FIXTURES / "listing_backend.html").read_text(encoding="utf-8")
+    expected = json.loads((FIXTURES / "listing_backend.links.json").read_text(encoding="utf-8"))
+    links = extract_job_links(html)
+    assert len(links) == len(set(links))
+    assert sorted(links) == expected
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from services.worker.etl.main import ensure_schema, backfill_normalized
+from services.common.normalize import canonical_location, canonical_seniority, normalize_batch
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Poznań", ("Poznań", "poznan", 0)),
+    ("poznan", ("Poznań", "poznan", 0)),
+    ("Warsaw, Poland", ("Warszawa", "warszawa", 0)),
+    ("Łódź (hybrydowo)", ("Łódź", "lodz", 0)),
+    ("Kraków / Remote", ("Kraków", "krakow", 1)),
+    ("Zdalnie", ("Zdalnie", None, 1)),
+    ("Remote", ("Zdalnie", None, 1)),
+    ("Nie podano", ("Nie podano", None, 0)),
+    ("Unspecified", ("Nie podano", None, 0)),
+    ("Berlin, Germany", ("Berlin", "berlin", 0)),
+])
+def test_canonical_location(raw, expected):
+    assert canonical_location(raw) == expected
+
+@pytest.mark.parametrize("title, expected", [
+    ("Senior Python Developer", "Senior"),
+    ("Junior/Mid Data Analyst", "Junior"),
+    ("Stażysta IT", "Junior"),
+    ("Mid-level Java Dev", "Mid"),
+    ("Tech Lead", "Senior"),
+    ("Data Engineer", "Unspecified"),
+    ("Midwest Sales", "Unspecified"),
+])
+def test_canonical_seniority(title, expected):
+    assert canonical_seniority(title) == expected
+
+def test_normalize_batch_prefers_source_hint():
+    recs = normalize_batch([
+        {"title": "Python Developer", "seniority": "senior", "location": "Remote"},
+        {"title": "Junior Python Developer", "seniority": None, "location": "Warszawa"},
+    ])
+    assert [(r["seniority"], r["location"], r["city"], r["remote"]) for r in recs] == [
+        ("Senior", "Zdalnie", None, 1),
+        ("Junior", "Warszawa", "warszawa", 0),
+    ]
+
+def test_backfill_normalizes_old_rows_and_creates_indexes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'n.db'}", future=True)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE jobs_clean (id VARCHAR, title VARCHAR, company VARCHAR, "
+                          "location VARCHAR, seniority VARCHAR, url VARCHAR, posted_at VARCHAR, source VARCHAR)"))
+        conn.execute(text("INSERT INTO jobs_clean(id, title, location, seniority) "
+                          "VALUES ('1', 'Senior Dev', 'Poznan', 'Mid'), ('2', 'Dev', 'Remote', 'Unspecified')"))
+    ensure_schema(engine)
+    assert backfill_normalized(engine) == 2
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT id, seniority, location, city, remote FROM jobs_clean ORDER BY id")).all()
+        idx = {r[1] for r in conn.execute(text("PRAGMA index_list(jobs_clean)"))}
+    # podpowiedź "Mid" (stary domyślny NFJ) wygrywa z tytułem — backfill nie zgaduje na nowo
+    assert [tuple(r) for r in rows] == [("1", "Mid", "Poznań", "poznan", 0), ("2", "Unspecified", "Zdalnie", None, 1)]
+    assert {"idx_jobs_clean_city", "idx_jobs_clean_remote", "idx_jobs_clean_seniority"} <= idx
+    assert backfill_normalized(engine) == 0
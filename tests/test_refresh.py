@@ -0,0 +1,95 @@
+import asyncio
+import datetime as dt
+
+from sqlalchemy import create_engine, text
+
+from bench.nfj_server import FakeNFJ, NFJServer
+from services.worker.etl.dedup import NearDupIndex
+from services.worker.etl.frontier import Frontier
+from services.worker.etl.httpcache import HttpCache
+from services.worker.etl.main import ensure_schema, run_sources, WriterSink, WRITER_STATEMENTS, prepare_jobs
+from services.worker.etl.refresh import Refresher
+from services.worker.etl.writer import Writer
+from services.worker.etl.sources import nofluff, nofluff_parser
+
+def _engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'r.db'}", future=True)
+    ensure_schema(engine)
+    return engine
+
+def test_plan_orders_by_staleness_churn_and_listing_absence(tmp_path):
+    engine = _engine(tmp_path)
+    now = dt.datetime(2024, 6, 1, 12, 0)
+    ago = lambda h: (now - dt.timedelta(hours=h)).isoformat(timespec="seconds")
+    rows = [
+        # url, last_fetched_at, last_seen_at, checks, changes
+        ("https://x.test/pl/job/fresh", ago(1), ago(1), 0, 0),      # sprawdzona przed chwilą -> poza planem
+        ("https://x.test/pl/job/stable", ago(24), ago(1), 10, 0),   # dawno, ale nigdy się nie zmienia
+        ("https://x.test/pl/job/churn", ago(24), ago(1), 10, 8),    # zmienia się często
+        ("https://x.test/pl/job/unseen", ago(24), ago(100), 10, 0), # znikła z listingów
+    ]
+    with engine.begin() as conn:
+        for url, fetched, seen, checks, changes in rows:
+            conn.execute(text(
+                "INSERT INTO crawl_frontier(url, discovered_at, status, attempts, last_fetched_at, last_seen_at, "
+                "checks, changes) VALUES (:u, :f, 'done', 1, :f, :s, :c, :ch)"
+            ), {"u": url, "f": fetched, "s": seen, "c": checks, "ch": changes})
+    plan = Refresher(Frontier(engine), budget=10, min_age_hours=6, unseen_hours=48).plan(now)
+    assert [c.url.rsplit("/", 1)[1] for c in plan] == ["churn", "unseen", "stable"]
+    assert [c.unseen for c in plan] == [False, True, False]
+    assert len(Refresher(Frontier(engine), budget=1).plan(now)) == 1
+
+def test_refresh_expires_removed_offers_and_picks_up_changes(tmp_path, monkeypatch):
+    engine = _engine(tmp_path)
+    db = str(engine.url.database)
+    app = FakeNFJ(jobs=12, page_size=20, page_kb=1)
+
+    def run_etl(refresher=None):
+        frontier = Frontier(engine)
+        neardup = NearDupIndex(db)
+        writer = Writer(db, WRITER_STATEMENTS, batch_size=5, prepare={"job": prepare_jobs(neardup)})
+        writer.start()
+        try:
+            src = nofluff.NoFluffSource(concurrency=4, refresh=refresher and refresher(frontier))
+            stats = asyncio.run(run_sources([src], WriterSink(writer, frontier)))["nofluff"]
+        finally:
+            for kind, params in frontier.take():
+                writer.put(kind, params)
+            writer.close()
+            neardup.close()
+        return stats
+
+    with NFJServer(app) as server:
+        for mod in (nofluff, nofluff_parser):
+            monkeypatch.setattr(mod, "NFJ_BASE", server.base_url)
+        monkeypatch.setattr(nofluff, "NFJ_COUNTRY", "pl")
+        # strony ofert świeże w cache przez cały test — odświeżanie i tak musi pytać serwer
+        monkeypatch.setattr(nofluff, "HTTP_CACHE",
+                            HttpCache(tmp_path / "c.db", ttl=lambda u: 3600 if "/job/" in u else 0))
+        monkeypatch.setattr(nofluff, "RAW_ARCHIVE", None)
+        monkeypatch.setattr(nofluff, "NFJ_DELAY", 0)
+        assert run_etl()["fetched"] == 12
+
+        gone, changed = app.jobs[0]["slug"], app.jobs[1]["slug"]
+        app.expire(gone)
+        app.by_slug[changed]["company"] = "Nowa Firma S.A."
+        with engine.begin() as conn:  # wszystko pobrane i widziane na listingu dwa dni temu
+            conn.execute(text("UPDATE crawl_frontier SET last_fetched_at = :t, last_seen_at = :t"),
+                         {"t": (dt.datetime.now() - dt.timedelta(days=2)).isoformat(timespec="seconds")})
+        stats = run_etl(lambda f: Refresher(f, budget=100, min_age_hours=6, unseen_hours=1))
+        assert stats["refresh_planned"] == 12 and stats["refresh_unseen"] == 1
+        assert (stats["refresh_expired"], stats["refresh_changed"]) == (1, 1)
+        assert stats["refresh_requests"] == 1 + 11 * 2  # HEAD dla wszystkich, GET tylko dla żywych
+
+        # drugi przebieg: ETag znany -> same HEAD-y, bez pobierania stron
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE crawl_frontier SET last_checked_at = '2000-01-01T00:00:00'"))
+        heads = run_etl(lambda f: Refresher(f, budget=100, min_age_hours=6, unseen_hours=1))
+        assert (heads["refresh_requests"], heads["refresh_unchanged"]) == (11, 11)
+
+    with engine.begin() as conn:
+        expired = conn.execute(text("SELECT id FROM jobs_clean WHERE expired_at IS NOT NULL")).scalars().all()
+        company = conn.execute(text("SELECT company FROM jobs_clean WHERE id LIKE :u"), {"u": f"%{changed}"}).scalar()
+        status = conn.execute(text("SELECT status FROM crawl_frontier WHERE url LIKE :u"), {"u": f"%{gone}"}).scalar()
+    assert [u.rsplit("/", 1)[1] for u in expired] == [gone] and status == "expired"
+    assert company == "Nowa Firma S.A."
@@ -0,0 +1,74 @@
+import sqlite3
+
+from sqlalchemy import create_engine, text
+
+from bench import bench_queries
+from services.api import app as api
+from services.worker.etl.main import ensure_schema, bulk_upsert
+from services.worker.etl.migrations import LATEST, SCHEMA_KEY
+
+# jobs_table / jobs_clean sprzed migracji: same TEXT, bez klucza głównego, każda oferta w obu tabelach
+_OLD_COLS = "id, title, company, location, seniority, url, posted_at, source, skills, city, remote, updated_at"
+_OLD_DDL = [
+    f"CREATE TABLE jobs_table ({_OLD_COLS.replace(', ', ' VARCHAR, ')} VARCHAR, dup_of VARCHAR)",
+    f"CREATE TABLE jobs_clean ({_OLD_COLS.replace(', ', ' VARCHAR, ')} VARCHAR)",
+    "CREATE UNIQUE INDEX idx_jobs_table_id ON jobs_table(id)",
+    "CREATE UNIQUE INDEX idx_jobs_clean_id ON jobs_clean(id)",
+]
+
+def _offer(i, **kw):
+    return dict({"id": f"https://x.test/job/{i}", "title": f"Python Developer {i}", "company": f"Firma {i}",
+                 "location": "Poznań", "seniority": "Senior", "url": f"https://x.test/job/{i}",
+                 "posted_at": "2024-05-01", "source": "nofluff", "skills": "python,sql"}, **kw)
+
+def test_old_database_is_migrated_in_place(tmp_path):
+    db = tmp_path / "old.db"
+    con = sqlite3.connect(db)
+    with con:
+        for ddl in _OLD_DDL:
+            con.execute(ddl)
+        for table in ("jobs_table", "jobs_clean"):
+            con.executemany(f"INSERT INTO {table}(id, title, posted_at, skills) VALUES (?, ?, '2024-05-01', 'python')",
+                            [(f"u{i}", f"Data Engineer {i}") for i in range(5)])
+    con.close()
+    engine = create_engine(f"sqlite:///{db}", future=True)
+    ensure_schema(engine)
+    ensure_schema(engine)  # drugi raz: nic do zrobienia
+    with engine.begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'jobs_clean'")).scalar_one()
+        version = conn.execute(text("SELECT value FROM db_meta WHERE key = :k"), {"k": SCHEMA_KEY}).scalar_one()
+        counts = [conn.execute(text(f"SELECT COUNT(*) FROM {t}")).scalar_one()
+                  for t in ("jobs_clean", "jobs_table", "jobs_all")]
+        found = conn.execute(text("SELECT COUNT(*) FROM jobs_fts WHERE jobs_fts MATCH 'engineer'")).scalar_one()
+    assert "posted_at DATE" in ddl and "PRIMARY KEY (id)" in ddl and version == LATEST
+    assert counts == [5, 0, 5] and found == 5
+
+def test_rewriting_unchanged_offer_touches_nothing(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'u.db'}", future=True)
+    ensure_schema(engine)
+
+    def state():
+        with engine.begin() as conn:
+            return (conn.execute(text("SELECT value FROM db_meta WHERE key = 'data_version'")).scalar_one(),
+                    conn.execute(text("SELECT updated_at FROM jobs_clean WHERE id LIKE '%/1'")).scalar_one())
+
+    bulk_upsert(engine, [_offer(1), _offer(2)])
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE jobs_clean SET updated_at = '2000-01-01T00:00:00'"))
+    before = state()
+    bulk_upsert(engine, [_offer(1), _offer(2)])
+    assert state() == before
+    bulk_upsert(engine, [_offer(1, company="Nowa Firma")])
+    version, updated = state()
+    assert version == before[0] + 1 and updated > before[1]
+
+def test_api_and_dashboard_queries_avoid_full_scans(tmp_path, monkeypatch):
+    db = tmp_path / "q.db"
+    bench_queries.build_db(db, 2000)
+    monkeypatch.setattr(api, "engine", create_engine(f"sqlite:///{db}"))
+    con = sqlite3.connect(db)
+    try:
+        scans = [c.name for c in bench_queries.cases() if bench_queries.full_scan(bench_queries.plan(con, c))]
+    finally:
+        con.close()
+    assert scans == []
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from services.worker.etl.frontier import Frontier
+from services.worker.etl.main import (
+    ensure_schema, run_sources, WriterSink, WRITER_STATEMENTS, prepare_jobs,
+)
+from services.worker.etl.dedup import NearDupIndex
+from services.worker.etl.writer import Writer
+from services.worker.etl.sources.base import (
+    RECORD_FIELDS, RecordSink, Source, build_sources, finalize, parse_names,
+)
+from services.worker.etl.sources.jj_apify import map_item
+
+def test_finalize_and_jj_mapping_share_one_shape():
+    assert finalize({"id": "x"}, "demo") is None
+    rec = map_item({
+        "slug": "acme-python-dev", "title": "Python Dev", "company_name": "ACME", "city": "Kraków",
+        "experience": "mid", "published_at": "2024-05-02T10:00:00Z",
+        "skills": [{"name": "Python"}, {"name": "SQL"}], "body": "Praca z danymi",
+    })
+    assert tuple(rec) == RECORD_FIELDS
+    assert rec["url"] == "https://justjoin.it/job-offer/acme-python-dev"
+    assert (rec["posted_at"], rec["source"], rec["location"]) == ("2024-05-02", "justjoin", "Kraków")
+    assert rec["description"].endswith("Skills: python,sql")
+
+def test_parse_names_rejects_unknown_sources():
+    assert parse_names(" nofluff, dummy ,nofluff") == ["nofluff", "dummy"]
+    with pytest.raises(ValueError, match="pracuj"):
+        parse_names("nofluff,pracuj")
+    assert [s.name for s in build_sources(["dummy", "jj_apify"], jj_apify={"limit": 5})] == ["dummy", "jj_apify"]
+
+def test_source_without_run_fails_at_construction():
+    class Incomplete(Source):
+        name = "incomplete"
+
+    with pytest.raises(TypeError, match="run"):
+        Incomplete()
+
+class SlowSource(Source):
+    name = "slow"
+
+    async def run(self, sink: RecordSink):
+        for i, title in enumerate(("Go Developer", "QA Automation Engineer", "Product Designer")):
+            await asyncio.sleep(0.01)
+            await sink.emit(f"https://slow.test/{i}", finalize({"id": f"slow-{i}", "title": title, "company": f"Firma {i}"}, "slow"))
+        return {"discovered": 3, "fetched": 3}
+
+class BrokenSource(Source):
+    name = "broken"
+
+    async def run(self, sink: RecordSink):
+        raise RuntimeError("api down")
+
+class OfflineSource(Source):
+    name = "offline"
+
+    def unavailable(self):
+        return "brak tokenu"
+
+    async def run(self, sink: RecordSink):
+        raise AssertionError("niedostępne źródło nie powinno ruszyć")
+
+def test_sources_run_concurrently_into_one_writer(tmp_path):
+    db = tmp_path / "s.db"
+    engine = create_engine(f"sqlite:///{db}", future=True)
+    ensure_schema(engine)
+    neardup = NearDupIndex(str(db))
+    writer = Writer(str(db), WRITER_STATEMENTS, batch_size=2, prepare={"job": prepare_jobs(neardup)})
+    writer.start()
+    try:
+        sources = build_sources(["dummy"]) + [SlowSource(), BrokenSource(), OfflineSource()]
+        stats = asyncio.run(run_sources(sources, WriterSink(writer, Frontier(engine))))
+    finally:
+        writer.close()
+        neardup.close()
+    # błąd jednego źródła i brak konfiguracji drugiego nie zatrzymują reszty
+    assert stats == {"dummy": {"discovered": 3, "fetched": 3}, "slow": {"discovered": 3, "fetched": 3},
+                     "broken": {"failed": 1}, "offline": {}}
+    with engine.begin() as conn:
+        rows = conn.execute(text("SELECT source, COUNT(*) FROM jobs_clean GROUP BY source")).all()
+    assert dict(rows) == {"demo": 3, "slow": 3}
+
+def test_full_write_queue_blocks_only_emitting_coroutines(tmp_path):
+    db = tmp_path / "b.db"
+    engine = create_engine(f"sqlite:///{db}", future=True)
+    ensure_schema(engine)
+    neardup = NearDupIndex(str(db))
+    # wątek zapisu jeszcze nie działa, kolejka mieści jedną operację
+    writer = Writer(str(db), WRITER_STATEMENTS, queue_size=1, prepare={"job": prepare_jobs(neardup)})
+    sink = WriterSink(writer, Frontier(engine))
+    recs = [finalize({"id": f"q-{i}", "title": f"Oferta {i}"}, "q") for i in range(3)]
+
+    async def scenario():
+        emits = asyncio.gather(*(sink.emit(r["id"], r) for r in recs))
+        ticks = 0
+        for _ in range(10):  # pętla zdarzeń żyje, mimo że kolejka zapisu jest pełna
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not emits.done()
+        writer.start()
+        await emits
+        await sink.sync()
+        return ticks
+
+    try:
+        assert asyncio.run(scenario()) == 10
+    finally:
+        sink.close()
+        writer.close()
+        neardup.close()
+    assert writer.committed["job"] == 3
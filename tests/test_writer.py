@@ -0,0 +1,22 @@
+import sqlite3
+
+from services.worker.etl.writer import Writer
+
+def test_writer_batches_and_flushes_on_close(tmp_path):
+    db = str(tmp_path / "w.db")
+    con = sqlite3.connect(db)
+    con.execute("CREATE TABLE t (id TEXT PRIMARY KEY, v INTEGER)")
+    con.close()
+
+    batches = []
+    upsert = "INSERT INTO t(id, v) VALUES (:id, :v) ON CONFLICT(id) DO UPDATE SET v=excluded.v"
+    with Writer(db, {"row": [upsert]}, batch_size=4, max_delay=60, count_kind="row",
+                on_commit=lambda b: batches.append(len(b["row"]))) as w:
+        for i in range(10):
+            w.put("row", {"id": str(i % 7), "v": i})
+
+    assert batches == [4, 4, 2]
+    assert w.committed["row"] == 10
+    con = sqlite3.connect(db)
+    assert con.execute("SELECT COUNT(*), SUM(v) FROM t").fetchone() == (7, 3 + 4 + 5 + 6 + 7 + 8 + 9)
+    assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"